@@ -12,11 +12,52 @@ class Settings(BaseSettings):
 
     # OCR — PaddleOCR (free, offline, high accuracy)
     USE_PADDLEOCR: bool = True  # Use PaddleOCR (CPU) as primary OCR engine
+    USE_ONNX_OCR: bool = False  # Run the PP-OCR models under onnxruntime instead of paddlepaddle
+    ONNX_OCR_MODEL_DIR: str = ""              # Exported det/rec/cls .onnx (empty = rapidocr's bundled PP-OCRv4)
+    ONNX_INTRA_OP_THREADS: int = -1           # Threads per operator (-1 = onnxruntime default)
+    ONNX_INTER_OP_THREADS: int = -1           # Threads across operators (-1 = onnxruntime default)
+    OCR_PROFILE: str = ""                     # Force fast | balanced | accurate (empty = per request)
+    OCR_FAST_QUEUE_DEPTH: int = 3             # Pipeline queue depth at which OCR drops to "fast"
+    OCR_RETRY_MIN_CONFIDENCE: float = 0.80    # Re-run with "accurate" below this mean confidence
+    OCR_WARMUP: bool = False                  # Load models + dummy inference at startup (/api/health waits)
+    OCR_WARMUP_PROFILES: str = "balanced,accurate"
+    OCR_PRELOAD: bool = False                 # Load in the parent before fork (gunicorn --preload; ONNX only)
+    OCR_FAST_DET_MODEL_DIR: str = ""          # Optional mobile model dirs for the "fast" profile
+    OCR_FAST_REC_MODEL_DIR: str = ""
+    OCR_ACCURATE_DET_MODEL_DIR: str = ""      # Server model dirs for "accurate" (e.g. PP-OCRv4 server)
+    OCR_ACCURATE_REC_MODEL_DIR: str = ""
 
     # AI / LLM — Gemini for receipt structuring
     GEMINI_API_KEY: str = ""  # Google AI Studio key
     GEMINI_API_MODEL: str = "gemini-3-flash-preview"
 
+    # Document pipeline admission control (per uvicorn worker)
+    PIPELINE_WORKERS: int = 2               # Concurrent OCR/Gemini jobs (matches thread pools)
+    PIPELINE_MAX_QUEUE_DEPTH: int = 8       # Jobs allowed to wait for a worker before 503
+    PIPELINE_MAX_WAIT_SECONDS: float = 45.0 # Reject when the estimated wait exceeds this
+
+    # Digital PDF extraction (document_extraction) — spawned process pool, started on first PDF
+    PDF_WORKERS: int = 2                    # Processes extracting PDF pages
+    PDF_PAGES_PER_TASK: int = 4             # Pages extracted per worker task
+    PDF_WORKER_NICE: int = 5                # Niceness added to PDF workers (0 = same priority as the API)
+
+    # Learned category mappings cached per worker (validated by households.category_mapping_version)
+    CATEGORY_CACHE_HOUSEHOLDS: int = 256
+
+    # Local item classifier (hashed n-gram naive Bayes, retrained nightly from category_overrides)
+    ITEM_CLASSIFIER_PATH: str = "./models/item_classifier.npz"
+    ITEM_CLASSIFIER_MIN_CONFIDENCE: float = 0.90   # Below this, keyword map / Gemini decide
+    RECEIPT_LOCAL_FAST_PATH: bool = True           # Skip Gemini when every item is confident and totals reconcile
+
+    # Bank statement import
+    BANK_IMPORT_CHUNK_SIZE: int = 1000             # Transactions parsed + inserted per batch
+    BANK_LAYOUT_MIN_CONFIDENCE: float = 0.95       # Layout parse reconciling this share of balances skips Gemini
+    STATEMENT_TEMPLATES: bool = True               # Learn per-bank layouts from Gemini results, parse repeats locally
+
+    # Crowd-sourced product catalog (rebuilt nightly from pantry items + overrides)
+    CATALOG_MIN_HOUSEHOLDS: int = 2                # Households that must agree before a product is published
+    CATALOG_SNAPSHOT_TTL_SECONDS: int = 300        # How often workers re-check the catalog version
+
     # Storage — local disk now, S3/MinIO later
     USE_LOCAL_STORAGE: bool = True
     LOCAL_UPLOAD_DIR: str = "./uploads"
@@ -31,6 +72,29 @@ class Settings(BaseSettings):
     FRONTEND_ORIGIN: str = "http://localhost:3000"
     MOBILE_ORIGIN: str = "http://localhost:8081"
 
+    # Outbound HTTP (Plaid, Expo, Spoonacular) — one pooled client per upstream
+    HTTP2_ENABLED: bool = True                # Used when the h2 package is installed (httpx[http2])
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 20   # Connection cap per upstream API
+    HTTP_KEEPALIVE_SECONDS: float = 30.0      # Idle pooled connections are closed after this
+
+    # Background jobs
+    SCHEDULER_LEADER_ELECTION: bool = True    # One worker/replica runs jobs (Postgres advisory lock); off = every process
+    SCHEDULER_HEARTBEAT_SECONDS: int = 15     # Leader ping / follower takeover attempt interval
+
+    # Expiry alerts
+    EXPIRY_ALERT_HOUR: int = 8                # Local hour (household timezone) the daily alert goes out
+    EXPIRY_ALERT_THRESHOLDS: str = "3,1,0"    # Days-left levels; each item is alerted once per level crossed
+    EXPIRY_SCAN_SHARDS: int = 4               # Household shards scanned concurrently
+    EXPIRY_SCAN_BATCH_SIZE: int = 500         # Households per keyset page
+
+    # Expo push delivery
+    EXPO_ACCESS_TOKEN: str = ""               # Optional; required only if the Expo project enforces push security
+    EXPO_PUSH_BATCH_SIZE: int = 100           # Messages per Expo request (Expo max 100)
+    EXPO_PUSH_CONCURRENCY: int = 6            # Expo requests in flight
+    EXPO_RECEIPT_POLL_MINUTES: int = 15       # Receipt job interval (0 = off)
+    EXPO_RECEIPT_DELAY_MINUTES: int = 15      # Wait after sending before asking for a receipt
+    EXPO_RECEIPT_RETENTION_DAYS: int = 7      # push_tickets rows kept this long
+
     # Phase 2 — Recipe suggestions
     SPOONACULAR_API_KEY: str = ""   # Optional; falls back to built-in recipes if not set
 
@@ -38,6 +102,23 @@ class Settings(BaseSettings):
     PLAID_CLIENT_ID: str = ""
     PLAID_SECRET: str = ""
     PLAID_ENV: str = "sandbox"      # sandbox | development | production
+    PLAID_BASE_URL: str = ""        # Overrides the PLAID_ENV host (e.g. http://127.0.0.1:8765 for scripts.plaid_standin)
+    PLAID_SYNC_PAGE_SIZE: int = 500 # Transactions per /transactions/sync page (Plaid max 500)
+    PLAID_INSTITUTION_CACHE_HOURS: int = 168  # Institution name / logo cache lifetime
+
+    # Background Plaid sync (plaid_sync_scheduler)
+    PLAID_SYNC_SCHEDULE: bool = True          # Periodically sync every linked item
+    PLAID_SYNC_TICK_MINUTES: int = 5          # How often the scheduler looks for due items
+    PLAID_SYNC_INTERVAL_MINUTES: int = 360    # An item is due once its last sync is older than this
+    PLAID_SYNC_BATCH_SIZE: int = 200          # Due items loaded per keyset batch
+    PLAID_SYNC_CONCURRENCY: int = 16          # Item syncs in flight overall
+    PLAID_SYNC_PER_INSTITUTION: int = 4       # ... and per institution
+    PLAID_SYNC_BACKOFF_SECONDS: int = 30      # First backoff after a rate limit / failure, doubled per repeat
+    PLAID_SYNC_BACKOFF_MAX_MINUTES: int = 1440
+    PLAID_WEBHOOK_URL: str = ""               # Public URL of /api/plaid/webhook; set → webhooks drive syncs
+    PLAID_WEBHOOK_VERIFY: bool = True         # Check the Plaid-Verification JWT (disable only for local testing)
+    PLAID_WEBHOOK_DEBOUNCE_SECONDS: float = 10.0  # Webhooks for one item within this window → one sync
+    PLAID_SYNC_SAFETY_INTERVAL_MINUTES: int = 1440  # Poll interval when webhooks are on (safety net)
 
     # Configurable subscription keywords (comma-separated, or leave empty for defaults)
     KNOWN_SUBSCRIPTIONS: str = ""
@@ -3,6 +3,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
+import logging
 import os
 
 from slowapi import Limiter, _rate_limit_exceeded_handler
@@ -15,17 +17,74 @@ from app.routers import auth, receipts, pantry, budget, goals, bank, recipes, no
 from app.routers import settings as settings_router
 from app.routers import ws as ws_router
 from app.routers import chat as chat_router
+from app.services.pipeline_admission import PipelineOverloaded, pipeline_admission
+
+logger = logging.getLogger(__name__)
 
 # ── Rate limiter ──────────────────────────────────────────────
 limiter = Limiter(key_func=get_remote_address, default_limits=["200/minute"])
 
+# ── Model preload (before fork) ───────────────────────────────
+# Under `gunicorn --preload -k uvicorn.workers.UvicornWorker` this module is
+# imported once in the master, so OCR models loaded here are shared
+# copy-on-write by every forked worker.  Only onnxruntime sessions without an
+# intra-op thread pool survive fork; paddlepaddle's predictor threads do not.
+_models_preloaded = False
+if settings.OCR_PRELOAD:
+    if settings.USE_ONNX_OCR and settings.ONNX_INTRA_OP_THREADS == 1:
+        from app.services.ai_document_service import warm_up_pipeline
+        warm_up_pipeline(include_gemini=False)
+        _models_preloaded = True
+    else:
+        logger.warning(
+            "OCR_PRELOAD requires USE_ONNX_OCR=true and ONNX_INTRA_OP_THREADS=1 — "
+            "falling back to per-worker warm-up"
+        )
 
-async def _run_expiry_check():
-    """Scheduled job: send push alerts for items expiring in the next 3 days."""
+
+async def _warm_up_models(app: FastAPI) -> None:
+    """Background startup task: load OCR + Gemini, then flip /api/health to ready."""
+    from app.services.ai_document_service import warm_up_pipeline_async
+    try:
+        await warm_up_pipeline_async()
+    except Exception as exc:
+        logger.warning("Model warm-up failed — models will load on first request: %s", exc)
+    finally:
+        app.state.ready = True
+
+
+async def _run_item_classifier_training():
+    """Scheduled job: retrain the local item classifier from all category_overrides."""
     from app.database import AsyncSessionLocal
-    from app.services.notification_service import send_expiry_notifications
+    from app.services.item_classifier import retrain_from_overrides
+    async with AsyncSessionLocal() as db:
+        await retrain_from_overrides(db)
+
+
+async def _run_product_catalog_refresh():
+    """Scheduled job: rebuild the crowd-sourced product catalog."""
+    from app.database import AsyncSessionLocal
+    from app.services.product_catalog_service import refresh_product_catalog
     async with AsyncSessionLocal() as db:
-        await send_expiry_notifications(db, days_ahead=3)
+        await refresh_product_catalog(db)
+
+
+async def _run_expiry_check():
+    """Scheduled job (hourly): alert households where it is now EXPIRY_ALERT_HOUR about items expiring in 3 days."""
+    from app.services.notification_service import send_expiry_notifications
+    await send_expiry_notifications(days_ahead=3, local_hour=settings.EXPIRY_ALERT_HOUR)
+
+
+async def _run_push_receipts():
+    """Scheduled job: fetch Expo push receipts and prune dead tokens."""
+    from app.services.push_receipts import check_push_receipts
+    await check_push_receipts()
+
+
+async def _run_plaid_sync():
+    """Scheduled job: sync linked Plaid items that are due."""
+    from app.services.plaid_sync_scheduler import run_plaid_sync
+    await run_plaid_sync()
 
 
 @asynccontextmanager
@@ -36,17 +95,45 @@ async def lifespan(app: FastAPI):
     # Create upload dir if using local storage
     os.makedirs(settings.LOCAL_UPLOAD_DIR, exist_ok=True)
 
-    # Phase 2: Schedule daily expiry notification at 8 AM
+    # Optional warm-up: /api/health reports not-ready until models are loaded
+    app.state.ready = True
+    warmup_task = None
+    if settings.OCR_WARMUP or _models_preloaded:
+        app.state.ready = False
+        warmup_task = asyncio.create_task(_warm_up_models(app))
+
+    # Scheduled jobs — run by one elected worker across workers and replicas
     try:
-        from apscheduler.schedulers.asyncio import AsyncIOScheduler
-        scheduler = AsyncIOScheduler()
-        scheduler.add_job(_run_expiry_check, "cron", hour=8, minute=0, id="expiry_check")
-        scheduler.start()
+        from app.services.job_coordinator import job_coordinator
+        job_coordinator.register("expiry_check", _run_expiry_check, "cron", minute=0)
+        job_coordinator.register("item_classifier_training", _run_item_classifier_training, "cron", hour=3, minute=30)
+        job_coordinator.register("product_catalog_refresh", _run_product_catalog_refresh, "cron", hour=4, minute=0)
+        if settings.EXPO_RECEIPT_POLL_MINUTES > 0:
+            job_coordinator.register(
+                "push_receipts", _run_push_receipts, "interval", minutes=settings.EXPO_RECEIPT_POLL_MINUTES,
+            )
+        if settings.PLAID_SYNC_SCHEDULE and settings.PLAID_CLIENT_ID and settings.PLAID_SECRET:
+            job_coordinator.register(
+                "plaid_sync", _run_plaid_sync, "interval", minutes=settings.PLAID_SYNC_TICK_MINUTES,
+            )
+        await job_coordinator.start()
         yield
-        scheduler.shutdown(wait=False)
+        await job_coordinator.stop()
     except ImportError:
         yield  # APScheduler not installed — skip scheduling
 
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+
+    from app.services.document_extraction import shutdown_pdf_pool
+    shutdown_pdf_pool()
+
+    from app.services.plaid_webhooks import cancel_pending_syncs
+    await cancel_pending_syncs()
+
+    from app.services.http_client import close_http_clients
+    await close_http_clients()
+
     # Shutdown: close DB connections
     await engine.dispose()
 
@@ -79,14 +166,25 @@ app.add_middleware(
 )
 
 
+# ── Load shedding ─────────────────────────────────────────────────────────────
+# Raised by pipeline_admission when OCR/LLM capacity is exhausted.  Retry-After
+# is computed from the current queue depth and recent service time.
+@app.exception_handler(PipelineOverloaded)
+async def _pipeline_overloaded_handler(request: Request, exc: PipelineOverloaded) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Document processing is busy — please retry shortly", "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 # ── Global exception handler ─────────────────────────────────────────────────
 # Starlette's ExceptionMiddleware catches unhandled 500s BEFORE CORSMiddleware
 # can add headers, so the browser sees a CORS error instead of the real 500.
 # This handler re-attaches CORS headers to every error response.
 @app.exception_handler(Exception)
 async def _unhandled_exception_handler(request: Request, exc: Exception) -> JSONResponse:
-    import traceback, logging
-    logging.getLogger(__name__).error(
+    logger.error(
         "Unhandled exception on %s %s: %s",
         request.method, request.url.path,
         exc, exc_info=True,
@@ -129,11 +227,29 @@ async def root():
     return {"status": "ok", "app": settings.APP_NAME}
 
 
+@app.get("/api/health/scheduler", tags=["Health"])
+async def scheduler_health():
+    """Whether this worker is the scheduler leader, and its registered jobs' last runs."""
+    from app.services.job_coordinator import job_coordinator
+    return job_coordinator.snapshot()
+
+
+@app.get("/api/health/pipeline", tags=["Health"])
+async def pipeline_health():
+    """Document pipeline load for this worker — queue depth drives autoscaling."""
+    return pipeline_admission.snapshot()
+
+
 @app.get("/api/health", tags=["Health"])
 async def health_check():
-    """Readiness probe — confirms app + DB are reachable."""
+    """Readiness probe — confirms models are warm and app + DB are reachable."""
     from app.database import AsyncSessionLocal
     from sqlalchemy import text
+    if not getattr(app.state, "ready", True):
+        return JSONResponse(
+            status_code=503,
+            content={"status": "warming_up", "db": "unchecked"},
+        )
     try:
         async with AsyncSessionLocal() as session:
             await session.execute(text("SELECT 1"))
@@ -1,8 +1,8 @@
 from app.models.user import User, Household
 from app.models.pantry import PantryItem, ProductCatalog
 from app.models.receipt import Receipt
-from app.models.goal import FinancialGoal, BankTransaction
-from app.models.notification import PushNotificationToken, Notification
+from app.models.goal import FinancialGoal, BankTransaction, StatementTemplate
+from app.models.notification import PushNotificationToken, Notification, PushTicket
 
 __all__ = [
     "User",
@@ -12,6 +12,8 @@ __all__ = [
     "Receipt",
     "FinancialGoal",
     "BankTransaction",
+    "StatementTemplate",
     "PushNotificationToken",
     "Notification",
+    "PushTicket",
 ]
@@ -1,7 +1,8 @@
 import uuid
 from datetime import datetime, date
 from decimal import Decimal
-from sqlalchemy import String, ForeignKey, DateTime, Date, Numeric, Boolean, func, Text
+from sqlalchemy import String, ForeignKey, DateTime, Date, Numeric, Boolean, Integer, func, Text, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
@@ -34,6 +35,13 @@ class FinancialGoal(Base):
 
 class BankTransaction(Base):
     __tablename__ = "bank_transactions"
+    __table_args__ = (
+        # Statement-import dedupe target (ON CONFLICT) — must exist for create_all too
+        Index(
+            "idx_bank_household_fingerprint", "household_id", "fingerprint",
+            unique=True, postgresql_where=text("fingerprint IS NOT NULL"),
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     household_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("households.id"), nullable=False)
@@ -50,6 +58,22 @@ class BankTransaction(Base):
     raw_description: Mapped[str | None] = mapped_column(Text)  # Original text from PDF
     source: Mapped[str] = mapped_column(String(20), default="upload")  # upload | plaid | manual
     plaid_transaction_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    # md5(date|lower(trim(description))|amount) — set for statement imports only
+    fingerprint: Mapped[str | None] = mapped_column(String(32), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
 
     household: Mapped["Household"] = relationship("Household", back_populates="bank_transactions")
+
+
+class StatementTemplate(Base):
+    """Learned bank statement layout (statement_templates service) — shared across households."""
+    __tablename__ = "statement_templates"
+
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    fingerprint: Mapped[str] = mapped_column(String(32), nullable=False, unique=True)  # header line signature
+    bank_name: Mapped[str | None] = mapped_column(String(255))
+    template: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    hits: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    misses: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
@@ -27,3 +27,16 @@ class Notification(Base):
     is_read: Mapped[bool] = mapped_column(Boolean, default=False)
     meta: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+
+class PushTicket(Base):
+    """An Expo push ticket awaiting / holding its receipt (push_receipts service)."""
+    __tablename__ = "push_tickets"
+
+    ticket_id: Mapped[str] = mapped_column(Text, primary_key=True)
+    token: Mapped[str] = mapped_column(Text, nullable=False)
+    # server default: push_receipts inserts (ticket_id, token) only — must exist for create_all too
+    status: Mapped[str] = mapped_column(String(10), default="pending", server_default="pending")  # pending | ok | error | expired
+    error: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    sent_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    receipt_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -2,7 +2,7 @@ import uuid
 import enum
 from datetime import datetime, date
 from decimal import Decimal
-from sqlalchemy import String, ForeignKey, DateTime, Date, Numeric, Enum, func, Boolean, Integer
+from sqlalchemy import String, ForeignKey, DateTime, Date, Numeric, Enum, func, Boolean, Integer, SmallInteger, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
@@ -42,6 +42,14 @@ class PantryItem(Base):
 
     status: Mapped[PantryStatus] = mapped_column(Enum(PantryStatus), default=PantryStatus.UNOPENED)
     on_shopping_list: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Who set expiration_date: user | catalog | default — only user dates feed the catalog
+    expiry_source: Mapped[str | None] = mapped_column(String(10))
+
+    # Expiry alert state (notification_service): threshold last alerted, the
+    # household-local date of that alert, and the expiration date it was for
+    expiry_alert_level: Mapped[int | None] = mapped_column(SmallInteger)
+    expiry_alerted_on: Mapped[date | None] = mapped_column(Date)
+    expiry_alert_for: Mapped[date | None] = mapped_column(Date)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -57,5 +65,11 @@ class ProductCatalog(Base):
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     default_category: Mapped[str | None] = mapped_column(String(100))
-    avg_shelf_life_days: Mapped[int] = mapped_column(Integer, default=30)
+    avg_shelf_life_days: Mapped[int | None] = mapped_column(Integer)  # NULL: no user-entered samples
     opened_shelf_life_days: Mapped[int | None] = mapped_column(Integer)  # e.g., salsa: 14 days once opened
+
+    # Crowd-sourced aggregation (product_catalog_service.refresh_product_catalog)
+    normalized_name: Mapped[str | None] = mapped_column(Text, unique=True)  # lower(trim(name))
+    sample_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    household_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, date
 from decimal import Decimal
-from sqlalchemy import String, ForeignKey, DateTime, Date, Numeric, Text, Boolean, func
+from sqlalchemy import String, ForeignKey, DateTime, Date, Numeric, Text, Boolean, Integer, JSON, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
@@ -19,6 +19,9 @@ class Receipt(Base):
     purchase_date: Mapped[date | None] = mapped_column(Date)
 
     raw_ocr_text: Mapped[str | None] = mapped_column(Text)      # Raw OCR output — useful for debugging
+    parsed_items: Mapped[list | None] = mapped_column(JSON)     # Items offered for review; refreshed by receipt_reparse.py
+    parser_version: Mapped[int | None] = mapped_column(Integer) # receipt_parser.PARSER_VERSION of a local parse
+    parse_method: Mapped[str | None] = mapped_column(String(10)) # local | gemini — who produced parsed_items
     is_reconciled: Mapped[bool] = mapped_column(Boolean, default=False)  # Matched to bank statement?
     processing_status: Mapped[str] = mapped_column(String(50), default="PENDING")
     # PENDING | PROCESSING | DONE | FAILED
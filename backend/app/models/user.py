@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import String, ForeignKey, DateTime, Numeric, func
+from sqlalchemy import String, ForeignKey, DateTime, Numeric, BigInteger, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
@@ -14,6 +14,9 @@ class Household(Base):
     currency_code: Mapped[str] = mapped_column(String(3), default="USD")
     budget_limit: Mapped[Decimal] = mapped_column(Numeric(10, 2), default=600.00)
     invite_code: Mapped[str | None] = mapped_column(String(20), unique=True, nullable=True)
+    # Bumped whenever category_overrides change — invalidates per-worker mapping caches
+    category_mapping_version: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
+    timezone: Mapped[str] = mapped_column(String(64), default="UTC", server_default="UTC")  # IANA name
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
 
     users: Mapped[list["User"]] = relationship("User", back_populates="household")
@@ -13,8 +13,11 @@ from app.models.user import User
 from app.models.goal import BankTransaction
 from app.models.receipt import Receipt
 from app.routers.auth import get_current_user
-from datetime import date as date_type, datetime
-from app.services.bank_parser import parse_bank_file
+from app.services.bank_parser import ParsedTransaction, iter_bank_csv, parse_bank_pdf_async
+from app.services.pipeline_admission import (
+    ClientDisconnected, PipelineOverloaded, pipeline_admission, run_unless_disconnected,
+)
+from app.services.transaction_ingest import ingest_transactions
 from app.config import settings
 
 from slowapi import Limiter
@@ -24,21 +27,6 @@ _limiter = Limiter(key_func=get_remote_address)
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-DEFAULT_SUBSCRIPTIONS = [
-    "NETFLIX", "SPOTIFY", "HULU", "DISNEY+", "HBO", "AMAZON PRIME",
-    "APPLE.COM", "GOOGLE ONE", "MICROSOFT", "GYM", "PLANET FITNESS",
-    "CRUNCH", "DROPBOX", "ADOBE", "ZOOM", "SLACK",
-]
-
-
-def get_subscription_keywords() -> list[str]:
-    """Returns subscription keywords — user-configurable via KNOWN_SUBSCRIPTIONS env var."""
-    custom = getattr(settings, "KNOWN_SUBSCRIPTIONS", "")
-    if custom:
-        return [s.strip().upper() for s in custom.split(",") if s.strip()]
-    return DEFAULT_SUBSCRIPTIONS
-
-
 @router.post("/upload-statement", status_code=status.HTTP_201_CREATED)
 @_limiter.limit("5/minute")
 async def upload_statement(
@@ -69,9 +57,13 @@ async def upload_statement(
     with open(tmp_path, "wb") as f:
         shutil.copyfileobj(file.file, f)
 
+    # Only the OCR/Gemini path competes for pipeline workers; CSV imports skip admission
+    uses_pipeline = bool(settings.GEMINI_API_KEY) and (is_pdf or is_image)
+    slot = None
+    records = None
     try:
-        # Try AI pipeline first (PaddleOCR + Gemini), fall back to regex
-        if settings.GEMINI_API_KEY and (is_pdf or is_image):
+        if uses_pipeline:
+            slot = pipeline_admission.admit()  # PipelineOverloaded → 503 + Retry-After
             from app.services.ai_document_service import process_bank_document
 
             logger.info(
@@ -79,19 +71,33 @@ async def upload_statement(
                 current_user.id, file.filename,
             )
 
-            result = await process_bank_document(tmp_path)
-            transactions = result.get("transactions", [])
+            result = await run_unless_disconnected(request, slot.run(process_bank_document(tmp_path)))
+            records = [ParsedTransaction.from_dict(tx) for tx in result.get("transactions", [])]
             method = result.get("_method", "unknown")
             bank_name = result.get("bank_name", "Unknown")
 
             logger.info(
                 "Bank statement processed via %s — bank=%s, transactions=%d",
-                method, bank_name, len(transactions),
+                method, bank_name, len(records),
             )
+        elif is_csv:
+            # Streamed from disk chunk by chunk — constant memory for any export size
+            records = iter_bank_csv(tmp_path)
+            method = "regex"
+            bank_name = "Unknown"
         else:
-            transactions = parse_bank_file(tmp_path, content_type=content_type)
+            # Page-parallel in the PDF process pool — the event loop only awaits
+            records = [ParsedTransaction.from_dict(tx) for tx in await parse_bank_pdf_async(tmp_path)]
             method = "regex"
             bank_name = "Unknown"
+
+        ingested = await ingest_transactions(db, current_user.household_id, records)
+        await db.commit()
+    except ClientDisconnected:
+        logger.info("Bank statement upload abandoned — client disconnected (user=%s)", current_user.id)
+        raise HTTPException(status_code=499, detail="Client closed request")
+    except PipelineOverloaded:
+        raise  # handled app-wide → 503 + Retry-After
     except Exception as exc:
         logger.error("Bank statement processing failed: %s", exc, exc_info=True)
         raise HTTPException(
@@ -99,65 +105,16 @@ async def upload_statement(
             detail=f"Statement processing failed: {type(exc).__name__}: {exc}",
         )
     finally:
+        if hasattr(records, "close"):
+            records.close()  # CSV generator — release the file handle before deleting it
         os.remove(tmp_path)  # Delete file after parsing (privacy)
-
-    saved = []
-    subscriptions = []
-    skipped = 0
-    for tx in transactions:
-        desc = tx.get("description", "")
-        amount = tx.get("amount", 0)
-
-        # Parse date — Gemini returns strings, regex returns date objects
-        tx_date = tx.get("date")
-        if isinstance(tx_date, str):
-            try:
-                tx_date = datetime.strptime(tx_date, "%Y-%m-%d").date()
-            except (ValueError, TypeError):
-                tx_date = date_type.today()
-        elif tx_date is None:
-            tx_date = date_type.today()
-
-        # Duplicate protection — skip if same (date, description, amount) already exists
-        dup = await db.execute(
-            select(BankTransaction).where(
-                and_(
-                    BankTransaction.household_id == current_user.household_id,
-                    BankTransaction.transaction_date == tx_date,
-                    BankTransaction.description == desc,
-                    BankTransaction.amount == amount,
-                )
-            ).limit(1)
-        )
-        if dup.scalar_one_or_none():
-            skipped += 1
-            continue
-
-        is_sub = any(sub in desc.upper() for sub in get_subscription_keywords())
-        is_income = tx.get("is_income", amount > 0)
-        category = tx.get("category", None)
-
-        record = BankTransaction(
-            household_id=current_user.household_id,
-            transaction_date=tx_date,
-            description=desc,
-            amount=amount,
-            is_subscription=is_sub,
-            is_income=is_income,
-            category=category,
-            raw_description=tx.get("raw_line") or tx.get("raw_description"),
-        )
-        db.add(record)
-        saved.append(record)
-        if is_sub:
-            subscriptions.append({"description": desc, "amount": amount})
-
-    await db.commit()
+        if slot is not None:
+            slot.release()
 
     return {
-        "transactions_imported": len(saved),
-        "duplicates_skipped": skipped,
-        "subscriptions_found": subscriptions,
+        "transactions_imported": ingested.imported,
+        "duplicates_skipped": ingested.duplicates,
+        "subscriptions_found": ingested.subscriptions,
         "parsing_method": method,
         "bank_name": bank_name,
     }
@@ -77,12 +77,16 @@ async def mark_all_read(
 @router.post("/trigger-expiry")
 async def trigger_expiry_notifications(
     days_ahead: int = Body(default=3, embed=True),
-    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
-    Manually trigger expiry-alert notifications for all households.
-    In production this would be called by a cron job (e.g., every morning at 8 AM).
+    Manually trigger expiry-alert notifications for the caller's household,
+    whatever its local time.  The scheduled job runs hourly and alerts each
+    household at EXPIRY_ALERT_HOUR in its own timezone.
     """
-    result = await ns.send_expiry_notifications(db, days_ahead=days_ahead)
+    if not current_user.household_id:
+        raise HTTPException(status_code=400, detail="User is not in a household")
+    result = await ns.send_expiry_notifications(
+        days_ahead=days_ahead, household_id=str(current_user.household_id),
+    )
     return result
@@ -79,6 +79,8 @@ async def add_item(
     current_user: User = Depends(get_current_user),
 ):
     item = PantryItem(household_id=current_user.household_id, **data.model_dump())
+    if item.expiration_date:
+        item.expiry_source = "user"
     db.add(item)
     await db.flush()
     return PantryItemOut.model_validate(item)
@@ -98,6 +100,8 @@ async def update_item(
 
     for field, value in data.model_dump(exclude_none=True).items():
         setattr(item, field, value)
+    if data.expiration_date:
+        item.expiry_source = "user"
 
     # When item is consumed/trashed → ask to add to shopping list
     if data.status in (PantryStatus.CONSUMED, PantryStatus.TRASHED):
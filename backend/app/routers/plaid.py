@@ -3,11 +3,12 @@ Plaid router — Phase 3
 POST /api/plaid/link-token              → create Plaid Link token
 POST /api/plaid/exchange-token          → exchange public token for access token
 GET  /api/plaid/accounts                → list linked accounts
-POST /api/plaid/sync                    → pull latest transactions from Plaid
+POST /api/plaid/sync                    → pull new / changed transactions from Plaid
+POST /api/plaid/webhook                 → Plaid webhooks (signature-verified, no JWT)
 GET  /api/plaid/linked-items            → list all linked bank integrations
 DELETE /api/plaid/items/{item_id}       → unlink a bank account
 """
-from fastapi import APIRouter, Depends, Body, HTTPException, status
+from fastapi import APIRouter, Depends, Body, HTTPException, Request, status
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
@@ -16,7 +17,12 @@ import uuid
 from app.database import get_db
 from app.routers.auth import get_current_user
 from app.models.user import User
+from app.services.plaid_institutions import get_institution
 from app.services.plaid_service import get_plaid_service
+from app.services.plaid_sync_service import sync_plaid_item
+from app.services.plaid_webhooks import (
+    SYNC_WEBHOOKS, WebhookVerificationError, record_item_error, schedule_item_sync, verify_plaid_webhook,
+)
 from app.config import settings
 
 router = APIRouter()
@@ -45,7 +51,7 @@ async def create_link_token(
     Create a Plaid Link token. The front-end uses this to open the Plaid Link widget.
     """
     svc = _require_plaid()
-    result = await svc.create_link_token(str(current_user.id))
+    result = await svc.create_link_token(str(current_user.id), webhook_url=settings.PLAID_WEBHOOK_URL)
     return {"link_token": result.get("link_token"), "expiration": result.get("expiration")}
 
 
@@ -67,16 +73,22 @@ async def exchange_public_token(
     if not access_token or not item_id:
         raise HTTPException(status_code=400, detail="Plaid token exchange failed")
 
-    institution_name = await svc.get_institution_name(item_id, access_token)
+    # Institution metadata is cached (plaid_institutions) — only /item/get per link
+    institution = await get_institution(db, svc, await svc.get_item_institution_id(access_token))
+    institution_name = institution["name"]
 
     # Save linked item to DB
     await db.execute(
         text("""
-            INSERT INTO plaid_items (id, user_id, item_id, access_token, institution_name, account_name)
-            VALUES (:id, :user_id, :item_id, :access_token, :institution_name, :account_name)
+            INSERT INTO plaid_items (id, user_id, item_id, access_token, institution_id, institution_name, account_name)
+            VALUES (:id, :user_id, :item_id, :access_token, :institution_id, :institution_name, :account_name)
             ON CONFLICT (item_id) DO UPDATE
                 SET access_token = EXCLUDED.access_token,
+                    institution_id = EXCLUDED.institution_id,
                     institution_name = EXCLUDED.institution_name,
+                    sync_error_count = 0,
+                    last_sync_error = NULL,
+                    next_sync_at = NULL,
                     updated_at = NOW()
         """),
         {
@@ -84,6 +96,7 @@ async def exchange_public_token(
             "user_id": str(current_user.id),
             "item_id": item_id,
             "access_token": access_token,
+            "institution_id": institution["institution_id"],
             "institution_name": institution_name,
             "account_name": payload.account_name or institution_name,
         },
@@ -93,6 +106,7 @@ async def exchange_public_token(
     return {
         "item_id": item_id,
         "institution_name": institution_name,
+        "institution_logo": institution["logo"],
         "status": "linked",
     }
 
@@ -105,10 +119,12 @@ async def list_linked_items(
     """List all bank accounts linked via Plaid for this user."""
     result = await db.execute(
         text("""
-            SELECT id, item_id, institution_name, account_name, created_at, last_synced_at
-            FROM plaid_items
-            WHERE user_id = :uid
-            ORDER BY created_at DESC
+            SELECT p.id, p.item_id, p.institution_name, p.account_name, p.created_at, p.last_synced_at,
+                   i.logo, i.primary_color
+            FROM plaid_items p
+            LEFT JOIN plaid_institutions i ON i.institution_id = p.institution_id
+            WHERE p.user_id = :uid
+            ORDER BY p.created_at DESC
         """),
         {"uid": str(current_user.id)},
     )
@@ -119,6 +135,8 @@ async def list_linked_items(
                 "id": str(r.id),
                 "item_id": r.item_id,
                 "institution_name": r.institution_name,
+                "institution_logo": r.logo,
+                "institution_color": r.primary_color,
                 "account_name": r.account_name,
                 "linked_at": r.created_at.isoformat() if r.created_at else None,
                 "last_synced_at": r.last_synced_at.isoformat() if r.last_synced_at else None,
@@ -131,65 +149,63 @@ async def list_linked_items(
 @router.post("/sync")
 async def sync_transactions(
     item_id: str = Body(..., embed=True),
-    days_back: int = Body(default=30, embed=True),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
-    Pull latest transactions from Plaid for a linked account and save to bank_transactions.
+    Pull transactions added, modified or removed since the item's last sync
+    (its stored /transactions/sync cursor) and apply them to bank_transactions.
+    The first sync of an item pulls its full history.
     """
     svc = _require_plaid()
 
-    # Get access token
     result = await db.execute(
-        text("SELECT access_token FROM plaid_items WHERE item_id = :iid AND user_id = :uid"),
+        text("SELECT access_token, sync_cursor FROM plaid_items WHERE item_id = :iid AND user_id = :uid"),
         {"iid": item_id, "uid": str(current_user.id)},
     )
     row = result.fetchone()
     if not row:
         raise HTTPException(status_code=404, detail="Linked account not found")
 
-    transactions = await svc.sync_transactions(row.access_token, days_back=days_back)
-
-    inserted = 0
-    for tx in transactions:
-        is_sub = _detect_subscription(tx["description"])
-        await db.execute(
-            text("""
-                INSERT INTO bank_transactions
-                    (id, household_id, transaction_date, description, amount, is_income,
-                     is_subscription, category, raw_description, source, plaid_transaction_id)
-                VALUES
-                    (:id, :hid, :date, :desc, :amount, :is_income, :is_sub,
-                     :category, :raw_desc, 'plaid', :plaid_id)
-                ON CONFLICT (plaid_transaction_id) WHERE plaid_transaction_id IS NOT NULL
-                DO NOTHING
-            """),
-            {
-                "id": str(uuid.uuid4()),
-                "hid": str(current_user.household_id),
-                "date": tx["date"],
-                "desc": tx["description"],
-                "amount": tx["amount"],
-                "is_income": tx["is_income"],
-                "is_sub": is_sub,
-                "category": tx.get("category", "Uncategorized"),
-                "raw_desc": tx.get("merchant_name", ""),
-                "plaid_id": tx.get("plaid_transaction_id"),
-            },
-        )
-        inserted += 1
+    stats = await sync_plaid_item(db, svc, item_id, row.access_token, row.sync_cursor, current_user.household_id)
 
-    await db.commit()
+    return {
+        "synced": stats.added,
+        "modified": stats.modified,
+        "removed": stats.removed,
+        "duplicates_skipped": stats.duplicates,
+        "item_id": item_id,
+    }
 
-    # Update last_synced_at
-    await db.execute(
-        text("UPDATE plaid_items SET last_synced_at = NOW() WHERE item_id = :iid"),
-        {"iid": item_id},
-    )
-    await db.commit()
 
-    return {"synced": inserted, "item_id": item_id}
+@router.post("/webhook")
+async def plaid_webhook(request: Request):
+    """
+    Plaid webhook receiver.  Authenticated by the Plaid-Verification JWT, not a
+    user token.  Transaction webhooks queue a debounced sync of just that item;
+    answers immediately so Plaid does not retry.
+    """
+    svc = _require_plaid()
+    body = await request.body()
+    if settings.PLAID_WEBHOOK_VERIFY:
+        try:
+            await verify_plaid_webhook(svc, body, request.headers.get("plaid-verification"))
+        except WebhookVerificationError as exc:
+            raise HTTPException(status_code=401, detail=f"Invalid Plaid webhook: {exc}")
+
+    event = await request.json()
+    webhook_type, webhook_code = event.get("webhook_type"), event.get("webhook_code")
+    item_id = event.get("item_id")
+    if not item_id:
+        return {"status": "ignored"}
+
+    if webhook_code in SYNC_WEBHOOKS.get(webhook_type, ()):
+        queued = schedule_item_sync(svc, item_id)
+        return {"status": "queued" if queued else "debounced"}
+    if webhook_type == "ITEM" and webhook_code == "ERROR":
+        await record_item_error(item_id, (event.get("error") or {}).get("error_code") or "UNKNOWN")
+        return {"status": "recorded"}
+    return {"status": "ignored"}
 
 
 @router.delete("/items/{item_id}", status_code=204)
@@ -207,14 +223,3 @@ async def unlink_account(
         raise HTTPException(status_code=404, detail="Linked account not found")
     await db.commit()
 
-
-SUBSCRIPTION_KEYWORDS = [
-    "netflix", "spotify", "hulu", "disney", "amazon prime", "apple", "google play",
-    "youtube", "hbo", "peacock", "paramount", "adobe", "dropbox", "icloud",
-    "planet fitness", "gym", "duolingo", "linkedin", "chegg",
-]
-
-
-def _detect_subscription(description: str) -> bool:
-    lower = description.lower()
-    return any(k in lower for k in SUBSCRIPTION_KEYWORDS)
@@ -2,6 +2,7 @@ import uuid
 import shutil
 import os
 import logging
+from datetime import date as date_type, timedelta
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status, Request
@@ -15,6 +16,11 @@ from app.models.pantry import PantryItem
 from app.schemas.receipt import ReceiptOut, ReceiptConfirm, ParsedReceiptItem
 from app.routers.auth import get_current_user
 from app.services.categorization_service import bulk_record_overrides, get_learned_mappings
+from app.services.pipeline_admission import (
+    ClientDisconnected, PipelineSlot, pipeline_slot, run_unless_disconnected,
+)
+from app.services.product_catalog_service import get_catalog_snapshot, normalize_product_name
+from app.services.receipt_parser import DEFAULT_SHELF_LIFE, PARSER_VERSION
 from app.config import settings
 
 from slowapi import Limiter
@@ -32,6 +38,7 @@ async def upload_receipt(
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    slot: PipelineSlot = Depends(pipeline_slot),  # 503 + Retry-After when the pipeline is full
 ):
     if not current_user.household_id:
         raise HTTPException(status_code=400, detail="User is not in a household")
@@ -77,10 +84,11 @@ async def upload_receipt(
             receipt.id, current_user.id, filename,
         )
 
-        parsed = await process_receipt_document(
+        # Waits for a pipeline worker; cancelled if the client hangs up meanwhile
+        parsed = await run_unless_disconnected(request, slot.run(process_receipt_document(
             save_path if settings.USE_LOCAL_STORAGE else image_url,
             learned_mappings=learned,
-        )
+        )))
 
         raw_text = parsed.get("_raw_text", "")
         method = parsed.get("_method", "unknown")
@@ -118,6 +126,19 @@ async def upload_receipt(
                 quantity=item.get("quantity", 1),
                 unit=item.get("unit"),
             ))
+        # Kept until confirm so the review screen can be reopened (GET /{id}).
+        # Local parses are stamped with the parser version so receipt_reparse
+        # revisits them after a bump; Gemini items are never re-parsed.
+        receipt.parsed_items = [i.model_dump(mode="json") for i in items]
+        receipt.parse_method = "gemini" if method == "gemini" else "local"
+        receipt.parser_version = PARSER_VERSION if receipt.parse_method == "local" else None
+
+    except ClientDisconnected:
+        logger.info("Receipt %s abandoned — client disconnected before processing finished", receipt.id)
+        await db.rollback()
+        receipt.processing_status = "FAILED"
+        await db.commit()
+        raise HTTPException(status_code=499, detail="Client closed request")
 
     except Exception as exc:
         logger.error("Receipt processing failed for %s: %s", receipt.id, exc, exc_info=True)
@@ -163,27 +184,30 @@ async def confirm_receipt(
         receipt.purchase_date = payload.purchase_date
 
     # Create pantry items from confirmed list
+    catalog = await get_catalog_snapshot(db)
+    base = receipt.purchase_date or date_type.today()
     for item_data in payload.items:
-        # Auto-populate expiration date based on category shelf life
-        exp_date = None
-        if item_data.category:
-            from app.services.receipt_parser import DEFAULT_SHELF_LIFE
-            from datetime import date as date_type, timedelta
-            shelf_days = DEFAULT_SHELF_LIFE.get(item_data.category)
-            if shelf_days:
-                base = receipt.purchase_date or date_type.today()
-                exp_date = base + timedelta(days=shelf_days)
+        # Auto-populate expiration date: crowd-sourced per-product shelf life,
+        # else the category default.  The catalog also fills a missing category.
+        entry = catalog.get(normalize_product_name(item_data.name))
+        category = item_data.category or (entry.category if entry else None)
+        if entry and entry.shelf_life_days:
+            shelf_days, expiry_source = entry.shelf_life_days, "catalog"
+        else:
+            shelf_days, expiry_source = DEFAULT_SHELF_LIFE.get(category), "default"
+        exp_date = base + timedelta(days=shelf_days) if shelf_days else None
 
         pantry_item = PantryItem(
             household_id=current_user.household_id,
             receipt_id=receipt.id,
             name=item_data.name,
-            category=item_data.category,
+            category=category,
             quantity=item_data.quantity,
             unit=item_data.unit,
             purchase_price=item_data.price,
             purchase_date=receipt.purchase_date,
             expiration_date=exp_date,
+            expiry_source=expiry_source if exp_date else None,
         )
         db.add(pantry_item)
 
@@ -210,13 +234,36 @@ async def confirm_receipt(
     return ReceiptOut.model_validate(receipt)
 
 
+def _review_items(receipt: Receipt) -> list[ParsedReceiptItem]:
+    """Confirmed receipts show their pantry items; unconfirmed ones the stored parse."""
+    from decimal import Decimal
+
+    if receipt.pantry_items:
+        return [
+            ParsedReceiptItem(
+                name=pi.name,
+                price=pi.purchase_price or Decimal("0"),
+                category=pi.category,
+                quantity=pi.quantity or Decimal("1"),
+                unit=pi.unit,
+            )
+            for pi in receipt.pantry_items
+        ]
+    items = []
+    for item in receipt.parsed_items or []:
+        try:
+            items.append(ParsedReceiptItem.model_validate(item))
+        except ValueError:
+            continue        # e.g. a line the parser could not price
+    return items
+
+
 @router.get("/", response_model=list[ReceiptOut])
 async def list_receipts(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     from sqlalchemy.orm import selectinload
-    from decimal import Decimal
 
     result = await db.execute(
         select(Receipt)
@@ -229,15 +276,26 @@ async def list_receipts(
     out = []
     for r in receipts:
         receipt_out = ReceiptOut.model_validate(r)
-        receipt_out.items = [
-            ParsedReceiptItem(
-                name=pi.name,
-                price=pi.purchase_price or Decimal("0"),
-                category=pi.category,
-                quantity=pi.quantity or Decimal("1"),
-                unit=pi.unit,
-            )
-            for pi in r.pantry_items
-        ]
+        receipt_out.items = _review_items(r)
         out.append(receipt_out)
     return out
+
+
+@router.get("/{receipt_id}", response_model=ReceiptOut)
+async def get_receipt(
+    receipt_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """One receipt — before confirm, with the parsed items to review (latest re-parse included)."""
+    from sqlalchemy.orm import selectinload
+
+    result = await db.execute(
+        select(Receipt).options(selectinload(Receipt.pantry_items)).where(Receipt.id == receipt_id)
+    )
+    receipt = result.scalar_one_or_none()
+    if not receipt or receipt.household_id != current_user.household_id:
+        raise HTTPException(status_code=404, detail="Receipt not found")
+    out = ReceiptOut.model_validate(receipt)
+    out.items = _review_items(receipt)
+    return out
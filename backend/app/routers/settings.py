@@ -7,6 +7,7 @@ import csv
 import io
 from datetime import date
 from decimal import Decimal
+from zoneinfo import available_timezones
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
@@ -40,6 +41,7 @@ class HouseholdUpdate(BaseModel):
     name: str | None = None
     currency_code: str | None = None
     budget_limit: Decimal | None = None
+    timezone: str | None = None     # IANA name, e.g. "America/Chicago" — expiry alerts go out at 8 AM local
 
 
 class HouseholdOut(BaseModel):
@@ -87,6 +89,7 @@ async def get_profile(
             "name": household.name,
             "currency_code": household.currency_code,
             "budget_limit": float(household.budget_limit),
+            "timezone": household.timezone,
             "invite_code": household.invite_code,
             "member_count": member_count,
         } if household else None,
@@ -137,7 +140,10 @@ async def update_household(
     if not household:
         raise HTTPException(status_code=404, detail="Household not found")
 
-    for field, value in data.model_dump(exclude_none=True).items():
+    updates = data.model_dump(exclude_none=True)
+    if "timezone" in updates and updates["timezone"] not in available_timezones():
+        raise HTTPException(status_code=400, detail=f"Unknown timezone '{updates['timezone']}'")
+    for field, value in updates.items():
         setattr(household, field, value)
     await db.commit()
     return {"message": "Household updated"}
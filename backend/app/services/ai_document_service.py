@@ -32,10 +32,12 @@ import logging
 import asyncio
 import time
 import threading
+from decimal import Decimal
 from typing import Literal
 from concurrent.futures import ThreadPoolExecutor
 
 from app.config import settings
+from app.services.document_extraction import ExtractedDocument, extract_document
 
 logger = logging.getLogger(__name__)
 
@@ -71,57 +73,59 @@ def _get_gemini_model():
 
 # ── Thread Pools ──────────────────────────────────────────────────────────────
 # Separate pools for OCR (CPU) and Gemini (network) so one doesn't starve the other.
+# Sized from PIPELINE_WORKERS so admission control (pipeline_admission.py) and
+# the pools agree on capacity.
 
-_ocr_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ocr")
-_gemini_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="gemini")
+_ocr_executor = ThreadPoolExecutor(max_workers=settings.PIPELINE_WORKERS, thread_name_prefix="ocr")
+_gemini_executor = ThreadPoolExecutor(max_workers=settings.PIPELINE_WORKERS, thread_name_prefix="gemini")
 
 
-# ── Raw Text Extraction (delegates to ocr_service for OCR) ──────────────────
+# ── Raw Text Extraction (delegates to document_extraction) ─────────────────
 
-def extract_text_from_file(file_path: str) -> str:
+def extract_text_from_file(file_path: str, doc_type: DocumentType = "auto") -> str:
     """
     Extract raw text from a file.  Priority:
       1. pdfplumber for digital PDFs
       2. PaddleOCR for scanned PDFs / images (via ocr_service)
       3. Tesseract as last resort (via ocr_service)
+    `doc_type` picks the OCR profile (see ocr_service.select_ocr_profile).
     """
-    ext = os.path.splitext(file_path)[1].lower()
+    return extract_document(file_path, doc_type).text
 
-    # Try digital PDF extraction first
-    if ext == ".pdf":
-        text = _extract_pdf_text(file_path)
-        if text and len(text.strip()) > 50:
-            logger.info("PDF had embedded text (%d chars), skipping OCR", len(text))
-            return text
 
-    # Image or scanned PDF — delegate to ocr_service (singleton PaddleOCR)
-    logger.info("Running PaddleOCR on %s …", os.path.basename(file_path))
-    from app.services.ocr_service import run_ocr_sync
-    text = run_ocr_sync(file_path)
-    logger.info("OCR extracted %d chars from %s", len(text), os.path.basename(file_path))
-    return text
+async def extract_document_async(file_path: str, doc_type: DocumentType = "auto") -> ExtractedDocument:
+    """
+    Non-blocking extraction of the reusable document artifact — digital PDFs
+    in the PDF process pool, OCR on the OCR thread pool.
+    """
+    from app.services.document_extraction import extract_document_async as _extract
+    return await _extract(file_path, doc_type, ocr_executor=_ocr_executor)
 
 
-def _extract_pdf_text(pdf_path: str) -> str:
-    """Extract embedded text from a digital PDF using pdfplumber."""
-    try:
-        import pdfplumber
-        pages = []
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                t = page.extract_text()
-                if t:
-                    pages.append(t)
-        return "\n".join(pages)
-    except Exception as exc:
-        logger.warning("pdfplumber failed on %s: %s", pdf_path, exc)
-        return ""
+async def extract_text_from_file_async(file_path: str, doc_type: DocumentType = "auto") -> str:
+    """Non-blocking wrapper — text of extract_document_async."""
+    return (await extract_document_async(file_path, doc_type)).text
+
+
+# ── Warm-up ──────────────────────────────────────────────────────────────────
+
+def warm_up_pipeline(include_gemini: bool = True) -> None:
+    """
+    Load every model a first request would otherwise pay for: the OCR engines
+    named in OCR_WARMUP_PROFILES (plus one dummy inference each) and the
+    Gemini model handle.  Synchronous — call from a thread or before fork
+    (with include_gemini=False: the gRPC-backed Gemini client is not fork-safe).
+    """
+    from app.services.ocr_service import warm_up
+    warm_up([p.strip() for p in settings.OCR_WARMUP_PROFILES.split(",") if p.strip()])
+    if include_gemini and settings.GEMINI_API_KEY:
+        _get_gemini_model()
 
 
-async def extract_text_from_file_async(file_path: str) -> str:
-    """Non-blocking wrapper — runs CPU-bound OCR in a thread pool."""
+async def warm_up_pipeline_async() -> None:
+    """Non-blocking wrapper — runs warm-up on the OCR pool, off the event loop."""
     loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(_ocr_executor, extract_text_from_file, file_path)
+    await loop.run_in_executor(_ocr_executor, warm_up_pipeline)
 
 
 # ── Document Classification ──────────────────────────────────────────────────
@@ -230,7 +234,7 @@ async def structure_with_gemini(
             )
             if attempt >= MAX_RETRIES - 1:
                 raise
-            time.sleep(2)  # Brief pause before retry (matches fix/main.py)
+            await asyncio.sleep(2)  # Brief pause before retry — never block the event loop
 
     raise ValueError("AI structuring failed after all retries")
 
@@ -322,13 +326,27 @@ async def process_receipt_document(file_path: str, learned_mappings: dict[str, s
     Returns: { merchant, date, total, tax, items: [...] }
     Tries Gemini first, falls back to regex parser.
     If raw_text is provided, skips OCR (avoids double extraction).
+    Local fast path: when the regex parse is fully categorized with high
+    confidence (learned mappings + item classifier) and its items add up to
+    the printed total, Gemini is skipped.
     """
+    from app.services.receipt_parser import parse_receipt_text
+
     start = time.monotonic()
     if raw_text is None:
-        raw_text = await extract_text_from_file_async(file_path)
+        raw_text = await extract_text_from_file_async(file_path, "receipt")
 
     method = "regex"
     error_msg = None
+    parsed = None
+
+    if settings.GEMINI_API_KEY and settings.RECEIPT_LOCAL_FAST_PATH:
+        parsed = parse_receipt_text(raw_text, learned_mappings=learned_mappings)
+        if _is_locally_resolved(parsed):
+            parsed["_raw_text"] = raw_text
+            parsed["_method"] = "local"
+            await _log_processing(file_path, "receipt", "local", True, time.monotonic() - start)
+            return parsed
 
     if settings.GEMINI_API_KEY:
         try:
@@ -343,24 +361,97 @@ async def process_receipt_document(file_path: str, learned_mappings: dict[str, s
             logger.warning("Gemini receipt parsing failed, falling back to regex: %s", exc)
 
     # Regex fallback — use existing receipt_parser
-    from app.services.receipt_parser import parse_receipt_text
-    parsed = parse_receipt_text(raw_text, learned_mappings=learned_mappings)
+    if parsed is None:
+        parsed = parse_receipt_text(raw_text, learned_mappings=learned_mappings)
     parsed["_raw_text"] = raw_text
     parsed["_method"] = "regex"
     await _log_processing(file_path, "receipt", method, error_msg is None, time.monotonic() - start, error_msg)
     return parsed
 
 
-async def process_bank_document(file_path: str, *, raw_text: str | None = None) -> dict:
+def _is_locally_resolved(parsed: dict) -> bool:
+    """Every item confidently categorized, and the items sum to the printed (sub)total."""
+    items = parsed.get("items") or []
+    if not items:
+        return False
+    if any(i.get("category_confidence", 0.0) < settings.ITEM_CLASSIFIER_MIN_CONFIDENCE for i in items):
+        return False
+    expected = parsed.get("subtotal") or parsed.get("total")
+    if not expected:
+        return False
+    return abs(sum(i["price"] for i in items) - expected) <= Decimal("0.01")
+
+
+async def process_bank_document(
+    file_path: str,
+    *,
+    raw_text: str | None = None,
+    document: ExtractedDocument | None = None,
+) -> dict:
     """
     Full pipeline: Extract text → Structure bank statement.
     Returns: { bank_name, transactions: [...], ... }
-    Tries Gemini first, falls back to regex parser.
-    If raw_text is provided, skips OCR (avoids double extraction).
+    Digital statements whose table/column layout reconciles against the
+    running balance (statement_layout_parser) are returned without calling
+    Gemini, as are statements matching a template learned from an earlier
+    Gemini result for the same bank layout (statement_templates).  Otherwise
+    tries Gemini — learning a template from its answer — then falls back to
+    the local parsers.
+    If document (or raw_text) is provided, skips extraction.  The fallback
+    parses the same extracted pages Gemini saw — the file is not reopened,
+    and scanned statements are parsed from their OCR text.
     """
     start = time.monotonic()
-    if raw_text is None:
-        raw_text = await extract_text_from_file_async(file_path)
+    if document is None:
+        if raw_text is not None:
+            document = ExtractedDocument.from_text(raw_text, file_path)
+        else:
+            document = await extract_document_async(file_path, "bank_statement")
+    raw_text = document.text
+
+    layout = None
+    if document.source == "pdf_text":
+        from app.services.statement_layout_parser import parse_statement_layout
+        layout = await asyncio.to_thread(parse_statement_layout, document)
+        if layout.transactions and layout.confidence >= settings.BANK_LAYOUT_MIN_CONFIDENCE:
+            logger.info(
+                "Statement layout parsed %d transactions (%d/%d balances reconciled) — skipping Gemini",
+                len(layout.transactions), layout.reconciled, layout.checked,
+            )
+            await _log_processing(file_path, "bank_statement", "layout", True, time.monotonic() - start)
+            return {
+                "bank_name": "Unknown",
+                "opening_balance": _float_or_none(layout.opening_balance),
+                "closing_balance": _float_or_none(layout.closing_balance),
+                "transactions": layout.transactions,
+                "_raw_text": raw_text,
+                "_method": "layout",
+                "_confidence": layout.confidence,
+            }
+
+        # A layout learned from an earlier Gemini result for this bank
+        from app.services.statement_templates import parse_with_stored_template, record_template_use
+        stored = await parse_with_stored_template(document)
+        if stored:
+            fingerprint, bank_name, templated = stored
+            # confidence is 0 unless the rows reconcile (balances, or the statement totals)
+            accepted = bool(templated.transactions) and templated.confidence >= settings.BANK_LAYOUT_MIN_CONFIDENCE
+            await record_template_use(fingerprint, accepted)
+            if accepted:
+                logger.info(
+                    "Statement template %s parsed %d transactions — skipping Gemini",
+                    fingerprint[:8], len(templated.transactions),
+                )
+                await _log_processing(file_path, "bank_statement", "template", True, time.monotonic() - start)
+                return {
+                    "bank_name": bank_name or "Unknown",
+                    "opening_balance": _float_or_none(templated.opening_balance),
+                    "closing_balance": _float_or_none(templated.closing_balance),
+                    "transactions": templated.transactions,
+                    "_raw_text": raw_text,
+                    "_method": "template",
+                    "_confidence": templated.confidence,
+                }
 
     method = "regex"
     error_msg = None
@@ -375,15 +466,18 @@ async def process_bank_document(file_path: str, *, raw_text: str | None = None)
             for tx in result.get("transactions", []):
                 tx.setdefault("is_income", tx.get("amount", 0) > 0)
                 tx.setdefault("category", "Other")
+            if document.source == "pdf_text":
+                from app.services.statement_templates import learn_template
+                await learn_template(document, result)
             await _log_processing(file_path, "bank_statement", method, True, time.monotonic() - start)
             return result
         except Exception as exc:
             error_msg = str(exc)
             logger.warning("Gemini bank parsing failed, falling back to regex: %s", exc)
 
-    # Regex fallback
-    from app.services.bank_parser import parse_bank_file
-    transactions = parse_bank_file(file_path)
+    # Regex fallback — over the already-extracted pages
+    from app.services.bank_parser import parse_bank_document
+    transactions = await asyncio.to_thread(parse_bank_document, document, layout)
     await _log_processing(file_path, "bank_statement", method, error_msg is None, time.monotonic() - start, error_msg)
     return {
         "bank_name": "Unknown",
@@ -393,19 +487,23 @@ async def process_bank_document(file_path: str, *, raw_text: str | None = None)
     }
 
 
+def _float_or_none(value) -> float | None:
+    return float(value) if value is not None else None
+
+
 async def process_document_auto(file_path: str) -> dict:
     """
     Auto-detect document type and process accordingly.
-    Extracts text ONCE and passes it to sub-functions (no double OCR).
+    Extracts the document ONCE and passes it to sub-functions (no double OCR).
     Returns structured data with a '_doc_type' field.
     """
-    raw_text = await extract_text_from_file_async(file_path)
-    doc_type = classify_document(raw_text)
+    document = await extract_document_async(file_path)
+    doc_type = classify_document(document.text)
 
     if doc_type == "bank_statement":
-        result = await process_bank_document(file_path, raw_text=raw_text)
+        result = await process_bank_document(file_path, document=document)
     else:
-        result = await process_receipt_document(file_path, raw_text=raw_text)
+        result = await process_receipt_document(file_path, raw_text=document.text)
 
     result["_doc_type"] = doc_type
     return result
@@ -2,14 +2,75 @@
 Bank statement parser — supports PDF and CSV formats.
 Extracts transactions as { date, description, amount, raw_line }.
 Phase 1: PDF parsing.  Phase 2: CSV parsing added.
+Large CSV exports stream through iter_bank_csv(), one ParsedTransaction at a time.
+
+PDFs and scans are read through document_extraction (page-parallel PDF
+extraction in a process pool, OCR for scans); parse_bank_document() then
+parses the extracted pages in order, so a caller that already holds the
+ExtractedDocument never reopens the file.  Digital PDFs go through the
+column-aware statement_layout_parser first; the line regex is the fallback.
 """
+import asyncio
 import re
 import csv
 import io
-import pdfplumber
 from datetime import date, datetime
 from decimal import Decimal
 from pathlib import Path
+from typing import Iterable, Iterator
+
+from app.config import settings
+from app.services.document_extraction import ExtractedDocument, extract_document, extract_document_async
+
+
+class ParsedTransaction:
+    """One statement line.  Slotted — a multi-year CSV yields hundreds of thousands."""
+
+    __slots__ = ("date", "description", "amount", "raw_line", "category", "is_income", "plaid_transaction_id")
+
+    def __init__(
+        self,
+        date: date,
+        description: str,
+        amount: float,
+        raw_line: str | None = None,
+        category: str | None = None,
+        is_income: bool | None = None,
+        plaid_transaction_id: str | None = None,
+    ):
+        self.date = date
+        self.description = description
+        self.amount = amount
+        self.raw_line = raw_line
+        self.category = category
+        self.is_income = is_income
+        self.plaid_transaction_id = plaid_transaction_id
+
+    @classmethod
+    def from_dict(cls, tx: dict) -> "ParsedTransaction":
+        """From a Gemini / regex transaction dict (dates may be YYYY-MM-DD strings)."""
+        tx_date = tx.get("date")
+        if isinstance(tx_date, str):
+            try:
+                tx_date = datetime.strptime(tx_date, "%Y-%m-%d").date()
+            except ValueError:
+                tx_date = None
+        return cls(
+            tx_date or date.today(),
+            tx.get("description", ""),
+            tx.get("amount", 0),
+            tx.get("raw_line") or tx.get("raw_description"),
+            tx.get("category"),
+            tx.get("is_income"),
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            "date": self.date,
+            "description": self.description,
+            "amount": self.amount,
+            "raw_line": self.raw_line,
+        }
 
 
 def parse_bank_file(file_path: str, content_type: str = "") -> list[dict]:
@@ -20,18 +81,55 @@ def parse_bank_file(file_path: str, content_type: str = "") -> list[dict]:
     path = Path(file_path)
     ext = path.suffix.lower()
     if ext == ".csv" or "csv" in content_type:
-        with open(file_path, "r", encoding="utf-8-sig") as f:
-            return parse_bank_csv(f.read())
+        return [tx.as_dict() for tx in iter_bank_csv(file_path)]
     return parse_bank_pdf(file_path)
 
 
+def iter_bank_csv(file_path: str) -> Iterator[ParsedTransaction]:
+    """
+    Stream a bank CSV export from disk.  The file is decoded incrementally and
+    rows are yielded as they are read, so memory use does not grow with file size.
+    """
+    with open(file_path, "r", encoding="utf-8-sig", newline="") as f:
+        yield from _iter_csv_rows(f)
+
+
 def parse_bank_pdf(pdf_path: str) -> list[dict]:
     """
     Returns a list of transaction dicts:
       { date, description, amount, raw_line }
     """
-    raw_text = _extract_pdf_text(pdf_path)
-    return _parse_transactions(raw_text)
+    return parse_bank_document(extract_document(pdf_path, "bank_statement"))
+
+
+async def parse_bank_pdf_async(pdf_path: str) -> list[dict]:
+    """
+    parse_bank_pdf off the event loop: pages are extracted concurrently in the
+    PDF process pool (or OCR'd when scanned), then parsed in page order.
+    """
+    document = await extract_document_async(pdf_path, "bank_statement")
+    return await asyncio.to_thread(parse_bank_document, document)
+
+
+def parse_bank_document(document: ExtractedDocument, layout=None) -> list[dict]:
+    """
+    Parse already-extracted pages (embedded PDF text or OCR lines), in page
+    order.  The table/column layout parse wins when it reconciles against the
+    running balance, or when it finds at least as many rows as the line regex
+    (which misreads separate debit/credit/balance columns).  `layout` is a
+    StatementLayout the caller already computed.
+    """
+    if document.source == "text" and document.path.lower().endswith(".csv"):
+        return parse_bank_csv(document.text)
+    if layout is None:
+        from app.services.statement_layout_parser import parse_statement_layout
+        layout = parse_statement_layout(document)
+    if layout.transactions and layout.confidence >= settings.BANK_LAYOUT_MIN_CONFIDENCE:
+        return layout.transactions
+    regex = [tx for page in document.pages for tx in _parse_transactions(page.text)]
+    if layout.transactions and len(layout.transactions) >= len(regex):
+        return layout.transactions
+    return regex
 
 
 def parse_bank_csv(csv_content: str) -> list[dict]:
@@ -42,43 +140,47 @@ def parse_bank_csv(csv_content: str) -> list[dict]:
       3. Transaction Date, Description, Amount, Balance
     Works with Chase, TD Bank, Bank of America, Capital One exports.
     """
-    reader = csv.DictReader(io.StringIO(csv_content.strip()))
-    if not reader.fieldnames:
-        return []
+    return [tx.as_dict() for tx in _iter_csv_rows(io.StringIO(csv_content.strip()))]
 
-    headers_lower = [h.lower().strip() for h in reader.fieldnames]
-    col_map = _detect_csv_columns(headers_lower)
+
+def _iter_csv_rows(lines: Iterable[str]) -> Iterator[ParsedTransaction]:
+    reader = csv.reader(lines)
+    header = next((row for row in reader if any(c.strip() for c in row)), None)
+    if not header:
+        return
+    col_map = _detect_csv_columns([h.lower().strip() for h in header])
     if not col_map:
-        return []
+        return
+
+    date_col = col_map["date"]
+    desc_col = col_map["description"]
+    amount_col = col_map.get("amount")
+    debit_col = col_map.get("debit", 0)
+    credit_col = col_map.get("credit", 0)
+
+    def cell(row: list[str], i: int, default: str = "") -> str:
+        return row[i].strip() if i < len(row) else default
 
-    transactions = []
     for row in reader:
-        raw_date = row.get(reader.fieldnames[col_map["date"]], "").strip()
-        description = row.get(reader.fieldnames[col_map["description"]], "").strip()
-        parsed_date = _parse_tx_date(raw_date)
+        if not row:
+            continue
+        description = cell(row, desc_col)
+        parsed_date = _parse_tx_date(cell(row, date_col))
         if not parsed_date or not description:
             continue
 
         # Amount handling: single column or debit/credit split
-        if "amount" in col_map:
-            raw_amount = row.get(reader.fieldnames[col_map["amount"]], "0").strip()
-            amount = _parse_amount(raw_amount)
+        if amount_col is not None:
+            amount = _parse_amount(cell(row, amount_col, "0"))
         else:
-            debit = _parse_amount(row.get(reader.fieldnames[col_map.get("debit", 0)], "0").strip())
-            credit = _parse_amount(row.get(reader.fieldnames[col_map.get("credit", 0)], "0").strip())
+            debit = _parse_amount(cell(row, debit_col, "0"))
+            credit = _parse_amount(cell(row, credit_col, "0"))
             amount = credit - abs(debit) if debit else credit
 
         if _is_header_or_noise(description):
             continue
 
-        transactions.append({
-            "date": parsed_date,
-            "description": description,
-            "amount": float(amount),
-            "raw_line": ",".join(str(v) for v in row.values()),
-        })
-
-    return transactions
+        yield ParsedTransaction(parsed_date, description, float(amount), ",".join(row))
 
 
 CSV_DATE_ALIASES = ["date", "transaction date", "trans date", "posted date", "posting date"]
@@ -109,12 +211,16 @@ def _detect_csv_columns(headers: list[str]) -> dict[str, int] | None:
     return col
 
 
-def _extract_pdf_text(pdf_path: str) -> str:
-    text_parts = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text_parts.append(page.extract_text() or "")
-    return "\n".join(text_parts)
+# Pattern: date  description  amount (optional leading -)
+TX_PATTERN = re.compile(
+    r"(\d{1,2}/\d{1,2}(?:/\d{2,4})?)"   # Date
+    r"\s+"
+    r"(.+?)"                              # Description (lazy)
+    r"\s+"
+    r"(-?\(?\$?[\d,]+\.\d{2}\)?)"        # Amount — allows parentheses for negatives
+    r"\s*$",
+    re.MULTILINE,
+)
 
 
 def _parse_transactions(raw_text: str) -> list[dict]:
@@ -127,17 +233,6 @@ def _parse_transactions(raw_text: str) -> list[dict]:
       - Negative amounts (purchases)
       - Parentheses notation: (12.50) = -12.50
     """
-    # Pattern: date  description  amount (optional leading -)
-    TX_PATTERN = re.compile(
-        r"(\d{1,2}/\d{1,2}(?:/\d{2,4})?)"   # Date
-        r"\s+"
-        r"(.+?)"                              # Description (lazy)
-        r"\s+"
-        r"(-?\(?\$?[\d,]+\.\d{2}\)?)"        # Amount — allows parentheses for negatives
-        r"\s*$",
-        re.MULTILINE,
-    )
-
     transactions = []
     for match in TX_PATTERN.finditer(raw_text):
         raw_date_str = match.group(1)
@@ -194,8 +289,8 @@ NOISE_PATTERNS = [
     r"^(page \d+|continued|statement period)",
     r"^\d{10,}",  # Long number = account/routing
 ]
+_NOISE_RE = re.compile("|".join(f"(?:{p})" for p in NOISE_PATTERNS))
 
 
 def _is_header_or_noise(desc: str) -> bool:
-    lower = desc.lower().strip()
-    return any(re.match(p, lower) for p in NOISE_PATTERNS)
+    return _NOISE_RE.match(desc.lower().strip()) is not None
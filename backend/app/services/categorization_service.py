@@ -3,9 +3,20 @@ Auto-Categorization Service — Phase 2
 Learns item → category mappings from household receipt confirmations.
 Future receipts from the same household will use these overrides first.
 """
+from collections import OrderedDict
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
+from app.config import settings
+from app.services.category_matcher import LearnedMappings
+
+# ── Per-worker mapping cache ──────────────────────────────────
+# {household_id: LearnedMappings}, LRU.  Entries are served only while their
+# version equals households.category_mapping_version, so a write from any
+# worker invalidates every other worker's copy on its next lookup.
+_mapping_cache: "OrderedDict[str, LearnedMappings]" = OrderedDict()
+
 
 async def record_category_override(
     db: AsyncSession,
@@ -15,31 +26,48 @@ async def record_category_override(
 ) -> None:
     """
     Save or update a household-specific item→category mapping.
-    Called when a user confirms (or edits) a receipt item.
+    Called when a user edits a single item's category.
     """
-    normalized = item_name.lower().strip()
-    await db.execute(
-        text("""
-            INSERT INTO category_overrides (household_id, item_name, category)
-            VALUES (:hid, :name, :category)
-            ON CONFLICT (household_id, item_name)
-            DO UPDATE SET category = EXCLUDED.category, updated_at = NOW()
-        """),
-        {"hid": household_id, "name": normalized, "category": category},
-    )
+    await bulk_record_overrides(db, household_id, [{"name": item_name, "category": category}])
     await db.commit()
 
 
-async def get_learned_mappings(db: AsyncSession, household_id: str) -> dict[str, str]:
+async def get_learned_mappings(db: AsyncSession, household_id: str) -> LearnedMappings:
     """
     Retrieve all learned item→category overrides for a household.
     Returns a dict suitable for passing to parse_receipt_text() as `learned_mappings`.
+    Served from the worker cache after a one-row version check; the full
+    table is read only when the household's mappings changed.  Rows are
+    ordered oldest first (the category matcher's tie-break order).
     """
+    version = (await db.execute(
+        text("SELECT category_mapping_version FROM households WHERE id = :hid"),
+        {"hid": household_id},
+    )).scalar_one_or_none() or 0
+
+    cached = _mapping_cache.get(household_id)
+    if cached is not None and cached.cache_key == (household_id, version):
+        _mapping_cache.move_to_end(household_id)
+        return cached
+
     result = await db.execute(
-        text("SELECT item_name, category FROM category_overrides WHERE household_id = :hid"),
+        text("""
+            SELECT item_name, category
+            FROM category_overrides
+            WHERE household_id = :hid
+            ORDER BY created_at, item_name
+        """),
         {"hid": household_id},
     )
-    return {row.item_name: row.category for row in result.fetchall()}
+    mappings = LearnedMappings(
+        ((row.item_name, row.category) for row in result.fetchall()),
+        cache_key=(household_id, version),
+    )
+    _mapping_cache[household_id] = mappings
+    _mapping_cache.move_to_end(household_id)
+    while len(_mapping_cache) > settings.CATEGORY_CACHE_HOUSEHOLDS:
+        _mapping_cache.popitem(last=False)
+    return mappings
 
 
 async def bulk_record_overrides(
@@ -48,17 +76,42 @@ async def bulk_record_overrides(
     items: list[dict],  # Each dict must have 'name' and 'category'
 ) -> int:
     """
-    Bulk-record overrides from a confirmed receipt. Returns number of rows inserted.
-    Skips items categorized as 'Uncategorized'.
+    Bulk-record overrides from a confirmed receipt. Returns number of mappings
+    added or changed. Skips items categorized as 'Uncategorized'.
+
+    One statement: a multi-row upsert, plus a bump of the household's
+    category_mapping_version when anything actually changed.  Runs in the
+    caller's transaction — the caller commits.
     """
-    count = 0
+    mappings: dict[str, str] = {}
     for item in items:
-        name = item.get("name", "").strip()
-        category = item.get("category", "Uncategorized")
+        name = (item.get("name") or "").lower().strip()
+        category = item.get("category") or "Uncategorized"
         if name and category != "Uncategorized":
-            await record_category_override(db, household_id, name, category)
-            count += 1
-    return count
+            mappings[name] = category  # last edit wins; duplicates would abort the upsert
+    if not mappings:
+        return 0
+
+    result = await db.execute(
+        text("""
+            WITH upserted AS (
+                INSERT INTO category_overrides (household_id, item_name, category)
+                SELECT CAST(:hid AS uuid), m.item_name, m.category
+                FROM unnest(CAST(:names AS text[]), CAST(:categories AS text[])) AS m(item_name, category)
+                ON CONFLICT (household_id, item_name)
+                DO UPDATE SET category = EXCLUDED.category, updated_at = NOW()
+                WHERE category_overrides.category IS DISTINCT FROM EXCLUDED.category
+                RETURNING 1
+            ), bumped AS (
+                UPDATE households
+                SET category_mapping_version = category_mapping_version + 1
+                WHERE id = CAST(:hid AS uuid) AND EXISTS (SELECT 1 FROM upserted)
+            )
+            SELECT COUNT(*) AS changed FROM upserted
+        """),
+        {"hid": household_id, "names": list(mappings), "categories": list(mappings.values())},
+    )
+    return result.one().changed
 
 
 async def get_top_categories(db: AsyncSession, household_id: str, limit: int = 10) -> list[dict]:
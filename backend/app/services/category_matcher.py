@@ -0,0 +1,180 @@
+"""
+Category Matcher — compiled multi-pattern item → category lookup.
+
+Replaces the per-item linear scan over learned mappings and CATEGORY_MAP with
+structures built once and reused for every item on every receipt:
+
+  • exact    — dict lookup on the normalized name
+  • contains — Aho-Corasick automaton over learned keywords: finds every learned
+               keyword inside the item name in one pass over the name
+  • within   — the learned keywords joined into one haystack; a single
+               C-level str.find locates a keyword that contains the item name
+  • builtin  — a second automaton over CATEGORY_MAP, compiled at import
+
+Precedence (first rule that matches wins):
+  1. exact learned mapping
+  2. learned keyword contained in the name — longest keyword, then oldest
+  3. name contained in a learned keyword   — oldest keyword
+  4. CATEGORY_MAP keyword contained in the name — longest, then map order
+  5. "Uncategorized"
+
+Household matchers are cached keyed by LearnedMappings.cache_key (household +
+mapping version), so a household's automaton is built once per version.
+"""
+from bisect import bisect_right
+from collections import OrderedDict
+
+_MAX_CACHED_MATCHERS = 256
+_SEPARATOR = "\x00"
+
+
+class LearnedMappings(dict):
+    """{item_name: category} plus the key its compiled matcher is cached under."""
+
+    def __init__(self, mappings=(), cache_key=None):
+        super().__init__(mappings)
+        self.cache_key = cache_key
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton returning the preferred keyword found in a text."""
+
+    __slots__ = ("_goto", "_fail", "_best", "_rank")
+
+    def __init__(self, keywords: list[str]):
+        goto: list[dict[str, int]] = [{}]
+        own: list[int | None] = [None]
+        for idx, keyword in enumerate(keywords):
+            if not keyword:
+                continue
+            node = 0
+            for ch in keyword:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    own.append(None)
+                node = nxt
+            if own[node] is None:           # duplicate keywords keep the first
+                own[node] = idx
+
+        # Lower rank wins: longer keyword first, then earlier position
+        order = sorted(range(len(keywords)), key=lambda i: (-len(keywords[i]), i))
+        rank = [0] * len(keywords)
+        for r, i in enumerate(order):
+            rank[i] = r
+
+        # BFS: failure links, and the best output reachable through each node's
+        # failure chain so matching never has to walk output lists
+        fail = [0] * len(goto)
+        best = list(own)
+        queue = list(goto[0].values())      # depth-1 nodes fail to the root
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, child in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(ch, 0)
+                inherited = best[fail[child]]
+                if inherited is not None and (best[child] is None or rank[inherited] < rank[best[child]]):
+                    best[child] = inherited
+                queue.append(child)
+
+        self._goto = goto
+        self._fail = fail
+        self._best = best
+        self._rank = rank
+
+    def find(self, text: str) -> int | None:
+        """Index of the preferred keyword occurring in `text`, or None."""
+        goto, fail, best, rank = self._goto, self._fail, self._best, self._rank
+        node = 0
+        found = None
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            hit = best[node]
+            if hit is not None and (found is None or rank[hit] < rank[found]):
+                found = hit
+        return found
+
+
+class CategoryMatcher:
+    """Compiled view of one household's learned mappings (plus the built-in map)."""
+
+    def __init__(self, learned: dict[str, str] | None = None):
+        learned = learned or {}
+        self._exact = dict(learned)
+        self._keywords = [k for k in learned if k]
+        self._categories = [learned[k] for k in self._keywords]
+        self._contains = KeywordAutomaton(self._keywords) if self._keywords else None
+        self._haystack = _SEPARATOR.join(self._keywords)
+        self._offsets = []
+        pos = 0
+        for keyword in self._keywords:
+            self._offsets.append(pos)
+            pos += len(keyword) + 1
+
+    def match(self, name: str) -> str:
+        return self.match_learned(name) or self.match_builtin(name)
+
+    def match_learned(self, name: str) -> str | None:
+        """Rules 1–3 only: the household's own mapping, or None."""
+        lower = name.lower().strip()
+        if lower in self._exact:
+            return self._exact[lower]
+        if lower and self._contains is not None:
+            hit = self._contains.find(lower)
+            if hit is not None:
+                return self._categories[hit]
+            pos = self._haystack.find(lower)
+            if pos != -1:
+                return self._categories[bisect_right(self._offsets, pos) - 1]
+        return None
+
+    @staticmethod
+    def match_builtin(name: str) -> str:
+        """Rules 4–5: CATEGORY_MAP keyword, else "Uncategorized"."""
+        hit = _builtin().find(name.lower().strip())
+        if hit is not None:
+            return _BUILTIN_CATEGORIES[hit]
+        return "Uncategorized"
+
+
+_BUILTIN_CATEGORIES: list[str] = []
+_builtin_automaton: KeywordAutomaton | None = None
+_matcher_cache: "OrderedDict[object, CategoryMatcher]" = OrderedDict()
+
+
+def _builtin() -> KeywordAutomaton:
+    """CATEGORY_MAP automaton, compiled on first use (receipt_parser imports us)."""
+    global _builtin_automaton
+    if _builtin_automaton is None:
+        from app.services.receipt_parser import CATEGORY_MAP
+        _BUILTIN_CATEGORIES[:] = CATEGORY_MAP.values()
+        _builtin_automaton = KeywordAutomaton(list(CATEGORY_MAP))
+    return _builtin_automaton
+
+
+def get_category_matcher(learned: dict[str, str] | None = None) -> CategoryMatcher:
+    """
+    Return a compiled matcher for `learned`.  LearnedMappings carrying a
+    cache_key are compiled once per key (LRU); plain dicts compile per call.
+    """
+    key = getattr(learned, "cache_key", None)
+    if key is None:
+        return CategoryMatcher(learned)
+    matcher = _matcher_cache.get(key)
+    if matcher is None:
+        matcher = CategoryMatcher(learned)
+        _matcher_cache[key] = matcher
+        if len(_matcher_cache) > _MAX_CACHED_MATCHERS:
+            _matcher_cache.popitem(last=False)
+    else:
+        _matcher_cache.move_to_end(key)
+    return matcher
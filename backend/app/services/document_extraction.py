@@ -0,0 +1,203 @@
+"""
+Document Extraction — one reusable artifact per uploaded document.
+
+extract_document() / extract_document_async() read the file once and return an
+ExtractedDocument that every downstream parser consumes (Gemini structuring,
+the receipt regex parser, the bank statement regex parser), so a request never
+extracts or OCRs the same file twice:
+
+  • pages   — one DocumentPage per page: text, tables and word positions
+              (bank statements only) and OCR lines with confidences (scanned
+              documents only)
+  • source  — "pdf_text" (embedded PDF text), "ocr" (scanned PDF / image) or
+              "text" (CSV / plain text uploads)
+  • text    — all pages joined; what Gemini and the receipt parser read
+
+Digital PDFs are extracted in a spawned process pool (pdfplumber layout
+analysis is CPU-bound): the first task extracts the first PDF_PAGES_PER_TASK
+pages and reports the page count, the remaining ranges run concurrently, and
+pages come back in order.  Single-range documents (most receipts and
+statements) are opened exactly once.  PDFs without usable embedded text fall
+through to OCR, which runs on the caller's thread pool.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MIN_EMBEDDED_TEXT = 50     # fewer chars than this → treat the PDF as scanned
+_TEXT_EXTENSIONS = (".csv", ".txt")
+
+
+class DocumentPage(NamedTuple):
+    number: int                                      # 1-based
+    text: str
+    tables: list[list[list[str | None]]] = []        # pdfplumber extract_tables() rows
+    ocr_lines: list[tuple[str, float | None]] = []   # (line, confidence) in reading order
+    words: list[tuple[float, float, float, float, str]] = []   # (x0, x1, top, bottom, text)
+
+
+class ExtractedDocument:
+    __slots__ = ("path", "source", "pages")
+
+    def __init__(self, path: str, source: str, pages: list[DocumentPage]):
+        self.path = path
+        self.source = source
+        self.pages = pages
+
+    @property
+    def text(self) -> str:
+        return "\n".join(page.text for page in self.pages if page.text)
+
+    @classmethod
+    def from_text(cls, text: str, path: str = "") -> "ExtractedDocument":
+        """Wrap text extracted elsewhere (e.g. a caller that only kept raw_text)."""
+        return cls(path, "text", [DocumentPage(1, text)])
+
+
+# ── PDF process pool ─────────────────────────────────────────
+_pdf_pool: ProcessPoolExecutor | None = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _init_pdf_worker(niceness: int) -> None:
+    """Lower worker priority so request handling on the same host stays responsive."""
+    if niceness and hasattr(os, "nice"):
+        os.nice(niceness)
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    if _pdf_pool is None:
+        with _pdf_pool_lock:
+            if _pdf_pool is None:
+                # spawn, not fork: the API process has live threads (thread pools, scheduler)
+                _pdf_pool = ProcessPoolExecutor(
+                    max_workers=settings.PDF_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_pdf_worker,
+                    initargs=(settings.PDF_WORKER_NICE,),
+                )
+    return _pdf_pool
+
+
+def shutdown_pdf_pool() -> None:
+    """Stop the PDF workers (app shutdown)."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is not None:
+            _pdf_pool.shutdown(wait=False, cancel_futures=True)
+            _pdf_pool = None
+
+
+def _extract_pdf_pages(pdf_path: str, start: int, stop: int | None, layout: bool) -> tuple[int, list[DocumentPage]]:
+    """
+    (page_count, pages[start:stop]).  Runs in a pool worker (or inline).
+    `layout` adds tables and word positions (statement_layout_parser input).
+    """
+    import pdfplumber
+    pages = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for number, page in enumerate(pdf.pages[start:stop], start=start + 1):
+            pages.append(DocumentPage(
+                number,
+                page.extract_text() or "",
+                page.extract_tables() if layout else [],
+                [],
+                [
+                    (float(w["x0"]), float(w["x1"]), float(w["top"]), float(w["bottom"]), w["text"])
+                    for w in page.extract_words()
+                ] if layout else [],
+            ))
+            page.close()  # drop the page's cached layout objects
+        return len(pdf.pages), pages
+
+
+async def _extract_pdf_pages_async(pdf_path: str, layout: bool) -> list[DocumentPage]:
+    loop = asyncio.get_running_loop()
+    pool = _get_pdf_pool()
+    step = max(1, settings.PDF_PAGES_PER_TASK)
+    page_count, first = await loop.run_in_executor(pool, _extract_pdf_pages, pdf_path, 0, step, layout)
+    rest = await asyncio.gather(*(
+        loop.run_in_executor(pool, _extract_pdf_pages, pdf_path, start, min(start + step, page_count), layout)
+        for start in range(step, page_count, step)
+    ))
+    return first + [page for _, part in rest for page in part]
+
+
+# ── OCR ──────────────────────────────────────────────────────
+def _ocr_document(file_path: str, doc_type: str) -> ExtractedDocument:
+    from app.services.ocr_service import run_ocr_pages_sync, select_ocr_profile
+    profile = select_ocr_profile(doc_type)
+    logger.info("Running OCR (%s) on %s …", profile, os.path.basename(file_path))
+    pages = [
+        DocumentPage(number, "\n".join(line for line, _ in lines), [], lines)
+        for number, lines in enumerate(run_ocr_pages_sync(file_path, profile), start=1)
+    ]
+    document = ExtractedDocument(file_path, "ocr", pages)
+    logger.info("OCR extracted %d chars from %s", len(document.text), os.path.basename(file_path))
+    return document
+
+
+# ── Entry points ─────────────────────────────────────────────
+def _read_text_document(file_path: str) -> ExtractedDocument:
+    with open(file_path, encoding="utf-8-sig", errors="replace") as f:
+        return ExtractedDocument(file_path, "text", [DocumentPage(1, f.read())])
+
+
+def _embedded_text_document(file_path: str, pages: list[DocumentPage]) -> ExtractedDocument | None:
+    document = ExtractedDocument(file_path, "pdf_text", pages)
+    if len(document.text.strip()) > _MIN_EMBEDDED_TEXT:
+        logger.info("PDF had embedded text (%d chars), skipping OCR", len(document.text))
+        return document
+    return None
+
+
+def extract_document(file_path: str, doc_type: str = "auto") -> ExtractedDocument:
+    """
+    Synchronous extraction.  Priority:
+      1. CSV / plain text — read as-is
+      2. pdfplumber for digital PDFs (tables + word positions for bank statements)
+      3. OCR for scanned PDFs / images (ocr_service picks the engine + profile)
+    """
+    ext = Path(file_path).suffix.lower()
+    if ext in _TEXT_EXTENSIONS:
+        return _read_text_document(file_path)
+    if ext == ".pdf":
+        try:
+            _, pages = _extract_pdf_pages(file_path, 0, None, doc_type == "bank_statement")
+            document = _embedded_text_document(file_path, pages)
+            if document:
+                return document
+        except Exception as exc:
+            logger.warning("pdfplumber failed on %s: %s", file_path, exc)
+    return _ocr_document(file_path, doc_type)
+
+
+async def extract_document_async(
+    file_path: str,
+    doc_type: str = "auto",
+    ocr_executor: Executor | None = None,
+) -> ExtractedDocument:
+    """extract_document off the event loop: PDFs in the process pool, OCR on `ocr_executor`."""
+    loop = asyncio.get_running_loop()
+    ext = Path(file_path).suffix.lower()
+    if ext in _TEXT_EXTENSIONS:
+        return await asyncio.to_thread(_read_text_document, file_path)
+    if ext == ".pdf":
+        try:
+            pages = await _extract_pdf_pages_async(file_path, doc_type == "bank_statement")
+            document = _embedded_text_document(file_path, pages)
+            if document:
+                return document
+        except Exception as exc:
+            logger.warning("pdfplumber failed on %s: %s", file_path, exc)
+    return await loop.run_in_executor(ocr_executor, _ocr_document, file_path, doc_type)
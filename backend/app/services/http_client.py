@@ -0,0 +1,66 @@
+"""
+HTTP Client — pooled httpx clients for external APIs, shared by the whole app.
+
+One AsyncClient per upstream (Plaid, Expo, Spoonacular), created on first use
+and closed by main.lifespan.  Each keeps its connections alive between
+requests, so a Plaid sync or an Expo fan-out pays the TCP + TLS handshake once
+instead of once per call, and each has its own connection cap
+(HTTP_MAX_CONNECTIONS_PER_HOST) so a burst to one API cannot starve another.
+
+HTTP/2 is negotiated when HTTP2_ENABLED and the h2 package (httpx[http2]) is
+installed — many concurrent requests then share one connection.  Without h2
+the clients speak HTTP/1.1 with the same pooling.
+"""
+import logging
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# upstream → default request timeout (seconds); callers may pass their own per request
+UPSTREAM_TIMEOUTS = {
+    "plaid": 15.0,
+    "expo": 10.0,
+    "spoonacular": 10.0,
+}
+
+_clients: dict[str, httpx.AsyncClient] = {}
+
+
+def _http2_available() -> bool:
+    if not settings.HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.info("h2 not installed — external API clients use HTTP/1.1 (pip install httpx[http2])")
+        return False
+    return True
+
+
+def get_http_client(upstream: str) -> httpx.AsyncClient:
+    """The shared client for `upstream` (a key of UPSTREAM_TIMEOUTS)."""
+    client = _clients.get(upstream)
+    if client is None or client.is_closed:
+        limit = settings.HTTP_MAX_CONNECTIONS_PER_HOST
+        client = httpx.AsyncClient(
+            timeout=UPSTREAM_TIMEOUTS[upstream],
+            limits=httpx.Limits(
+                max_connections=limit,
+                max_keepalive_connections=limit,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_SECONDS,
+            ),
+            http2=_http2_available(),
+        )
+        _clients[upstream] = client
+    return client
+
+
+async def close_http_clients() -> None:
+    """Close every pooled client (app shutdown)."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
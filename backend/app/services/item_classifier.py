@@ -0,0 +1,204 @@
+"""
+Item Classifier — offline item → category model trained from category_overrides.
+
+Multinomial naive Bayes over hashed character n-grams, pure NumPy:
+
+  • features — 2- to 4-grams of the normalized name (padded with spaces so word
+               boundaries count), crc32-hashed into N_FEATURES buckets
+  • training — every household's confirmed overrides; each (name, category)
+               pair is weighted by how many households agree on it
+  • scoring  — one gather + np.add.reduceat over the n-grams of all of a
+               receipt's items gives every item's class scores in one batch;
+               confidence is the softmax probability scaled by the share of
+               the name's n-grams seen in training (naive Bayes is otherwise
+               confidently wrong on names it has never seen anything like)
+
+The model is a single .npz file (ITEM_CLASSIFIER_PATH), retrained nightly by
+the scheduler in main.py and written atomically.  Each worker reloads it when
+the file's mtime changes.  With no model file every item comes back with
+confidence 0 and callers fall through to the keyword map / Gemini.
+"""
+import asyncio
+import logging
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+N_FEATURES = 1 << 16
+NGRAM_SIZES = (2, 3, 4)
+_ALPHA = 0.1                 # additive smoothing per hashed feature
+_MIN_TRAINING_ROWS = 50
+
+_NORMALIZE_RE = re.compile(r"[^a-z ]+")
+
+
+def _normalize(name: str) -> str:
+    return " ".join(_NORMALIZE_RE.sub(" ", name.lower()).split())
+
+
+def _features(name: str) -> list[int]:
+    """Hashed n-gram bucket ids for one name (never empty)."""
+    padded = f" {_normalize(name)} "
+    out = []
+    for n in NGRAM_SIZES:
+        for i in range(len(padded) - n + 1):
+            out.append(zlib.crc32(padded[i:i + n].encode()) & (N_FEATURES - 1))
+    return out or [0]
+
+
+def _batch_features(names: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Concatenated feature ids for all names, plus each name's start offset."""
+    per_name = [_features(n) for n in names]
+    offsets = np.zeros(len(per_name), dtype=np.int64)
+    if per_name:
+        offsets[1:] = np.cumsum([len(f) for f in per_name[:-1]])
+    flat = np.fromiter((f for fs in per_name for f in fs), dtype=np.int64)
+    return flat, offsets
+
+
+class ItemClassifier:
+    """A trained model: log P(feature | class) as an (N_FEATURES × classes) matrix."""
+
+    def __init__(
+        self,
+        classes: np.ndarray,
+        feature_log_prob: np.ndarray,
+        class_log_prior: np.ndarray,
+        seen: np.ndarray,
+    ):
+        self.classes = classes
+        self.feature_log_prob = feature_log_prob
+        self.class_log_prior = class_log_prior
+        self.seen = seen            # bool per bucket: occurred in training data
+
+    @classmethod
+    def train(cls, names: list[str], categories: list[str], weights: list[float] | None = None) -> "ItemClassifier":
+        classes, y = np.unique(np.asarray(categories, dtype=str), return_inverse=True)
+        w = np.ones(len(names)) if weights is None else np.asarray(weights, dtype=np.float64)
+        flat, offsets = _batch_features(names)
+        lengths = np.diff(np.append(offsets, len(flat)))
+        row_class = np.repeat(y, lengths)
+        row_weight = np.repeat(w, lengths)
+
+        # counts[f, c] accumulated in one bincount over the flattened index
+        counts = np.bincount(
+            flat * len(classes) + row_class,
+            weights=row_weight,
+            minlength=N_FEATURES * len(classes),
+        ).reshape(N_FEATURES, len(classes))
+        smoothed = counts + _ALPHA
+        feature_log_prob = np.log(smoothed) - np.log(smoothed.sum(axis=0, keepdims=True))
+        class_weight = np.bincount(y, weights=w, minlength=len(classes))
+        class_log_prior = np.log(class_weight) - np.log(class_weight.sum())
+        return cls(
+            classes,
+            feature_log_prob.astype(np.float32),
+            class_log_prior.astype(np.float32),
+            counts.sum(axis=1) > 0,
+        )
+
+    def predict(self, names: list[str]) -> list[tuple[str, float]]:
+        """[(category, confidence), ...] for every name, scored in one batch."""
+        if not names:
+            return []
+        flat, offsets = _batch_features(names)
+        scores = np.add.reduceat(self.feature_log_prob[flat], offsets, axis=0) + self.class_log_prior
+        scores -= scores.max(axis=1, keepdims=True)
+        probs = np.exp(scores)
+        probs /= probs.sum(axis=1, keepdims=True)
+        lengths = np.diff(np.append(offsets, len(flat)))
+        coverage = np.add.reduceat(self.seen[flat].astype(np.float32), offsets) / lengths
+        best = probs.argmax(axis=1)
+        confidence = probs[np.arange(len(names)), best] * coverage
+        return [(str(self.classes[b]), float(c)) for b, c in zip(best, confidence)]
+
+    def save(self, path: str) -> None:
+        """Write atomically so concurrently loading workers never see a partial file."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f,
+                classes=self.classes,
+                feature_log_prob=self.feature_log_prob,
+                class_log_prior=self.class_log_prior,
+                seen=self.seen,
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ItemClassifier":
+        with np.load(path) as data:
+            return cls(data["classes"], data["feature_log_prob"], data["class_log_prior"], data["seen"])
+
+
+# ── Per-process model (reloaded when the file changes) ────────
+_model: ItemClassifier | None = None
+_model_mtime: float | None = None
+_model_lock = threading.Lock()
+
+
+def get_item_classifier() -> ItemClassifier | None:
+    """The current model, or None when no model has been trained yet."""
+    global _model, _model_mtime
+    try:
+        mtime = os.stat(settings.ITEM_CLASSIFIER_PATH).st_mtime
+    except OSError:
+        return None
+    if mtime != _model_mtime:
+        with _model_lock:
+            if mtime != _model_mtime:
+                try:
+                    _model = ItemClassifier.load(settings.ITEM_CLASSIFIER_PATH)
+                    _model_mtime = mtime
+                    logger.info("Item classifier loaded (%d categories)", len(_model.classes))
+                except Exception as exc:
+                    logger.warning("Could not load item classifier: %s", exc)
+    return _model
+
+
+def classify_items(names: list[str]) -> list[tuple[str | None, float]]:
+    """Batch-classify receipt item names; (None, 0.0) for every name when untrained."""
+    model = get_item_classifier()
+    if model is None:
+        return [(None, 0.0)] * len(names)
+    return model.predict(names)
+
+
+# ── Training job ──────────────────────────────────────────────
+async def retrain_from_overrides(db) -> int:
+    """
+    Train on all households' category_overrides and replace the model file.
+    Returns the number of distinct (name, category) pairs used (0 = skipped).
+    """
+    from sqlalchemy import text
+
+    result = await db.execute(text("""
+        SELECT item_name, category, COUNT(DISTINCT household_id) AS households
+        FROM category_overrides
+        WHERE category <> 'Uncategorized'
+        GROUP BY item_name, category
+    """))
+    rows = result.fetchall()
+    if len(rows) < _MIN_TRAINING_ROWS or len({r.category for r in rows}) < 2:
+        logger.info("Item classifier: %d training rows — not enough to train", len(rows))
+        return 0
+
+    def _train_and_save():
+        model = ItemClassifier.train(
+            [r.item_name for r in rows],
+            [r.category for r in rows],
+            [r.households for r in rows],
+        )
+        model.save(settings.ITEM_CLASSIFIER_PATH)
+
+    await asyncio.to_thread(_train_and_save)
+    logger.info("Item classifier retrained on %d name/category pairs", len(rows))
+    return len(rows)
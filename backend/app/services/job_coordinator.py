@@ -0,0 +1,223 @@
+"""
+Job Coordinator — one scheduler run per job across workers and replicas.
+
+Every uvicorn worker starts the coordinator, but only the leader runs jobs.
+Leadership is a Postgres session-level advisory lock held on a dedicated
+connection:
+
+  • every SCHEDULER_HEARTBEAT_SECONDS a follower tries pg_try_advisory_lock;
+    the one that gets it resumes its APScheduler and becomes leader
+  • the leader pings its lock connection on the same beat; if the ping fails
+    it pauses its jobs and drops the connection (releasing the lock, if the
+    server still holds it)
+  • when the leader dies, Postgres drops its session and the lock with it,
+    so a follower takes over on its next beat — failover takes about one
+    heartbeat (longer only if the leader's host vanishes without closing
+    TCP, until keepalive notices)
+
+Each run additionally holds a per-job advisory lock, so a job still running
+on a just-deposed leader is never started a second time by the new one.
+
+Jobs register by name with an APScheduler trigger:
+
+    job_coordinator.register("expiry_check", _run_expiry_check, "cron", hour=8)
+
+With SCHEDULER_LEADER_ELECTION off every process runs every job (the old
+behaviour — fine for a single worker).  State is exposed on
+/api/health/scheduler.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import time
+
+from sqlalchemy import text
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_LEADER_LOCK = "tracker:scheduler:leader"
+
+
+def _lock_key(name: str) -> int:
+    """Stable signed 64-bit advisory lock key for `name`."""
+    return int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big", signed=True)
+
+
+async def _autocommit_connection():
+    # Advisory locks are per session: keep the connection out of any
+    # transaction so it never sits "idle in transaction".
+    from app.database import engine
+    conn = await engine.connect()
+    return await conn.execution_options(isolation_level="AUTOCOMMIT")
+
+
+class JobCoordinator:
+    def __init__(self):
+        self._jobs: dict[str, tuple] = {}              # name → (fn, trigger, trigger kwargs)
+        self._scheduler = None
+        self._lock_conn = None
+        self._beat: asyncio.Task | None = None
+        self._is_leader = False
+        self._leader_since: float | None = None
+        self._runs: dict[str, dict] = {}               # name → last run outcome on this process
+        self.node = f"{socket.gethostname()}:{os.getpid()}"
+
+    # ── Registration ──────────────────────────────────────────
+    def register(self, name: str, fn, trigger: str, **trigger_args) -> None:
+        """Register periodic job `name`; `trigger` / `trigger_args` as for APScheduler's add_job."""
+        if name in self._jobs:
+            raise ValueError(f"job {name!r} already registered")
+        self._jobs[name] = (fn, trigger, trigger_args)
+        if self._scheduler is not None:
+            self._add(name)
+
+    def _add(self, name: str) -> None:
+        fn, trigger, trigger_args = self._jobs[name]
+        self._scheduler.add_job(
+            self._run, trigger, args=(name, fn), id=name, name=name,
+            max_instances=1, coalesce=True, replace_existing=True,
+            # a run due while leadership was changing hands still starts on the new leader
+            misfire_grace_time=max(1, int(2 * settings.SCHEDULER_HEARTBEAT_SECONDS)), **trigger_args,
+        )
+
+    # ── Runs ──────────────────────────────────────────────────
+    async def _run(self, name: str, fn) -> None:
+        started = time.perf_counter()
+        if not settings.SCHEDULER_LEADER_ELECTION:
+            await self._call(name, fn, started)
+            return
+        try:
+            conn = await _autocommit_connection()
+        except Exception as exc:
+            logger.warning("Job %s skipped — no DB connection for its lock: %s", name, exc)
+            return
+        key = _lock_key(f"tracker:job:{name}")
+        try:
+            if not (await conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": key})).scalar():
+                logger.info("Job %s already running elsewhere — skipped", name)
+                return
+            try:
+                await self._call(name, fn, started)
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": key})
+        finally:
+            await conn.close()
+
+    async def _call(self, name: str, fn, started: float) -> None:
+        try:
+            await fn()
+            outcome = "ok"
+        except Exception as exc:
+            outcome = f"{type(exc).__name__}: {exc}"[:200]
+            logger.exception("Job %s failed", name)
+        elapsed = round(time.perf_counter() - started, 1)
+        self._runs[name] = {"finished_at": time.time(), "elapsed_s": elapsed, "outcome": outcome}
+        logger.info("Job %s finished in %.1fs (%s)", name, elapsed, outcome)
+
+    # ── Leadership ────────────────────────────────────────────
+    async def _try_acquire(self) -> bool:
+        try:
+            conn = await _autocommit_connection()
+        except Exception as exc:
+            logger.debug("Leader election: no DB connection: %s", exc)
+            return False
+        try:
+            got = (await conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": _lock_key(_LEADER_LOCK)})).scalar()
+        except Exception:
+            await conn.close()
+            return False
+        if not got:
+            await conn.close()
+            return False
+        self._lock_conn = conn
+        return True
+
+    async def _still_leader(self) -> bool:
+        try:
+            await self._lock_conn.execute(text("SELECT 1"))
+            return True
+        except Exception as exc:
+            logger.warning("Scheduler leader %s lost its lock connection: %s", self.node, exc)
+            return False
+
+    async def _release(self) -> None:
+        conn, self._lock_conn = self._lock_conn, None
+        if conn is None:
+            return
+        try:
+            await conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _lock_key(_LEADER_LOCK)})
+        except Exception:
+            pass                            # session gone — so is the lock
+        try:
+            await conn.close()
+        except Exception:
+            pass
+
+    def _lead(self) -> None:
+        self._is_leader = True
+        self._leader_since = time.time()
+        self._scheduler.resume()
+        logger.info("Scheduler leader: %s (%d jobs)", self.node, len(self._jobs))
+
+    async def _step_down(self) -> None:
+        self._is_leader = False
+        self._leader_since = None
+        self._scheduler.pause()
+        await self._release()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            try:
+                if self._is_leader:
+                    if not await self._still_leader():
+                        await self._step_down()
+                elif await self._try_acquire():
+                    self._lead()
+            except Exception as exc:
+                logger.warning("Scheduler heartbeat failed: %s", exc)
+            await asyncio.sleep(settings.SCHEDULER_HEARTBEAT_SECONDS)
+
+    # ── Lifecycle ─────────────────────────────────────────────
+    async def start(self) -> None:
+        """Start the scheduler (paused unless this process wins leadership)."""
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+        self._scheduler = AsyncIOScheduler()
+        for name in self._jobs:
+            self._add(name)
+        if not settings.SCHEDULER_LEADER_ELECTION:
+            self._scheduler.start()
+            self._is_leader = True
+            return
+        self._scheduler.start(paused=True)
+        self._beat = asyncio.create_task(self._heartbeat())
+
+    async def stop(self) -> None:
+        """Stop scheduling and hand leadership to another process."""
+        if self._beat:
+            self._beat.cancel()
+            await asyncio.gather(self._beat, return_exceptions=True)
+            self._beat = None
+        if self._scheduler is not None:
+            self._scheduler.shutdown(wait=False)
+            self._scheduler = None
+        self._is_leader = False
+        self._jobs.clear()
+        await self._release()
+
+    def snapshot(self) -> dict:
+        return {
+            "node": self.node,
+            "leader_election": settings.SCHEDULER_LEADER_ELECTION,
+            "is_leader": self._is_leader,
+            "leader_since": self._leader_since,
+            "jobs": sorted(self._jobs),
+            "last_runs": self._runs,
+        }
+
+
+job_coordinator = JobCoordinator()
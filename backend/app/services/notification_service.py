@@ -2,18 +2,32 @@
 Notification Service — Phase 2
 Handles push notifications for web (Web Push / browser) and mobile (Expo Push).
 Uses ORM models for push tokens and notification records.
+
+Expo pushes go out in Expo's batch format: up to EXPO_PUSH_BATCH_SIZE (max
+100) messages per request, EXPO_PUSH_CONCURRENCY requests in flight, over the
+shared keep-alive "expo" client.  Each message gets a ticket back, in order;
+tickets are handed to push_receipts, which polls their receipts and prunes
+tokens of uninstalled apps.
 """
-import httpx
+import asyncio
+import logging
+import time
 import uuid
-from datetime import date, timedelta
+from collections import Counter
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, update
+from sqlalchemy import select, and_, update, text
 
+from app.config import settings
 from app.models.notification import PushNotificationToken, Notification
-from app.models.pantry import PantryItem, PantryStatus
 from app.models.user import User
+from app.services.http_client import get_http_client
+from app.services.push_receipts import record_push_tickets
+
+logger = logging.getLogger(__name__)
 
 EXPO_PUSH_URL = "https://exp.host/--/api/v2/push/send"
+_EXPO_MAX_BATCH = 100           # Expo's per-request message limit
+_EXPO_RETRIES = 3               # 429 / 5xx: retried with exponential backoff
 
 
 async def register_token(db: AsyncSession, user_id: str, token: str, platform: str) -> None:
@@ -56,59 +70,217 @@ async def get_tokens_for_household(db: AsyncSession, household_id: str) -> list[
     return [{"token": r.token, "platform": r.platform} for r in result.scalars()]
 
 
-async def send_expiry_notifications(db: AsyncSession, days_ahead: int = 3) -> dict:
-    """
-    Find all pantry items expiring within `days_ahead` days and send push
-    notifications to all household members.
-    """
-    cutoff = date.today() + timedelta(days=days_ahead)
+# ── Expiry alerts ─────────────────────────────────────────────
+# An item is alerted once per threshold it crosses: with levels [0, 1, 3] at
+# 3 days left, at 1, and on the day (or once already past).  pantry_items
+# remembers the level last alerted, the local date and the expiration date
+# it was for, so a run only picks up items that crossed a new level — or
+# whose expiration date was edited since — and never one already alerted
+# today.
+_LOCAL_TODAY = "(NOW() AT TIME ZONE h.timezone)::date"
+_ALERT_LEVEL = f"(SELECT min(t) FROM unnest(CAST(:levels AS int[])) AS t WHERE t >= p.expiration_date - {_LOCAL_TODAY})"
+_DUE = f"""p.status IN ('UNOPENED', 'OPENED')
+          AND p.expiration_date <= {_LOCAL_TODAY} + :days
+          AND p.expiry_alerted_on IS DISTINCT FROM {_LOCAL_TODAY}
+          AND (p.expiry_alert_for IS DISTINCT FROM p.expiration_date OR p.expiry_alert_level > {_ALERT_LEVEL})"""
 
-    result = await db.execute(
-        select(PantryItem).where(
-            and_(
-                PantryItem.status.in_([PantryStatus.UNOPENED, PantryStatus.OPENED]),
-                PantryItem.expiration_date != None,
-                PantryItem.expiration_date <= cutoff,
-            )
-        ).order_by(PantryItem.household_id, PantryItem.expiration_date)
+# One keyset page of one shard: picks the next :batch households with newly
+# due items (walking the partial (household_id, expiration_date) index in
+# household order), marks those items alerted and returns per-household
+# aggregates — all in one statement.
+_EXPIRY_PAGE_SQL = text(f"""
+    WITH page AS (
+        SELECT DISTINCT p.household_id
+        FROM pantry_items p
+        JOIN households h ON h.id = p.household_id
+        WHERE {_DUE}
+          AND p.household_id > CAST(:after AS uuid)
+          AND (hashtext(p.household_id::text) & 2147483647) % :shards = :shard
+          AND (CAST(:hour AS int) IS NULL OR EXTRACT(HOUR FROM NOW() AT TIME ZONE h.timezone) = CAST(:hour AS int))
+          AND (CAST(:household AS uuid) IS NULL OR p.household_id = CAST(:household AS uuid))
+        ORDER BY p.household_id
+        LIMIT :batch
+    ),
+    alerted AS (
+        UPDATE pantry_items p
+        SET expiry_alert_level = {_ALERT_LEVEL},
+            expiry_alerted_on  = {_LOCAL_TODAY},
+            expiry_alert_for   = p.expiration_date
+        FROM page, households h
+        WHERE p.household_id = page.household_id
+          AND h.id = p.household_id
+          AND {_DUE}
+        RETURNING p.household_id, p.name, p.expiration_date - {_LOCAL_TODAY} AS days_left
     )
-    items = result.scalars().all()
-
-    if not items:
-        return {"households_notified": 0, "total_pushed": 0}
-
-    # Group by household
-    from collections import defaultdict
-    by_household: dict = defaultdict(list)
-    for item in items:
-        by_household[str(item.household_id)].append(item)
-
-    total_pushed = 0
-    for household_id, h_items in by_household.items():
-        tokens = await get_tokens_for_household(db, household_id)
-        if not tokens:
-            continue
-
-        # Build message
-        if len(h_items) == 1:
-            item = h_items[0]
-            days_left = (item.expiration_date - date.today()).days
-            body = f"{item.name} expires {'today' if days_left == 0 else f'in {days_left} day(s)'}!"
-        else:
-            body = f"{len(h_items)} items expiring soon — check your pantry!"
+    SELECT page.household_id,
+           count(a.household_id)                           AS expiring,
+           (array_agg(a.name ORDER BY a.days_left, a.name))[1] AS first_name,
+           min(a.days_left)                                AS first_days_left
+    FROM page
+    LEFT JOIN alerted a ON a.household_id = page.household_id
+    GROUP BY page.household_id
+    ORDER BY page.household_id
+""")
+
+# The page's in-app notifications: one row per household member, one INSERT.
+# id / is_read are set here — the model's defaults are Python-side only
+_IN_APP_SQL = text("""
+    INSERT INTO notifications (id, user_id, title, body, type, is_read, meta)
+    SELECT gen_random_uuid(), u.id, :title, b.body, 'warning', FALSE,
+           json_build_object('screen', 'pantry', 'filter', 'expiring', 'items', b.items)
+    FROM unnest(CAST(:hids AS uuid[]), CAST(:bodies AS text[]), CAST(:counts AS int[])) AS b(household_id, body, items)
+    JOIN users u ON u.household_id = b.household_id
+""")
+
+_EXPIRY_TITLE = "🍎 Tracker — Expiry Alert"
+
+_UUID_MIN = "00000000-0000-0000-0000-000000000000"
+
+
+class ExpiryRunStats:
+    __slots__ = ("households_notified", "items_alerted", "in_app_created", "households_with_tokens",
+                 "households_delivered", "total_pushed", "tokens_pruned", "pages", "errors")
+
+    def __init__(self):
+        self.households_notified = 0
+        self.items_alerted = 0
+        self.in_app_created = 0
+        self.households_with_tokens = 0
+        self.households_delivered = 0
+        self.total_pushed = 0
+        self.tokens_pruned = 0
+        self.pages = 0
+        self.errors: Counter = Counter()
+
+    def summary(self) -> dict:
+        return {
+            "households_notified": self.households_notified,
+            "items_alerted": self.items_alerted,
+            "in_app_created": self.in_app_created,
+            "households_with_tokens": self.households_with_tokens,
+            "households_delivered": self.households_delivered,
+            "households_failed": self.households_with_tokens - self.households_delivered,
+            "total_pushed": self.total_pushed,
+            "errors": dict(self.errors),
+            "tokens_pruned": self.tokens_pruned,
+            "pages": self.pages,
+        }
+
+
+def alert_levels(days_ahead: int) -> list[int]:
+    """Days-left thresholds that trigger an alert: EXPIRY_ALERT_THRESHOLDS within the window, plus the window."""
+    levels = {int(t) for t in settings.EXPIRY_ALERT_THRESHOLDS.split(",") if t.strip()}
+    return sorted({t for t in levels if 0 <= t <= days_ahead} | {days_ahead})
+
+
+def _expiry_body(row) -> str:
+    if row.expiring == 1:
+        days_left = row.first_days_left
+        if days_left < 0:
+            return f"{row.first_name} expired {-days_left} day(s) ago!"
+        return f"{row.first_name} expires {'today' if days_left == 0 else f'in {days_left} day(s)'}!"
+    return f"{row.expiring} items expiring soon — check your pantry!"
+
+
+async def _expiry_shard(
+    shard: int, shards: int, days_ahead: int, local_hour: int | None, household_id: str | None,
+    limit: asyncio.Semaphore, stats: ExpiryRunStats,
+) -> None:
+    from app.database import AsyncSessionLocal
+
+    batch = settings.EXPIRY_SCAN_BATCH_SIZE
+    levels = alert_levels(days_ahead)
+    after = _UUID_MIN
+    while True:
+        async with AsyncSessionLocal() as db:
+            page = (await db.execute(_EXPIRY_PAGE_SQL, {
+                "days": days_ahead, "levels": levels, "after": after, "shards": shards, "shard": shard,
+                "hour": local_hour, "household": household_id, "batch": batch,
+            })).fetchall()
+            if not page:
+                return
+            after = str(page[-1].household_id)
+            rows = [row for row in page if row.expiring]
+            bodies = {str(row.household_id): _expiry_body(row) for row in rows}
+            in_app = 0
+            token_rows = []
+            if rows:
+                in_app = (await db.execute(_IN_APP_SQL, {
+                    "title": _EXPIRY_TITLE,
+                    "hids": list(bodies),
+                    "bodies": list(bodies.values()),
+                    "counts": [row.expiring for row in rows],
+                })).rowcount
+                token_rows = (await db.execute(
+                    select(PushNotificationToken.token, User.household_id)
+                    .join(User, User.id == PushNotificationToken.user_id)
+                    .where(PushNotificationToken.platform == "expo", User.household_id.in_(list(bodies)))
+                )).all()
+            # Alert state + in-app rows are committed before pushing: a push
+            # that fails is not retried tomorrow, but no transaction is held
+            # open while pushing and a crash never re-alerts.
+            await db.commit()
 
-        for token_info in tokens:
-            if token_info["platform"] == "expo":
-                pushed = await _send_expo_notification(
-                    token=token_info["token"],
-                    title="🍎 Tracker — Expiry Alert",
-                    body=body,
-                    data={"screen": "pantry", "filter": "expiring"},
-                )
-                if pushed:
-                    total_pushed += 1
+            messages: list[dict] = []
+            owners: list[str] = []      # household of each message
+            for token, household_id in token_rows:
+                household_id = str(household_id)
+                messages.append(_expo_message(token, _EXPIRY_TITLE, bodies[household_id],
+                                              {"screen": "pantry", "filter": "expiring"}))
+                owners.append(household_id)
+            tickets = await send_expo_push(messages, limit)
+            # Tickets go to receipt polling; DeviceNotRegistered tokens are dropped now
+            recorded = await record_push_tickets(db, messages, tickets)
+            await db.commit()
 
-    return {"households_notified": len(by_household), "total_pushed": total_pushed}
+        delivered = set()
+        for household_id, ticket in zip(owners, tickets):
+            if ticket.get("status") == "ok":
+                delivered.add(household_id)
+                stats.total_pushed += 1
+            else:
+                stats.errors[(ticket.get("details") or {}).get("error") or "Unknown"] += 1
+        stats.households_notified += len(rows)
+        stats.items_alerted += sum(row.expiring for row in rows)
+        stats.in_app_created += in_app
+        stats.households_with_tokens += len(set(owners))
+        stats.households_delivered += len(delivered)
+        stats.tokens_pruned += recorded["pruned"]
+        stats.pages += 1
+        if len(page) < batch:
+            return
+
+
+async def send_expiry_notifications(
+    days_ahead: int = 3, local_hour: int | None = None, household_id: str | None = None,
+) -> dict:
+    """
+    Alert every member of each household whose pantry items newly crossed an
+    alert threshold (alert_levels) within `days_ahead` days of the
+    household's local date: one in-app notification per member, written in
+    one INSERT per page, and a push to each of their devices.  Items already
+    alerted at their current threshold are skipped, so the work tracks new
+    events, not the expiring inventory.
+
+    With `local_hour` set only households where it is currently that hour
+    are alerted — the hourly job uses this to reach each household at
+    EXPIRY_ALERT_HOUR local time; with `household_id` set only that
+    household is scanned (the manual trigger).  Households are hash-split into
+    EXPIRY_SCAN_SHARDS shards walked concurrently, EXPIRY_SCAN_BATCH_SIZE
+    households per page, so memory stays at one page per shard.
+    """
+    started = time.perf_counter()
+    shards = max(1, settings.EXPIRY_SCAN_SHARDS)
+    limit = asyncio.Semaphore(settings.EXPO_PUSH_CONCURRENCY)     # shared by all shards
+    stats = ExpiryRunStats()
+    await asyncio.gather(*(
+        _expiry_shard(shard, shards, days_ahead, local_hour, household_id, limit, stats) for shard in range(shards)
+    ))
+    summary = stats.summary()
+    summary["elapsed_s"] = round(time.perf_counter() - started, 1)
+    if stats.households_notified:
+        logger.info("Expiry alerts: %s", summary)
+    return summary
 
 
 async def save_in_app_notification(
@@ -177,16 +349,8 @@ async def mark_read(db: AsyncSession, user_id: str, notification_id: str | None
 # Internal helpers
 # ---------------------------------------------------------------------------
 
-async def _send_expo_notification(
-    token: str,
-    title: str,
-    body: str,
-    data: dict | None = None,
-) -> bool:
-    """Send a single push notification via Expo's push API. Returns True on success."""
-    if not token.startswith("ExponentPushToken["):
-        return False
-    payload = {
+def _expo_message(token: str, title: str, body: str, data: dict | None = None) -> dict:
+    return {
         "to": token,
         "title": title,
         "body": body,
@@ -194,15 +358,70 @@ async def _send_expo_notification(
         "sound": "default",
         "priority": "high",
     }
+
+
+def expo_headers() -> dict:
+    headers = {"Content-Type": "application/json", "Accept": "application/json", "Accept-Encoding": "gzip"}
+    if settings.EXPO_ACCESS_TOKEN:
+        headers["Authorization"] = f"Bearer {settings.EXPO_ACCESS_TOKEN}"
+    return headers
+
+
+def _error_ticket(error: str, message: str = "") -> dict:
+    return {"status": "error", "message": message or error, "details": {"error": error}}
+
+
+async def _post_expo_batch(batch: list[dict], limit: asyncio.Semaphore) -> list[dict]:
+    """One Expo request; tickets in message order.  Transport failures become error tickets."""
+    headers = expo_headers()
+    async with limit:
+        for attempt in range(_EXPO_RETRIES + 1):
+            try:
+                resp = await get_http_client("expo").post(EXPO_PUSH_URL, json=batch, headers=headers)
+            except Exception as exc:
+                if attempt == _EXPO_RETRIES:
+                    return [_error_ticket("RequestFailed", str(exc))] * len(batch)
+            else:
+                if resp.status_code != 429 and resp.status_code < 500:
+                    break
+                if attempt == _EXPO_RETRIES:
+                    return [_error_ticket("RequestFailed", f"HTTP {resp.status_code}")] * len(batch)
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.post(
-                EXPO_PUSH_URL,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-            )
-            result = resp.json()
-            ticket = result.get("data", {})
-            return ticket.get("status") == "ok"
-    except Exception:
-        return False
+        result = resp.json()
+    except ValueError:
+        return [_error_ticket("RequestFailed", f"HTTP {resp.status_code}")] * len(batch)
+    tickets = result.get("data")
+    if not isinstance(tickets, list) or len(tickets) != len(batch):
+        error = (result.get("errors") or [{}])[0]
+        return [_error_ticket(error.get("code") or "RequestFailed", error.get("message", ""))] * len(batch)
+    return tickets
+
+
+async def send_expo_push(messages: list[dict], limit: asyncio.Semaphore | None = None) -> list[dict]:
+    """
+    Send Expo push messages in batches, concurrently.  Returns one ticket per
+    message, in order: {"status": "ok", "id": …} or {"status": "error", "details": {"error": …}}.
+    Messages whose token is not an Expo token are not sent.  `limit` caps
+    requests in flight across concurrent callers (default: EXPO_PUSH_CONCURRENCY).
+    """
+    tickets: list[dict | None] = [None] * len(messages)
+    sendable = []
+    for i, message in enumerate(messages):
+        if str(message.get("to", "")).startswith(("ExponentPushToken[", "ExpoPushToken[")):
+            sendable.append(i)
+        else:
+            tickets[i] = _error_ticket("InvalidToken", "not an Expo push token")
+
+    size = max(1, min(settings.EXPO_PUSH_BATCH_SIZE, _EXPO_MAX_BATCH))
+    limit = limit or asyncio.Semaphore(settings.EXPO_PUSH_CONCURRENCY)
+    chunks = [sendable[i:i + size] for i in range(0, len(sendable), size)]
+    results = await asyncio.gather(*(_post_expo_batch([messages[i] for i in chunk], limit) for chunk in chunks))
+    for chunk, batch_tickets in zip(chunks, results):
+        for i, ticket in zip(chunk, batch_tickets):
+            tickets[i] = ticket
+    failed = sum(t.get("status") != "ok" for t in tickets)
+    if messages:
+        logger.info("Expo push: %d messages in %d requests, %d failed", len(messages), len(chunks), failed)
+    return tickets
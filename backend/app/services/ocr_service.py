@@ -1,70 +1,264 @@
 """
-OCR Service — PaddleOCR-powered text extraction (singleton engine).
+OCR Service — PaddleOCR-powered text extraction (one engine per profile).
 
 Pipeline:
   1. PaddleOCR  (free, offline, high accuracy — primary)
+     or the same PP-OCR det/rec models exported to ONNX, run under
+     onnxruntime (USE_ONNX_OCR=true) — faster cold start, smaller workers
   2. Tesseract  (free, offline, less accurate — last-resort fallback)
 
 Raw text is then structured by Gemini Flash (see ai_document_service.py).
-The PaddleOCR engine is created ONCE as a module-level singleton to avoid
-re-loading ~100MB of model weights on every request.
+Each (backend, profile) engine is created ONCE, on first use, and cached
+for the process lifetime to avoid re-loading ~100MB of model weights per request.
+
+OCR profiles trade latency for accuracy:
+  • fast      — mobile det/rec models, no angle classifier, small input (640px)
+  • balanced  — the original engine: mobile models + angle classifier (960px)
+  • accurate  — server det/rec models when configured, angle classifier (1600px)
+
+Selection (select_ocr_profile): OCR_PROFILE forces one; otherwise "fast" under
+pipeline queue pressure, "accurate" for bank statements, "balanced" for
+receipts.  Results whose mean line confidence is below OCR_RETRY_MIN_CONFIDENCE
+are re-run once with "accurate" (unless the pipeline is under pressure).
 """
 import logging
+import threading
+import time
+from pathlib import Path
+
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
-# ── PaddleOCR Singleton ───────────────────────────────────────
+OCR_PROFILES: dict[str, dict] = {
+    "fast": {
+        "use_angle_cls": False,
+        "det_limit_side_len": 640,
+        "rec_batch_num": 16,
+        "det_model_dir": settings.OCR_FAST_DET_MODEL_DIR or None,
+        "rec_model_dir": settings.OCR_FAST_REC_MODEL_DIR or None,
+    },
+    "balanced": {
+        "use_angle_cls": True,
+        "det_limit_side_len": 960,
+    },
+    "accurate": {
+        "use_angle_cls": True,
+        "det_limit_side_len": 1600,
+        "det_db_unclip_ratio": 1.8,
+        "det_model_dir": settings.OCR_ACCURATE_DET_MODEL_DIR or None,
+        "rec_model_dir": settings.OCR_ACCURATE_REC_MODEL_DIR or None,
+    },
+}
+
+# ── OCR engines (one per backend + profile) ───────────────────
 # Created lazily on first use, then reused for all subsequent calls.
-_paddleocr_engine = None
+_paddleocr_engines: dict[str, object] = {}
+_onnx_engines: dict[str, object] = {}
+_engine_lock = threading.Lock()
 
 
-def _get_paddleocr():
-    """Return the singleton PaddleOCR engine, creating it on first call."""
-    global _paddleocr_engine
-    if _paddleocr_engine is None:
-        from paddleocr import PaddleOCR
-        logger.info("Initializing PaddleOCR engine (one-time, ~5s)...")
-        _paddleocr_engine = PaddleOCR(
-            use_angle_cls=True, lang="en", use_gpu=False, show_log=False
-        )
-        logger.info("PaddleOCR engine ready.")
-    return _paddleocr_engine
+def _get_paddleocr(profile: str = "balanced"):
+    """Return the cached PaddleOCR engine for `profile`, creating it on first call."""
+    engine = _paddleocr_engines.get(profile)
+    if engine is not None:
+        return engine
+    with _engine_lock:
+        engine = _paddleocr_engines.get(profile)
+        if engine is None:
+            from paddleocr import PaddleOCR
+            options = {k: v for k, v in OCR_PROFILES[profile].items() if v is not None}
+            logger.info("Initializing PaddleOCR engine '%s' (one-time, ~5s)...", profile)
+            engine = PaddleOCR(lang="en", use_gpu=False, show_log=False, **options)
+            _paddleocr_engines[profile] = engine
+            logger.info("PaddleOCR engine '%s' ready.", profile)
+    return engine
+
+
+def _get_onnx_ocr(profile: str = "balanced"):
+    """Return the cached onnxruntime engine (RapidOCR) for `profile`."""
+    engine = _onnx_engines.get(profile)
+    if engine is not None:
+        return engine
+    with _engine_lock:
+        engine = _onnx_engines.get(profile)
+        if engine is None:
+            from rapidocr_onnxruntime import RapidOCR
+            options = OCR_PROFILES[profile]
+            kwargs = {
+                "use_cls": options["use_angle_cls"],
+                "det_limit_side_len": options["det_limit_side_len"],
+                "det_limit_type": "max",           # same semantics as PaddleOCR
+                "intra_op_num_threads": settings.ONNX_INTRA_OP_THREADS,
+                "inter_op_num_threads": settings.ONNX_INTER_OP_THREADS,
+                **_onnx_model_paths(profile),
+            }
+            if options.get("det_db_unclip_ratio"):
+                kwargs["det_unclip_ratio"] = options["det_db_unclip_ratio"]
+            logger.info("Initializing ONNX OCR engine '%s'...", profile)
+            engine = RapidOCR(**kwargs)
+            _onnx_engines[profile] = engine
+            logger.info("ONNX OCR engine '%s' ready.", profile)
+    return engine
+
 
+def _onnx_model_paths(profile: str) -> dict:
+    """
+    Exported models live in ONNX_OCR_MODEL_DIR (det.onnx, rec.onnx, cls.onnx,
+    keys.txt), optionally overridden per profile in a `<profile>/` subfolder.
+    Missing files fall back to the PP-OCRv4 models bundled with rapidocr.
+    """
+    if not settings.ONNX_OCR_MODEL_DIR:
+        return {}
+    base = Path(settings.ONNX_OCR_MODEL_DIR)
+    paths = {}
+    for key, filename in (
+        ("det_model_path", "det.onnx"),
+        ("rec_model_path", "rec.onnx"),
+        ("cls_model_path", "cls.onnx"),
+        ("rec_keys_path", "keys.txt"),
+    ):
+        for candidate in (base / profile / filename, base / filename):
+            if candidate.exists():
+                paths[key] = str(candidate)
+                break
+    return paths
+
+
+def select_ocr_profile(doc_type: str = "auto") -> str:
+    """Pick an OCR profile for a document type under the current pipeline load."""
+    if settings.OCR_PROFILE in OCR_PROFILES:
+        return settings.OCR_PROFILE
+    if _under_pressure():
+        return "fast"
+    if doc_type == "bank_statement":
+        return "accurate"
+    return "balanced"
 
-def run_ocr_sync(image_path: str) -> str:
+
+def _under_pressure() -> bool:
+    from app.services.pipeline_admission import pipeline_admission
+    return pipeline_admission.queue_depth >= settings.OCR_FAST_QUEUE_DEPTH
+
+
+def run_ocr_pages_sync(image_path: str, profile: str = "balanced") -> list[list[tuple[str, float | None]]]:
     """
-    Synchronous OCR extraction.  Used by ai_document_service.extract_text_from_file().
-    Returns raw extracted text from an image or scanned PDF.
+    Synchronous OCR extraction.  Used by document_extraction for scanned
+    documents.  Returns one [(line_text, confidence), ...] list per page;
+    Tesseract lines carry no confidence (None).
     """
-    if settings.USE_PADDLEOCR:
+    if settings.USE_ONNX_OCR or settings.USE_PADDLEOCR:
         try:
-            return _paddleocr(image_path)
+            pages = _run_engine(image_path, profile)
+            confidence = _mean_confidence(pages)
+            if (
+                confidence < settings.OCR_RETRY_MIN_CONFIDENCE
+                and profile != "accurate"
+                and not _under_pressure()
+            ):
+                logger.info(
+                    "OCR confidence %.2f below %.2f with '%s' — retrying with 'accurate'",
+                    confidence, settings.OCR_RETRY_MIN_CONFIDENCE, profile,
+                )
+                retry = _run_engine(image_path, "accurate")
+                if _mean_confidence(retry) > confidence:
+                    pages = retry
+            return pages
         except Exception as exc:
-            logger.warning("PaddleOCR failed, falling back to Tesseract: %s", exc)
+            logger.warning("OCR engine failed, falling back to Tesseract: %s", exc)
+
+    return [[(line, None) for line in _tesseract_ocr(image_path).splitlines() if line.strip()]]
 
-    return _tesseract_ocr(image_path)
 
+def run_ocr_sync(image_path: str, profile: str = "balanced") -> str:
+    """Returns raw extracted text from an image or scanned PDF."""
+    return "\n".join(text for page in run_ocr_pages_sync(image_path, profile) for text, _ in page)
 
-async def run_ocr(image_path_or_url: str) -> str:
+
+async def run_ocr(image_path_or_url: str, profile: str = "balanced") -> str:
     """Async wrapper — runs CPU-bound OCR in a thread to avoid blocking the event loop."""
     import asyncio
     loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, run_ocr_sync, image_path_or_url)
+    return await loop.run_in_executor(None, run_ocr_sync, image_path_or_url, profile)
+
+
+def _run_engine(image_path: str, profile: str) -> list[list[tuple[str, float]]]:
+    if settings.USE_ONNX_OCR:
+        return _onnx_ocr(image_path, profile)
+    return _paddleocr(image_path, profile)
 
 
 # ── PaddleOCR (Free / High Accuracy / CPU) ────────────────────
-def _paddleocr(image_path: str) -> str:
-    ocr = _get_paddleocr()
-    result = ocr.ocr(image_path, cls=True)
+def _paddleocr(image_path: str, profile: str = "balanced") -> list[list[tuple[str, float]]]:
+    """Returns [(line_text, confidence), ...] in reading order, per page."""
+    options = OCR_PROFILES[profile]
+    ocr = _get_paddleocr(profile)
+    result = ocr.ocr(image_path, cls=options["use_angle_cls"])
     if not result:
-        return ""
-    lines = []
-    for page in result:
-        if page:
-            for line in page:
-                lines.append(line[1][0])
-    return "\n".join(lines)
+        return []
+    return [
+        [(line[1][0], float(line[1][1])) for line in page or []]
+        for page in result
+    ]
+
+
+# ── ONNX Runtime (same PP-OCR models, no paddlepaddle) ────────
+def _onnx_ocr(image_path: str, profile: str = "balanced") -> list[list[tuple[str, float]]]:
+    """Returns [(line_text, confidence), ...] in reading order, per page."""
+    ocr = _get_onnx_ocr(profile)
+    pages = []
+    for image in _load_pages(image_path):
+        result, _ = ocr(image)
+        pages.append([(text, float(score)) for _box, text, score in result or []])
+    return pages
+
+
+def _load_pages(image_path: str) -> list:
+    """RapidOCR takes images only — rasterize PDF pages (PaddleOCR does this itself)."""
+    if not image_path.lower().endswith(".pdf"):
+        return [image_path]
+    import numpy as np
+    import pdfplumber
+    with pdfplumber.open(image_path) as pdf:
+        # RGB → BGR, the channel order RapidOCR expects for arrays
+        return [
+            np.asarray(page.to_image(resolution=200).original.convert("RGB"))[:, :, ::-1]
+            for page in pdf.pages
+        ]
+
+
+def _mean_confidence(pages: list[list[tuple[str, float]]]) -> float:
+    confidences = [conf for page in pages for _, conf in page]
+    if not confidences:
+        return 0.0
+    return sum(confidences) / len(confidences)
+
+
+# ── Warm-up ───────────────────────────────────────────────────
+def warm_up(profiles: list[str]) -> None:
+    """
+    Build the engines for `profiles` and push one tiny synthetic image through
+    each, so model loading and first-inference JIT happen before real traffic.
+    """
+    if not (settings.USE_ONNX_OCR or settings.USE_PADDLEOCR):
+        return
+    import os
+    import tempfile
+    from PIL import Image, ImageDraw
+
+    img = Image.new("RGB", (320, 64), "white")
+    ImageDraw.Draw(img).text((10, 20), "WARM UP 1.00", fill="black")
+    fd, path = tempfile.mkstemp(suffix=".png")
+    os.close(fd)
+    try:
+        img.save(path)
+        for profile in profiles:
+            if profile in OCR_PROFILES:
+                started = time.monotonic()
+                _run_engine(path, profile)
+                logger.info("OCR engine '%s' warmed up in %.1fs", profile, time.monotonic() - started)
+    finally:
+        os.remove(path)
 
 
 # ── Tesseract (Free / Last-resort fallback) ───────────────────
@@ -0,0 +1,178 @@
+"""
+Pipeline Admission Control — bounds in-flight OCR + LLM work per worker.
+
+Every upload that enters the document pipeline takes a slot here first:
+
+  admitted ──► queued (waiting for a pipeline worker) ──► active ──► done
+
+Admission is refused (PipelineOverloaded → 503 + Retry-After) when either:
+  • the queue of jobs waiting for a worker is already PIPELINE_MAX_QUEUE_DEPTH
+    deep, or
+  • the estimated wait (queue depth × recent service time ÷ workers) exceeds
+    PIPELINE_MAX_WAIT_SECONDS — the client would time out before we start.
+
+Service time is an EWMA over completed jobs (time spent *active*, not queued),
+so Retry-After follows real load.  Jobs whose client disconnects are cancelled
+while still queued; work already running inside a thread pool cannot be
+interrupted and simply finishes.
+
+State is per process — each uvicorn worker admits independently, and
+`snapshot()` is exposed on /api/health/pipeline for autoscaling.
+"""
+import asyncio
+import logging
+import math
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Smoothing factor for the service-time EWMA (higher = reacts faster)
+_EWMA_ALPHA = 0.2
+# Seed estimate before any job has completed (OCR + Gemini round trip)
+_INITIAL_SERVICE_SECONDS = 8.0
+_MAX_RETRY_AFTER_SECONDS = 300
+
+
+class PipelineOverloaded(Exception):
+    """Raised when a new job cannot be admitted; carries the Retry-After hint."""
+
+    def __init__(self, retry_after: int, queue_depth: int):
+        super().__init__(f"Document pipeline at capacity (queue depth {queue_depth})")
+        self.retry_after = retry_after
+        self.queue_depth = queue_depth
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client went away while its job was queued or running."""
+
+
+class PipelineSlot:
+    """An admitted job.  `run()` waits for a worker, `release()` frees the slot."""
+
+    def __init__(self, controller: "PipelineAdmission"):
+        self._controller = controller
+        self._released = False
+
+    async def run(self, coro):
+        """Wait for a free pipeline worker, then await `coro` and time it."""
+        ctl = self._controller
+        try:
+            async with ctl._workers:
+                ctl._active += 1
+                started = time.monotonic()
+                try:
+                    return await coro
+                finally:
+                    ctl._active -= 1
+                    ctl._observe(time.monotonic() - started)
+        finally:
+            coro.close()  # no-op if awaited; silences "never awaited" if cancelled early
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._in_flight -= 1
+
+
+class PipelineAdmission:
+    def __init__(self, workers: int, max_queue_depth: int, max_wait_seconds: float):
+        self.workers = max(1, workers)
+        self.max_queue_depth = max_queue_depth
+        self.max_wait_seconds = max_wait_seconds
+        self._workers = asyncio.Semaphore(self.workers)
+        self._in_flight = 0          # admitted and not yet released
+        self._active = 0             # currently holding a worker
+        self._service_seconds = _INITIAL_SERVICE_SECONDS
+        self._admitted = 0
+        self._rejected = 0
+        self._cancelled = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Admitted jobs beyond worker capacity — they must wait for a worker."""
+        return max(0, self._in_flight - self.workers)
+
+    def estimated_wait(self) -> float:
+        """Seconds a newly admitted job would wait before a worker picks it up."""
+        if self._in_flight < self.workers:
+            return 0.0
+        return (self.queue_depth + 1) * self._service_seconds / self.workers
+
+    def admit(self) -> PipelineSlot:
+        """Reserve a slot or raise PipelineOverloaded with a computed Retry-After."""
+        queued = self.queue_depth
+        wait = self.estimated_wait()
+        if queued >= self.max_queue_depth or wait > self.max_wait_seconds:
+            self._rejected += 1
+            raise PipelineOverloaded(self._retry_after(queued), queued)
+        self._in_flight += 1
+        self._admitted += 1
+        return PipelineSlot(self)
+
+    def _retry_after(self, queued: int) -> int:
+        """Time for the queue to drain down to an admissible depth."""
+        per_job = self._service_seconds / self.workers
+        admissible = min(self.max_queue_depth, int(self.max_wait_seconds / per_job) if per_job else 0)
+        excess = queued - admissible + 1
+        seconds = math.ceil(max(excess, 1) * per_job)
+        return max(1, min(seconds, _MAX_RETRY_AFTER_SECONDS))
+
+    def _observe(self, elapsed: float) -> None:
+        self._service_seconds += _EWMA_ALPHA * (elapsed - self._service_seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": self.workers,
+            "active": self._active,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "service_time_seconds": round(self._service_seconds, 3),
+            "estimated_wait_seconds": round(self.estimated_wait(), 3),
+            "admitted_total": self._admitted,
+            "rejected_total": self._rejected,
+            "cancelled_total": self._cancelled,
+        }
+
+
+pipeline_admission = PipelineAdmission(
+    workers=settings.PIPELINE_WORKERS,
+    max_queue_depth=settings.PIPELINE_MAX_QUEUE_DEPTH,
+    max_wait_seconds=settings.PIPELINE_MAX_WAIT_SECONDS,
+)
+
+
+async def pipeline_slot():
+    """FastAPI dependency — admits the request or fails fast with 503."""
+    slot = pipeline_admission.admit()
+    try:
+        yield slot
+    finally:
+        slot.release()
+
+
+async def run_unless_disconnected(request, coro, poll_interval: float = 1.0):
+    """
+    Await `coro`, polling the client connection every `poll_interval` seconds.
+    If the client has gone away the job is cancelled and ClientDisconnected
+    is raised, so queued OCR/LLM work is never started for nobody.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                pipeline_admission._cancelled += 1
+                logger.info("Client disconnected — cancelling pipeline job for %s", request.url.path)
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
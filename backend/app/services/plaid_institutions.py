@@ -0,0 +1,89 @@
+"""
+Plaid Institutions — cached institution metadata (name, logo, brand colour).
+
+An institution's metadata is the same for every user and rarely changes, so it
+is fetched once per institution instead of on every token exchange:
+
+  1. in-process dict (per worker)
+  2. plaid_institutions table (shared by workers and replicas — migration 010)
+  3. Plaid /institutions/get_by_id — result stored in both
+
+Entries older than PLAID_INSTITUTION_CACHE_HOURS are refetched; when that
+refetch fails the stale entry is served rather than failing the link.
+Writes run in the caller's transaction; the caller commits.
+"""
+import logging
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.services.plaid_service import PlaidService
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_INSTITUTION = {"institution_id": None, "name": "Unknown Bank", "logo": None, "primary_color": None}
+
+_memory: dict[str, tuple[float, dict]] = {}     # institution_id → (monotonic fetch time, metadata)
+
+
+def _ttl_seconds() -> float:
+    return settings.PLAID_INSTITUTION_CACHE_HOURS * 3600
+
+
+async def get_institution(db: AsyncSession, svc: PlaidService, institution_id: str | None) -> dict:
+    """{ institution_id, name, logo, primary_color } for `institution_id`."""
+    if not institution_id:
+        return UNKNOWN_INSTITUTION
+
+    cached = _memory.get(institution_id)
+    if cached and time.monotonic() - cached[0] < _ttl_seconds():
+        return cached[1]
+
+    row = (await db.execute(
+        text("""
+            SELECT institution_id, name, logo, primary_color,
+                   EXTRACT(EPOCH FROM NOW() - fetched_at) AS age_seconds
+            FROM plaid_institutions
+            WHERE institution_id = :iid
+        """),
+        {"iid": institution_id},
+    )).fetchone()
+    stored = None
+    if row:
+        stored = {"institution_id": row.institution_id, "name": row.name, "logo": row.logo,
+                  "primary_color": row.primary_color}
+        if row.age_seconds < _ttl_seconds():
+            _memory[institution_id] = (time.monotonic() - float(row.age_seconds), stored)
+            return stored
+
+    try:
+        fetched = await svc.get_institution(institution_id)
+    except Exception as exc:
+        if stored:
+            logger.warning("Plaid institution refresh failed for %s, serving cached entry: %s", institution_id, exc)
+            return stored
+        raise
+    metadata = {
+        "institution_id": institution_id,
+        "name": fetched.get("name") or UNKNOWN_INSTITUTION["name"],
+        "logo": fetched.get("logo"),
+        "primary_color": fetched.get("primary_color"),
+    }
+    await db.execute(
+        text("""
+            INSERT INTO plaid_institutions (institution_id, name, logo, primary_color, url, fetched_at)
+            VALUES (:iid, :name, :logo, :color, :url, NOW())
+            ON CONFLICT (institution_id) DO UPDATE SET
+                name          = EXCLUDED.name,
+                logo          = EXCLUDED.logo,
+                primary_color = EXCLUDED.primary_color,
+                url           = EXCLUDED.url,
+                fetched_at    = NOW()
+        """),
+        {"iid": institution_id, "name": metadata["name"], "logo": metadata["logo"],
+         "color": metadata["primary_color"], "url": fetched.get("url")},
+    )
+    _memory[institution_id] = (time.monotonic(), metadata)
+    return metadata
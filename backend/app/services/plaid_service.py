@@ -2,11 +2,20 @@
 Plaid Integration Service — Phase 3
 Provides Link token creation, access token exchange, and transaction sync
 using the Plaid API. Falls back gracefully when not configured.
+
+Transactions use cursor-based /transactions/sync: each call returns only the
+added / modified / removed transactions since the item's stored cursor.
+PLAID_BASE_URL points the service at another host — e.g. the local stand-in
+server (python -m scripts.plaid_standin).
+
+Requests go over the app's shared, keep-alive "plaid" client (http_client),
+so consecutive calls reuse one connection instead of a new TLS handshake each.
 """
 import httpx
-from datetime import date, timedelta
 from typing import Optional
 
+from app.services.http_client import get_http_client
+
 PLAID_BASE_URLS = {
     "sandbox": "https://sandbox.plaid.com",
     "development": "https://development.plaid.com",
@@ -14,11 +23,30 @@ PLAID_BASE_URLS = {
 }
 
 
+# Plaid asks clients to restart pagination from the original cursor on this error
+_MUTATION_DURING_PAGINATION = "TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION"
+_MAX_SYNC_RESTARTS = 3
+
+
+class PlaidSyncResult:
+    """Every page of one /transactions/sync run, merged."""
+
+    __slots__ = ("added", "modified", "removed", "next_cursor", "pages")
+
+    def __init__(self):
+        self.added: list[dict] = []         # normalized
+        self.modified: list[dict] = []      # normalized
+        self.removed: list[str] = []        # Plaid transaction_ids
+        self.next_cursor: str | None = None
+        self.pages = 0
+
+
 class PlaidService:
-    def __init__(self, client_id: str, secret: str, env: str = "sandbox"):
+    def __init__(self, client_id: str, secret: str, env: str = "sandbox", base_url: str = "", sync_page_size: int = 500):
         self.client_id = client_id
         self.secret = secret
-        self.base_url = PLAID_BASE_URLS.get(env, PLAID_BASE_URLS["sandbox"])
+        self.base_url = (base_url or PLAID_BASE_URLS.get(env, PLAID_BASE_URLS["sandbox"])).rstrip("/")
+        self.sync_page_size = max(1, min(sync_page_size, 500))   # Plaid's maximum
 
     def _headers(self) -> dict:
         return {"Content-Type": "application/json"}
@@ -26,118 +54,107 @@ class PlaidService:
     def _auth_body(self) -> dict:
         return {"client_id": self.client_id, "secret": self.secret}
 
-    async def create_link_token(self, user_id: str) -> dict:
+    async def _post(self, path: str, payload: dict, timeout: float | None = None) -> dict:
+        kwargs = {"timeout": timeout} if timeout else {}
+        resp = await get_http_client("plaid").post(
+            f"{self.base_url}{path}",
+            json={**self._auth_body(), **payload},
+            headers=self._headers(),
+            **kwargs,
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+    async def create_link_token(self, user_id: str, webhook_url: str = "") -> dict:
         """
         Creates a Plaid Link token for the front-end to initialize Link.
+        Items linked with a webhook_url send it their transaction webhooks.
         Returns { link_token, expiration, request_id }
         """
         payload = {
-            **self._auth_body(),
             "user": {"client_user_id": user_id},
             "client_name": "Tracker",
             "products": ["transactions"],
             "country_codes": ["US", "CA"],
             "language": "en",
         }
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            resp = await client.post(
-                f"{self.base_url}/link/token/create",
-                json=payload,
-                headers=self._headers(),
-            )
-            resp.raise_for_status()
-            return resp.json()
+        if webhook_url:
+            payload["webhook"] = webhook_url
+        return await self._post("/link/token/create", payload)
 
     async def exchange_public_token(self, public_token: str) -> dict:
         """
         Exchanges the public token returned by Plaid Link for a permanent access token.
         Returns { access_token, item_id }
         """
-        payload = {
-            **self._auth_body(),
-            "public_token": public_token,
-        }
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            resp = await client.post(
-                f"{self.base_url}/item/public_token/exchange",
-                json=payload,
-                headers=self._headers(),
-            )
-            resp.raise_for_status()
-            return resp.json()
+        return await self._post("/item/public_token/exchange", {"public_token": public_token})
 
     async def get_accounts(self, access_token: str) -> list[dict]:
         """Returns list of accounts for the linked item."""
-        payload = {**self._auth_body(), "access_token": access_token}
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            resp = await client.post(
-                f"{self.base_url}/accounts/get",
-                json=payload,
-                headers=self._headers(),
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            return data.get("accounts", [])
-
-    async def sync_transactions(
-        self,
-        access_token: str,
-        days_back: int = 30,
-    ) -> list[dict]:
+        data = await self._post("/accounts/get", {"access_token": access_token})
+        return data.get("accounts", [])
+
+    async def sync_transactions(self, access_token: str, cursor: str | None = None) -> PlaidSyncResult:
         """
-        Fetches transactions for the last `days_back` days.
-        Returns normalized list compatible with BankTransaction model.
+        Changes since `cursor` (None = the item's full history), following
+        has_more to the last page.  The caller stores result.next_cursor only
+        after applying the changes, so a failed apply is retried next sync.
         """
-        start_date = (date.today() - timedelta(days=days_back)).isoformat()
-        end_date = date.today().isoformat()
-
-        payload = {
-            **self._auth_body(),
-            "access_token": access_token,
-            "start_date": start_date,
-            "end_date": end_date,
-            "options": {"count": 500, "offset": 0, "include_personal_finance_category": True},
-        }
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            resp = await client.post(
-                f"{self.base_url}/transactions/get",
-                json=payload,
-                headers=self._headers(),
-            )
-            resp.raise_for_status()
-            data = resp.json()
-
-        raw_txns = data.get("transactions", [])
-        return [_normalize_plaid_transaction(t) for t in raw_txns]
-
-    async def get_institution_name(self, item_id: str, access_token: str) -> str:
-        """Returns the bank institution name for a linked item."""
-        payload = {**self._auth_body(), "access_token": access_token}
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            item_resp = await client.post(
-                f"{self.base_url}/item/get",
-                json=payload,
-                headers=self._headers(),
-            )
-            item_resp.raise_for_status()
-            institution_id = item_resp.json().get("item", {}).get("institution_id")
-
-        if not institution_id:
-            return "Unknown Bank"
-
-        payload2 = {
-            **self._auth_body(),
+        result = PlaidSyncResult()
+        page_cursor = cursor
+        restarts = 0
+        while True:
+            payload = {
+                "access_token": access_token,
+                "count": self.sync_page_size,
+                "options": {"include_personal_finance_category": True},
+            }
+            if page_cursor:
+                payload["cursor"] = page_cursor
+            try:
+                data = await self._post("/transactions/sync", payload, timeout=30.0)
+            except httpx.HTTPStatusError as exc:
+                if _plaid_error_code(exc.response) == _MUTATION_DURING_PAGINATION and restarts < _MAX_SYNC_RESTARTS:
+                    restarts += 1
+                    result, page_cursor = PlaidSyncResult(), cursor
+                    continue
+                raise
+
+            result.pages += 1
+            result.added.extend(_normalize_plaid_transaction(t) for t in data.get("added", []))
+            result.modified.extend(_normalize_plaid_transaction(t) for t in data.get("modified", []))
+            result.removed.extend(t["transaction_id"] for t in data.get("removed", []) if t.get("transaction_id"))
+            page_cursor = data.get("next_cursor")
+            if not data.get("has_more"):
+                break
+        result.next_cursor = page_cursor
+        return result
+
+    async def get_webhook_verification_key(self, key_id: str) -> dict:
+        """The JWK (ES256 public key) that signed a webhook's Plaid-Verification JWT."""
+        data = await self._post("/webhook_verification_key/get", {"key_id": key_id})
+        return data.get("key", {})
+
+    async def get_item_institution_id(self, access_token: str) -> str | None:
+        """The institution_id of a linked item."""
+        data = await self._post("/item/get", {"access_token": access_token})
+        return data.get("item", {}).get("institution_id")
+
+    async def get_institution(self, institution_id: str) -> dict:
+        """Institution metadata: { institution_id, name, logo (base64 PNG), primary_color, url }."""
+        data = await self._post("/institutions/get_by_id", {
             "institution_id": institution_id,
             "country_codes": ["US", "CA"],
-        }
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            inst_resp = await client.post(
-                f"{self.base_url}/institutions/get_by_id",
-                json=payload2,
-                headers=self._headers(),
-            )
-            inst_resp.raise_for_status()
-            return inst_resp.json().get("institution", {}).get("name", "Unknown Bank")
+            "options": {"include_optional_metadata": True},
+        })
+        return data.get("institution", {})
+
+
+def _plaid_error_code(resp: httpx.Response) -> str | None:
+    try:
+        return resp.json().get("error_code")
+    except ValueError:
+        return None
 
 
 def _normalize_plaid_transaction(t: dict) -> dict:
@@ -173,4 +190,10 @@ def get_plaid_service(settings) -> Optional[PlaidService]:
     if not client_id or not secret:
         return None
     env = getattr(settings, "PLAID_ENV", "sandbox")
-    return PlaidService(client_id=client_id, secret=secret, env=env)
+    return PlaidService(
+        client_id=client_id,
+        secret=secret,
+        env=env,
+        base_url=getattr(settings, "PLAID_BASE_URL", ""),
+        sync_page_size=getattr(settings, "PLAID_SYNC_PAGE_SIZE", 500),
+    )
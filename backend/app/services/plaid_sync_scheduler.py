@@ -0,0 +1,227 @@
+"""
+Plaid Sync Scheduler — background refresh of every linked Plaid item.
+
+Every PLAID_SYNC_TICK_MINUTES (main.lifespan) run_plaid_sync() walks the items
+due for a sync — last synced more than PLAID_SYNC_INTERVAL_MINUTES ago, or
+PLAID_SYNC_SAFETY_INTERVAL_MINUTES when webhooks drive syncs (never synced
+first, then oldest first) and not backing off — in keyset-ordered
+batches, and syncs each batch concurrently:
+
+  • at most PLAID_SYNC_CONCURRENCY syncs in flight overall
+  • at most PLAID_SYNC_PER_INSTITUTION per institution, so one slow bank
+    cannot take every slot
+  • a Plaid rate-limit error (HTTP 429 / RATE_LIMIT_EXCEEDED) pauses new syncs
+    for the whole run with exponential backoff + jitter, and the item itself
+    is retried after its own backoff
+
+Each item's outcome is recorded on plaid_items (migration 011): last_sync_ms
+on success (plaid_sync_service), and on failure sync_error_count (consecutive,
+drives the item's backoff), sync_error_total, last_sync_error and
+next_sync_at.  Each sync has its own session, so one failure rolls back only
+that item.
+"""
+import asyncio
+import logging
+import random
+import statistics
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy import text
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_RATE_LIMIT_CODES = {"RATE_LIMIT_EXCEEDED", "TRANSACTIONS_SYNC_LIMIT", "TRANSACTIONS_LIMIT"}
+_NEVER = datetime(1970, 1, 1, tzinfo=timezone.utc)     # keyset start; never-synced items sort here
+
+_DUE_ITEMS_SQL = text("""
+    SELECT p.item_id, p.access_token, p.sync_cursor, p.institution_id, p.sync_error_count,
+           u.household_id, COALESCE(p.last_synced_at, TIMESTAMPTZ 'epoch') AS sort_key
+    FROM plaid_items p
+    JOIN users u ON u.id = p.user_id
+    WHERE u.household_id IS NOT NULL
+      AND (p.next_sync_at IS NULL OR p.next_sync_at <= NOW())
+      AND COALESCE(p.last_synced_at, TIMESTAMPTZ 'epoch') < NOW() - make_interval(mins => :interval)
+      AND (COALESCE(p.last_synced_at, TIMESTAMPTZ 'epoch'), p.item_id) > (:after_key, :after_id)
+    ORDER BY COALESCE(p.last_synced_at, TIMESTAMPTZ 'epoch'), p.item_id
+    LIMIT :batch
+""")
+
+_RECORD_FAILURE_SQL = text("""
+    UPDATE plaid_items
+    SET sync_error_count = sync_error_count + 1,
+        sync_error_total = sync_error_total + 1,
+        last_sync_error  = :error,
+        last_sync_ms     = :ms,
+        next_sync_at     = NOW() + make_interval(secs => :delay)
+    WHERE item_id = :iid
+""")
+
+
+class PlaidSyncRunStats:
+    __slots__ = ("items", "synced", "failed", "rate_limited", "added", "modified", "removed", "latencies_ms")
+
+    def __init__(self):
+        self.items = 0
+        self.synced = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self.added = 0
+        self.modified = 0
+        self.removed = 0
+        self.latencies_ms: list[float] = []
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies_ms)
+        return {
+            "items": self.items,
+            "synced": self.synced,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+            "added": self.added,
+            "modified": self.modified,
+            "removed": self.removed,
+            "p50_ms": round(statistics.median(latencies), 1) if latencies else None,
+            "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 1) if latencies else None,
+        }
+
+
+def _plaid_error(exc: Exception) -> tuple[str, bool]:
+    """(short error description, is a rate limit)."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        try:
+            code = exc.response.json().get("error_code") or ""
+        except ValueError:
+            code = ""
+        status = exc.response.status_code
+        return f"{status} {code}".strip(), status == 429 or code in _RATE_LIMIT_CODES
+    return f"{type(exc).__name__}: {exc}"[:500], False
+
+
+def item_backoff_seconds(consecutive_failures: int) -> float:
+    """Delay before an item that has failed `consecutive_failures` times is retried."""
+    delay = settings.PLAID_SYNC_BACKOFF_SECONDS * 2 ** max(0, consecutive_failures - 1)
+    return min(delay, settings.PLAID_SYNC_BACKOFF_MAX_MINUTES * 60) * random.uniform(0.8, 1.2)
+
+
+class _Limiter:
+    """Global + per-institution slots, and a run-wide pause after rate limits."""
+
+    def __init__(self, concurrency: int, per_institution: int):
+        self._global = asyncio.Semaphore(concurrency)
+        self._institutions: dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(per_institution))
+        self._paused_until = 0.0
+        self._rate_limit_hits = 0
+
+    async def _wait_for_pause(self) -> None:
+        while (delay := self._paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+
+    async def run(self, institution_id: str | None, fn):
+        # institution slot first: waiting on a busy bank does not hold a global slot
+        async with self._institutions[institution_id or "unknown"]:
+            await self._wait_for_pause()
+            async with self._global:
+                await self._wait_for_pause()
+                return await fn()
+
+    def rate_limited(self) -> float:
+        self._rate_limit_hits += 1
+        delay = min(
+            settings.PLAID_SYNC_BACKOFF_SECONDS * 2 ** (self._rate_limit_hits - 1),
+            settings.PLAID_SYNC_BACKOFF_MAX_MINUTES * 60,
+        ) * random.uniform(0.8, 1.2)
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    def succeeded(self) -> None:
+        self._rate_limit_hits = max(0, self._rate_limit_hits - 1)
+
+
+async def _sync_one(item, svc, limiter: _Limiter, stats: PlaidSyncRunStats) -> None:
+    from app.database import AsyncSessionLocal
+    from app.services.plaid_sync_service import sync_plaid_item
+
+    async def attempt():
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            try:
+                result = await sync_plaid_item(
+                    db, svc, item.item_id, item.access_token, item.sync_cursor, item.household_id,
+                )
+            except Exception as exc:
+                await db.rollback()
+                error, is_rate_limit = _plaid_error(exc)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if is_rate_limit:
+                    stats.rate_limited += 1
+                    pause = limiter.rate_limited()
+                    logger.warning("Plaid rate limit on item %s — pausing syncs %.0fs", item.item_id, pause)
+                else:
+                    stats.failed += 1
+                    logger.warning("Plaid sync failed for item %s: %s", item.item_id, error)
+                await db.execute(_RECORD_FAILURE_SQL, {
+                    "iid": item.item_id,
+                    "error": error,
+                    "ms": int(elapsed_ms),
+                    "delay": item_backoff_seconds(item.sync_error_count + 1),
+                })
+                await db.commit()
+                return
+        limiter.succeeded()
+        stats.synced += 1
+        stats.added += result.added
+        stats.modified += result.modified
+        stats.removed += result.removed
+        stats.latencies_ms.append(result.elapsed_ms)
+
+    try:
+        await limiter.run(item.institution_id, attempt)
+    except Exception as exc:   # recording the failure itself failed (e.g. DB down)
+        stats.failed += 1
+        logger.error("Plaid sync bookkeeping failed for item %s: %s", item.item_id, exc)
+
+
+async def run_plaid_sync() -> dict | None:
+    """Sync every due item. Returns the run summary (None when Plaid is not configured)."""
+    from app.database import AsyncSessionLocal
+    from app.services.plaid_service import get_plaid_service
+
+    svc = get_plaid_service(settings)
+    if svc is None:
+        return None
+
+    # With webhooks on, polling is only a safety net for missed webhooks
+    interval = (
+        settings.PLAID_SYNC_SAFETY_INTERVAL_MINUTES if settings.PLAID_WEBHOOK_URL
+        else settings.PLAID_SYNC_INTERVAL_MINUTES
+    )
+    started = time.perf_counter()
+    limiter = _Limiter(settings.PLAID_SYNC_CONCURRENCY, settings.PLAID_SYNC_PER_INSTITUTION)
+    stats = PlaidSyncRunStats()
+    after_key, after_id = _NEVER, ""
+    while True:
+        async with AsyncSessionLocal() as db:
+            items = (await db.execute(_DUE_ITEMS_SQL, {
+                "interval": interval,
+                "after_key": after_key,
+                "after_id": after_id,
+                "batch": settings.PLAID_SYNC_BATCH_SIZE,
+            })).fetchall()
+        if not items:
+            break
+        stats.items += len(items)
+        await asyncio.gather(*(_sync_one(item, svc, limiter, stats) for item in items))
+        after_key, after_id = items[-1].sort_key, items[-1].item_id
+        if len(items) < settings.PLAID_SYNC_BATCH_SIZE:
+            break
+
+    summary = stats.summary()
+    summary["elapsed_s"] = round(time.perf_counter() - started, 1)
+    if stats.items:
+        logger.info("Plaid sync run: %s", summary)
+    return summary
@@ -0,0 +1,147 @@
+"""
+Plaid Sync Service — applies one item's /transactions/sync delta to bank_transactions.
+
+  added     → transaction_ingest (COPY + merge; ON CONFLICT skips ids already stored)
+  modified  → one UPDATE … FROM unnest(…) keyed by plaid_transaction_id
+  removed   → one DELETE … WHERE plaid_transaction_id = ANY(…)
+              (a pending transaction that posts arrives as removed + added)
+
+The new cursor is written in the same transaction as the changes, so a sync
+that fails part-way leaves the old cursor and the next sync replays the same
+delta.  A successful sync also records its latency and clears the item's
+error / backoff state (plaid_sync_scheduler).  Every step is idempotent, so
+two overlapping syncs of one item are harmless.
+"""
+import logging
+import time
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.bank_parser import ParsedTransaction
+from app.services.plaid_service import PlaidService
+from app.services.transaction_ingest import ingest_transactions
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIPTION_KEYWORDS = [
+    "netflix", "spotify", "hulu", "disney", "amazon prime", "apple", "google play",
+    "youtube", "hbo", "peacock", "paramount", "adobe", "dropbox", "icloud",
+    "planet fitness", "gym", "duolingo", "linkedin", "chegg",
+]
+
+_MODIFY_SQL = text("""
+    UPDATE bank_transactions b
+    SET transaction_date = m.tx_date,
+        description      = m.description,
+        amount           = m.amount,
+        category         = m.category,
+        is_income        = m.is_income
+    FROM unnest(
+        CAST(:ids AS text[]), CAST(:dates AS date[]), CAST(:descriptions AS text[]),
+        CAST(:amounts AS numeric[]), CAST(:categories AS text[]), CAST(:incomes AS boolean[])
+    ) AS m(plaid_transaction_id, tx_date, description, amount, category, is_income)
+    WHERE b.household_id = CAST(:hid AS uuid)
+      AND b.plaid_transaction_id = m.plaid_transaction_id
+""")
+
+_REMOVE_SQL = text("""
+    DELETE FROM bank_transactions
+    WHERE household_id = CAST(:hid AS uuid)
+      AND plaid_transaction_id = ANY(CAST(:ids AS text[]))
+""")
+
+
+class PlaidSyncStats:
+    __slots__ = ("item_id", "added", "duplicates", "modified", "removed", "pages", "elapsed_ms")
+
+    def __init__(self, item_id: str):
+        self.item_id = item_id
+        self.added = 0
+        self.duplicates = 0
+        self.modified = 0
+        self.removed = 0
+        self.pages = 0
+        self.elapsed_ms = 0.0
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _tx_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+async def sync_plaid_item(
+    db: AsyncSession,
+    svc: PlaidService,
+    item_id: str,
+    access_token: str,
+    cursor: str | None,
+    household_id,
+) -> PlaidSyncStats:
+    """Fetch the delta since `cursor`, apply it and store the new cursor. Commits."""
+    started = time.perf_counter()
+    stats = PlaidSyncStats(item_id)
+    delta = await svc.sync_transactions(access_token, cursor)
+    stats.pages = delta.pages
+
+    if delta.added:
+        ingested = await ingest_transactions(
+            db,
+            household_id,
+            (
+                ParsedTransaction(
+                    tx["date"], tx["description"], tx["amount"],
+                    raw_line=tx.get("merchant_name", ""),
+                    category=tx.get("category", "Uncategorized"),
+                    is_income=tx["is_income"],
+                    plaid_transaction_id=tx.get("plaid_transaction_id"),
+                )
+                for tx in delta.added
+            ),
+            source="plaid",
+            subscription_keywords=SUBSCRIPTION_KEYWORDS,
+        )
+        stats.added, stats.duplicates = ingested.imported, ingested.duplicates
+
+    modified = [tx for tx in delta.modified if tx.get("plaid_transaction_id")]
+    if modified:
+        result = await db.execute(_MODIFY_SQL, {
+            "hid": str(household_id),
+            "ids": [tx["plaid_transaction_id"] for tx in modified],
+            "dates": [_tx_date(tx["date"]) for tx in modified],
+            "descriptions": [tx["description"][:255] for tx in modified],
+            "amounts": [Decimal(str(tx["amount"])).quantize(Decimal("0.01")) for tx in modified],
+            "categories": [tx.get("category") for tx in modified],
+            "incomes": [bool(tx["is_income"]) for tx in modified],
+        })
+        stats.modified = result.rowcount
+
+    if delta.removed:
+        result = await db.execute(_REMOVE_SQL, {"hid": str(household_id), "ids": delta.removed})
+        stats.removed = result.rowcount
+
+    stats.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    await db.execute(
+        text("""
+            UPDATE plaid_items
+            SET sync_cursor      = :cursor,
+                last_synced_at   = NOW(),
+                last_sync_ms     = :ms,
+                sync_error_count = 0,
+                last_sync_error  = NULL,
+                next_sync_at     = NULL
+            WHERE item_id = :iid
+        """),
+        {"cursor": delta.next_cursor, "ms": int(stats.elapsed_ms), "iid": item_id},
+    )
+    await db.commit()
+
+    logger.info(
+        "Plaid item %s synced: +%d ~%d -%d (%d duplicate, %d pages) in %.0f ms",
+        item_id, stats.added, stats.modified, stats.removed, stats.duplicates, stats.pages, stats.elapsed_ms,
+    )
+    return stats
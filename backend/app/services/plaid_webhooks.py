@@ -0,0 +1,220 @@
+"""
+Plaid Webhooks — verification and debounced, targeted item syncs.
+
+Items linked with PLAID_WEBHOOK_URL make Plaid POST /api/plaid/webhook when
+their data changes, so only items with new data are synced.  The background
+scheduler then only needs to poll at PLAID_SYNC_SAFETY_INTERVAL_MINUTES.
+
+Verification (verify_plaid_webhook): the Plaid-Verification header is an
+ES256 JWT.  Its `kid` names a Plaid public key (fetched from
+/webhook_verification_key/get, cached per key id and refetched hourly so an
+expired_at set by a rotation is seen); the JWT must verify with it, be at
+most 5 minutes old, and carry the SHA-256 of the exact request body.  A kid
+Plaid does not know is a 401, and for 30 s after such a lookup other unknown
+kids are rejected without asking Plaid again.
+
+Syncs (schedule_item_sync) are debounced per item: Plaid often sends several
+webhooks in a burst (SYNC_UPDATES_AVAILABLE, then a historical update), so the
+sync starts PLAID_WEBHOOK_DEBOUNCE_SECONDS after the first one and every
+webhook inside that window rides along.  A webhook arriving while the sync is
+running queues exactly one follow-up.  When a sync changes anything the
+household gets a `transactions_updated` WebSocket event.
+
+Debouncing is per process: with several workers a burst split across them may
+sync an item twice, which is harmless — syncs are idempotent.
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+
+import httpx
+from jose import jwt
+from jose.exceptions import JOSEError
+from sqlalchemy import text
+
+from app.config import settings
+from app.services.plaid_service import PlaidService
+
+logger = logging.getLogger(__name__)
+
+_MAX_WEBHOOK_AGE_SECONDS = 5 * 60
+
+# webhook_type → codes that mean "new transaction data"
+SYNC_WEBHOOKS = {
+    "TRANSACTIONS": {
+        "SYNC_UPDATES_AVAILABLE",
+        # legacy /transactions/get webhooks — still sent to older items
+        "INITIAL_UPDATE", "HISTORICAL_UPDATE", "DEFAULT_UPDATE", "TRANSACTIONS_REMOVED",
+    },
+    "ITEM": {"LOGIN_REPAIRED"},
+}
+# ITEM error codes after which polling is pointless until the user re-links
+_ITEM_NEEDS_RELINK = {"ITEM_LOGIN_REQUIRED", "USER_PERMISSION_REVOKED", "ACCESS_NOT_GRANTED"}
+
+
+class WebhookVerificationError(Exception):
+    pass
+
+
+# ── Verification ──────────────────────────────────────────────
+_KEY_TTL_SECONDS = 60 * 60          # refetch a cached key so a rotation's expired_at is seen
+_LOOKUP_BACKOFF_SECONDS = 30        # after a failed lookup, unknown kids are rejected without a fetch
+_MAX_CACHED_KEYS = 100
+
+_keys: dict[str, tuple[float, dict]] = {}     # key_id → (fetched at, JWK)
+_lookup_failed_at = 0.0
+
+
+async def _fetch_key(svc: PlaidService, key_id: str) -> dict | None:
+    global _lookup_failed_at
+    try:
+        key = await svc.get_webhook_verification_key(key_id)
+    except httpx.HTTPError as exc:
+        logger.info("Plaid webhook key %s lookup failed: %s", key_id[:16], exc)
+        key = None
+    if not key:
+        _lookup_failed_at = time.monotonic()
+        return None
+    if len(_keys) >= _MAX_CACHED_KEYS:
+        _keys.clear()
+    _keys[key_id] = (time.monotonic(), key)
+    return key
+
+
+async def _verification_key(svc: PlaidService, key_id: str) -> dict:
+    # key_id comes from an unauthenticated request: unknown ids must not turn
+    # into a Plaid call each, nor a 500
+    now = time.monotonic()
+    cached = _keys.get(key_id)
+    if cached is None:
+        if now - _lookup_failed_at < _LOOKUP_BACKOFF_SECONDS:
+            raise WebhookVerificationError("unknown verification key")
+        key = await _fetch_key(svc, key_id)
+        if key is None:
+            raise WebhookVerificationError("unknown verification key")
+    else:
+        fetched_at, key = cached
+        if now - fetched_at > _KEY_TTL_SECONDS:
+            key = await _fetch_key(svc, key_id) or key      # Plaid unreachable: keep the cached copy
+    expired_at = key.get("expired_at")
+    if expired_at and expired_at < time.time():
+        raise WebhookVerificationError("verification key expired")
+    return key
+
+
+async def verify_plaid_webhook(svc: PlaidService, body: bytes, token: str | None) -> None:
+    """Raises WebhookVerificationError unless `token` (Plaid-Verification header) signs `body`."""
+    if not token:
+        raise WebhookVerificationError("missing Plaid-Verification header")
+    try:
+        header = jwt.get_unverified_header(token)
+    except JOSEError as exc:
+        raise WebhookVerificationError(f"malformed JWT: {exc}") from exc
+    if header.get("alg") != "ES256" or not header.get("kid"):
+        raise WebhookVerificationError("unexpected JWT algorithm")
+
+    key = await _verification_key(svc, header["kid"])
+    try:
+        claims = jwt.decode(token, key, algorithms=["ES256"], options={"verify_aud": False})
+    except JOSEError as exc:
+        raise WebhookVerificationError(f"bad signature: {exc}") from exc
+
+    if time.time() - float(claims.get("iat", 0)) > _MAX_WEBHOOK_AGE_SECONDS:
+        raise WebhookVerificationError("webhook too old")
+    if not hmac.compare_digest(str(claims.get("request_body_sha256", "")), hashlib.sha256(body).hexdigest()):
+        raise WebhookVerificationError("body hash mismatch")
+
+
+# ── Item state from ITEM webhooks ─────────────────────────────
+async def record_item_error(item_id: str, error_code: str) -> None:
+    """An ITEM ERROR webhook: record it; stop polling items that need re-linking."""
+    from app.database import AsyncSessionLocal
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            text("""
+                UPDATE plaid_items
+                SET last_sync_error = :error,
+                    next_sync_at = CASE WHEN :relink THEN TIMESTAMPTZ 'infinity' ELSE next_sync_at END
+                WHERE item_id = :iid
+            """),
+            {"iid": item_id, "error": f"webhook {error_code}", "relink": error_code in _ITEM_NEEDS_RELINK},
+        )
+        await db.commit()
+
+
+# ── Debounced syncs ───────────────────────────────────────────
+class _PendingSync:
+    __slots__ = ("task", "rerun")
+
+    def __init__(self):
+        self.task: asyncio.Task | None = None
+        self.rerun = False
+
+
+_pending: dict[str, _PendingSync] = {}
+
+
+async def _sync_item(svc: PlaidService, item_id: str) -> None:
+    from app.database import AsyncSessionLocal
+    from app.routers.ws import broadcast_to_household
+    from app.services.plaid_sync_service import sync_plaid_item
+
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(
+            text("""
+                SELECT p.access_token, p.sync_cursor, u.household_id
+                FROM plaid_items p
+                JOIN users u ON u.id = p.user_id
+                WHERE p.item_id = :iid AND u.household_id IS NOT NULL
+            """),
+            {"iid": item_id},
+        )).fetchone()
+        if row is None:
+            logger.info("Plaid webhook for unknown item %s — ignored", item_id)
+            return
+        stats = await sync_plaid_item(db, svc, item_id, row.access_token, row.sync_cursor, row.household_id)
+
+    if stats.added or stats.modified or stats.removed:
+        await broadcast_to_household(str(row.household_id), "transactions_updated", {
+            "item_id": item_id,
+            "added": stats.added,
+            "modified": stats.modified,
+            "removed": stats.removed,
+        })
+
+
+async def _debounced(svc: PlaidService, item_id: str, pending: _PendingSync) -> None:
+    try:
+        while True:
+            await asyncio.sleep(settings.PLAID_WEBHOOK_DEBOUNCE_SECONDS)
+            pending.rerun = False
+            try:
+                await _sync_item(svc, item_id)
+            except Exception as exc:
+                logger.warning("Webhook-triggered sync failed for item %s: %s", item_id, exc)
+            if not pending.rerun:
+                break
+    finally:
+        _pending.pop(item_id, None)
+
+
+def schedule_item_sync(svc: PlaidService, item_id: str) -> bool:
+    """Queue a debounced sync of `item_id`. False when it joined one already pending."""
+    pending = _pending.get(item_id)
+    if pending is not None:
+        pending.rerun = True      # a running sync goes round once more; a waiting one just absorbs this
+        return False
+    pending = _pending[item_id] = _PendingSync()
+    pending.task = asyncio.create_task(_debounced(svc, item_id, pending))
+    return True
+
+
+async def cancel_pending_syncs() -> None:
+    """Drop queued webhook syncs (app shutdown) — the scheduler's safety-net poll catches them."""
+    tasks = [p.task for p in _pending.values() if p.task]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _pending.clear()
@@ -0,0 +1,142 @@
+"""
+Product Catalog Service — crowd-sourced per-product category + shelf life.
+
+  refresh_product_catalog()  nightly job: aggregates confirmed pantry items and
+                             category overrides across households into
+                             product_catalog (one INSERT … ON CONFLICT)
+  get_catalog_snapshot()     per-worker {normalized_name: CatalogEntry} used by
+                             confirm_receipt for O(1) lookups per item
+
+A product is published once CATALOG_MIN_HOUSEHOLDS households have bought or
+categorized it:
+  • category   — the category most households chose
+  • shelf life — median (expiration_date − purchase_date) over pantry items
+                 whose expiry a user entered (expiry_source = 'user'); dates
+                 derived from this catalog or the category defaults would only
+                 echo them back.  NULL when there are no such samples —
+                 confirm_receipt then uses the category default.
+
+Rows whose category and shelf life did not change keep their updated_at, so
+MAX(updated_at) is the snapshot version: workers re-check it at most every
+CATALOG_SNAPSHOT_TTL_SECONDS and reload only when it moved.
+"""
+import asyncio
+import logging
+import time
+from typing import NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogEntry(NamedTuple):
+    category: str | None
+    shelf_life_days: int | None
+
+
+def normalize_product_name(name: str) -> str:
+    """Must match lower(trim(name)) used by the aggregation SQL."""
+    return name.strip().lower()
+
+
+# ── Aggregation job ───────────────────────────────────────────
+_REFRESH_SQL = text("""
+    WITH samples AS (
+        SELECT lower(trim(name)) AS normalized_name, household_id, category,
+               CASE WHEN expiry_source = 'user' THEN expiration_date - purchase_date END AS shelf_days
+        FROM pantry_items
+        UNION ALL
+        SELECT item_name, household_id, category, NULL
+        FROM category_overrides
+    ),
+    category_votes AS (
+        SELECT normalized_name, category, COUNT(DISTINCT household_id) AS votes
+        FROM samples
+        WHERE category IS NOT NULL AND category <> 'Uncategorized'
+        GROUP BY normalized_name, category
+    ),
+    top_category AS (
+        SELECT DISTINCT ON (normalized_name) normalized_name, category
+        FROM category_votes
+        ORDER BY normalized_name, votes DESC, category
+    ),
+    stats AS (
+        SELECT normalized_name,
+               COUNT(*) AS sample_count,
+               COUNT(DISTINCT household_id) AS household_count,
+               percentile_disc(0.5) WITHIN GROUP (ORDER BY shelf_days)
+                   FILTER (WHERE shelf_days > 0) AS shelf_days
+        FROM samples
+        WHERE normalized_name <> ''
+        GROUP BY normalized_name
+        HAVING COUNT(DISTINCT household_id) >= :min_households
+    )
+    INSERT INTO product_catalog
+        (id, name, normalized_name, default_category, avg_shelf_life_days,
+         sample_count, household_count, updated_at)
+    SELECT gen_random_uuid(), s.normalized_name, s.normalized_name, t.category, s.shelf_days,
+           s.sample_count, s.household_count, NOW()
+    FROM stats s
+    LEFT JOIN top_category t USING (normalized_name)
+    ON CONFLICT (normalized_name) DO UPDATE SET
+        default_category    = EXCLUDED.default_category,
+        avg_shelf_life_days = EXCLUDED.avg_shelf_life_days,
+        sample_count        = EXCLUDED.sample_count,
+        household_count     = EXCLUDED.household_count,
+        -- only lookup-relevant changes move the snapshot version
+        updated_at = CASE
+            WHEN (product_catalog.default_category, product_catalog.avg_shelf_life_days)
+                 IS DISTINCT FROM (EXCLUDED.default_category, EXCLUDED.avg_shelf_life_days)
+            THEN NOW() ELSE product_catalog.updated_at END
+    WHERE (product_catalog.default_category, product_catalog.avg_shelf_life_days,
+           product_catalog.sample_count, product_catalog.household_count)
+          IS DISTINCT FROM (EXCLUDED.default_category, EXCLUDED.avg_shelf_life_days,
+                            EXCLUDED.sample_count, EXCLUDED.household_count)
+""")
+
+
+async def refresh_product_catalog(db: AsyncSession) -> int:
+    """Rebuild product_catalog from all households. Returns rows inserted or changed."""
+    result = await db.execute(_REFRESH_SQL, {"min_households": settings.CATALOG_MIN_HOUSEHOLDS})
+    await db.commit()
+    logger.info("Product catalog refreshed — %d products added or changed", result.rowcount)
+    return result.rowcount
+
+
+# ── Per-worker lookup snapshot ────────────────────────────────
+_snapshot: dict[str, CatalogEntry] = {}
+_snapshot_version = None
+_snapshot_checked_at = 0.0
+_snapshot_lock = asyncio.Lock()
+
+
+async def get_catalog_snapshot(db: AsyncSession) -> dict[str, CatalogEntry]:
+    """
+    {normalized_name: CatalogEntry}.  Re-checks the catalog version at most
+    every CATALOG_SNAPSHOT_TTL_SECONDS and reloads only when it changed.
+    """
+    global _snapshot, _snapshot_version, _snapshot_checked_at
+    if time.monotonic() - _snapshot_checked_at < settings.CATALOG_SNAPSHOT_TTL_SECONDS:
+        return _snapshot
+    async with _snapshot_lock:
+        if time.monotonic() - _snapshot_checked_at < settings.CATALOG_SNAPSHOT_TTL_SECONDS:
+            return _snapshot
+        version = (await db.execute(text("SELECT MAX(updated_at) FROM product_catalog"))).scalar()
+        if version != _snapshot_version:
+            result = await db.execute(text("""
+                SELECT normalized_name, default_category, avg_shelf_life_days
+                FROM product_catalog
+                WHERE normalized_name IS NOT NULL
+            """))
+            _snapshot = {
+                row.normalized_name: CatalogEntry(row.default_category, row.avg_shelf_life_days)
+                for row in result.fetchall()
+            }
+            _snapshot_version = version
+            logger.info("Product catalog snapshot loaded (%d products)", len(_snapshot))
+        _snapshot_checked_at = time.monotonic()
+    return _snapshot
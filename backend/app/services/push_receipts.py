@@ -0,0 +1,188 @@
+"""
+Push Receipts — Expo receipt polling and dead-token pruning.
+
+An "ok" push ticket only means Expo accepted the message; whether Apple or
+Google delivered it is reported later, in the ticket's push receipt.
+
+  1. record_push_tickets (after every send): stores each ok ticket in
+     push_tickets (migration 012) and deletes tokens whose ticket already
+     says DeviceNotRegistered.
+  2. check_push_receipts (every EXPO_RECEIPT_POLL_MINUTES, main.lifespan):
+     walks pending tickets older than EXPO_RECEIPT_DELAY_MINUTES, up to 1,000
+     ids per getReceipts request, records each receipt's status and error
+     class, and deletes DeviceNotRegistered tokens.  Tickets still without a
+     receipt after a day are marked expired (Expo keeps receipts ~24 h).
+
+Pruned tokens are never sent to again, so each run only reaches live
+devices; a device that registers again simply upserts a fresh token.
+Latency is send → receipt fetched, so it is bounded below by the poll delay.
+"""
+import logging
+import statistics
+import time
+from collections import Counter
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.services.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+EXPO_RECEIPTS_URL = "https://exp.host/--/api/v2/push/getReceipts"
+_RECEIPT_BATCH = 1000                       # Expo's per-request id limit
+_DEAD_TOKEN_ERRORS = {"DeviceNotRegistered"}
+_RECEIPT_TTL_HOURS = 24
+
+_INSERT_TICKETS_SQL = text("""
+    INSERT INTO push_tickets (ticket_id, token)
+    SELECT * FROM unnest(CAST(:ids AS text[]), CAST(:tokens AS text[]))
+    ON CONFLICT (ticket_id) DO NOTHING
+""")
+
+_PRUNE_TOKENS_SQL = text("""
+    DELETE FROM push_notification_tokens WHERE token = ANY(CAST(:tokens AS text[]))
+""")
+
+_PENDING_SQL = text("""
+    SELECT ticket_id, token, EXTRACT(EPOCH FROM NOW() - sent_at) AS age_seconds
+    FROM push_tickets
+    WHERE status = 'pending'
+      AND sent_at < NOW() - make_interval(mins => :delay)
+      AND ticket_id > :after
+    ORDER BY ticket_id
+    LIMIT :batch
+""")
+
+_RECORD_RECEIPTS_SQL = text("""
+    UPDATE push_tickets t
+    SET status = r.status, error = r.error, receipt_at = NOW()
+    FROM unnest(CAST(:ids AS text[]), CAST(:statuses AS text[]), CAST(:errors AS text[]))
+         AS r(ticket_id, status, error)
+    WHERE t.ticket_id = r.ticket_id
+""")
+
+_EXPIRE_SQL = text("""
+    UPDATE push_tickets SET status = 'expired'
+    WHERE status = 'pending' AND sent_at < NOW() - make_interval(hours => :hours)
+""")
+
+_PURGE_SQL = text("""
+    DELETE FROM push_tickets WHERE sent_at < NOW() - make_interval(days => :days)
+""")
+
+
+def _ticket_error(ticket: dict) -> str:
+    return ((ticket.get("details") or {}).get("error") or "Unknown")[:50]
+
+
+async def prune_tokens(db: AsyncSession, tokens) -> int:
+    """Delete dead push tokens. Runs in the caller's transaction."""
+    tokens = sorted(set(tokens))
+    if not tokens:
+        return 0
+    result = await db.execute(_PRUNE_TOKENS_SQL, {"tokens": tokens})
+    return result.rowcount
+
+
+async def record_push_tickets(db: AsyncSession, messages: list[dict], tickets: list[dict]) -> dict:
+    """
+    Store the ok tickets of a send for receipt polling and prune tokens whose
+    ticket is already DeviceNotRegistered.  Runs in the caller's transaction.
+    """
+    ids, tokens, dead = [], [], []
+    for message, ticket in zip(messages, tickets):
+        if ticket.get("status") == "ok" and ticket.get("id"):
+            ids.append(ticket["id"])
+            tokens.append(message["to"])
+        elif _ticket_error(ticket) in _DEAD_TOKEN_ERRORS:
+            dead.append(message["to"])
+    if ids:
+        await db.execute(_INSERT_TICKETS_SQL, {"ids": ids, "tokens": tokens})
+    return {"tickets": len(ids), "pruned": await prune_tokens(db, dead)}
+
+
+async def _fetch_receipts(ids: list[str]) -> dict:
+    from app.services.notification_service import expo_headers
+    resp = await get_http_client("expo").post(EXPO_RECEIPTS_URL, json={"ids": ids}, headers=expo_headers())
+    resp.raise_for_status()
+    result = resp.json()
+    if result.get("errors"):
+        raise RuntimeError(f"Expo getReceipts error: {result['errors'][0]}")
+    return result.get("data") or {}
+
+
+async def check_push_receipts() -> dict:
+    """Fetch receipts for pending tickets, record outcomes, prune dead tokens. Returns the run summary."""
+    from app.database import AsyncSessionLocal
+
+    started = time.perf_counter()
+    checked, pruned = 0, 0
+    statuses: Counter = Counter()
+    errors: Counter = Counter()
+    latencies: list[float] = []
+    after = ""
+    while True:
+        async with AsyncSessionLocal() as db:
+            pending = (await db.execute(_PENDING_SQL, {
+                "delay": settings.EXPO_RECEIPT_DELAY_MINUTES,
+                "after": after,
+                "batch": _RECEIPT_BATCH,
+            })).fetchall()
+            if not pending:
+                break
+            after = pending[-1].ticket_id
+            try:
+                receipts = await _fetch_receipts([row.ticket_id for row in pending])
+            except Exception as exc:
+                logger.warning("Expo receipt fetch failed — retrying next run: %s", exc)
+                break
+
+            ids, row_statuses, row_errors, dead = [], [], [], []
+            for row in pending:
+                receipt = receipts.get(row.ticket_id)
+                if receipt is None:         # not ready yet
+                    continue
+                status = "ok" if receipt.get("status") == "ok" else "error"
+                error = _ticket_error(receipt) if status == "error" else None
+                ids.append(row.ticket_id)
+                row_statuses.append(status)
+                row_errors.append(error)
+                statuses[status] += 1
+                latencies.append(float(row.age_seconds))
+                if error:
+                    errors[error] += 1
+                    if error in _DEAD_TOKEN_ERRORS:
+                        dead.append(row.token)
+            if ids:
+                await db.execute(_RECORD_RECEIPTS_SQL, {"ids": ids, "statuses": row_statuses, "errors": row_errors})
+            pruned += await prune_tokens(db, dead)
+            await db.commit()
+            checked += len(pending)
+        if len(pending) < _RECEIPT_BATCH:
+            break
+
+    async with AsyncSessionLocal() as db:
+        expired = (await db.execute(_EXPIRE_SQL, {"hours": _RECEIPT_TTL_HOURS})).rowcount
+        purged = (await db.execute(_PURGE_SQL, {"days": settings.EXPO_RECEIPT_RETENTION_DAYS})).rowcount
+        await db.commit()
+
+    latencies.sort()
+    summary = {
+        "checked": checked,
+        "ok": statuses["ok"],
+        "errors": dict(errors),
+        "not_ready": checked - sum(statuses.values()),
+        "expired": expired,
+        "tokens_pruned": pruned,
+        "tickets_purged": purged,
+        "latency_p50_s": round(statistics.median(latencies), 1) if latencies else None,
+        "latency_p95_s": round(latencies[int(0.95 * (len(latencies) - 1))], 1) if latencies else None,
+        "elapsed_s": round(time.perf_counter() - started, 1),
+    }
+    if checked or expired:
+        logger.info("Expo receipts: %s", summary)
+    if "InvalidCredentials" in errors:
+        logger.error("Expo receipts report InvalidCredentials — check the project's FCM / APNs credentials")
+    return summary
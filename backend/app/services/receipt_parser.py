@@ -7,6 +7,12 @@ import re
 from datetime import date, datetime
 from decimal import Decimal
 
+from app.services.category_matcher import CategoryMatcher, get_category_matcher
+
+# Bump whenever parsing or categorization output changes — receipt_reparse.py
+# re-runs every receipt whose stored parser_version is older.
+PARSER_VERSION = 1
+
 # Known high-frequency item → category mappings
 CATEGORY_MAP = {
     "milk": "Dairy", "cheese": "Dairy", "butter": "Dairy", "yogurt": "Dairy", "cream": "Dairy",
@@ -38,31 +44,30 @@ SKIP_PATTERNS = [
     r"^\d{3}[-.\s]\d{3}[-.\s]\d{4}",  # Phone number
 ]
 
+# All skip patterns are anchored, so one alternation matches exactly like
+# trying each pattern in turn — but in a single regex pass.
+_SKIP_RE = re.compile("|".join(f"(?:{p})" for p in SKIP_PATTERNS))
 
-def _guess_category(name: str, learned: dict[str, str] | None = None) -> str:
+
+def _guess_category(
+    name: str,
+    learned: dict[str, str] | None = None,
+    matcher: CategoryMatcher | None = None,
+) -> str:
     """
     Returns a category for the item name.
     Priority: 1) household-learned override  2) built-in keyword map  3) 'Uncategorized'
     `learned` is a dict of {normalized_item_name: category} built from past confirmations.
+    Pass a precompiled `matcher` when categorizing many items (see category_matcher.py
+    for the exact precedence rules).
     """
-    lower = name.lower().strip()
-    # Check learned mappings first (exact or substring)
-    if learned:
-        if lower in learned:
-            return learned[lower]
-        for keyword, category in learned.items():
-            if keyword in lower or lower in keyword:
-                return category
-    # Fall back to built-in map
-    for keyword, category in CATEGORY_MAP.items():
-        if keyword in lower:
-            return category
-    return "Uncategorized"
+    if matcher is None:
+        matcher = get_category_matcher(learned)
+    return matcher.match(name)
 
 
 def _should_skip(line: str) -> bool:
-    l = line.strip().lower()
-    return any(re.match(p, l) for p in SKIP_PATTERNS)
+    return _SKIP_RE.match(line.strip().lower()) is not None
 
 
 def _parse_date(text: str) -> date:
@@ -103,14 +108,18 @@ def parse_receipt_text(raw_text: str, learned_mappings: dict[str, str] | None =
             break
 
     receipt_date = _parse_date(raw_text)
+    subtotal = None
 
     for line in lines:
         if _should_skip(line):
             # Check if this is the TOTAL line
-            if "total" in line.lower():
+            lower = line.lower()
+            if "total" in lower:
                 total_match = re.search(r"(\d+\.\d{2})", line)
                 if total_match:
                     total = Decimal(total_match.group(1))
+                    if lower.startswith(("subtotal", "sub-total")):
+                        subtotal = total
             continue
 
         price_match = re.search(r"(\d+\.\d{2})\s*$", line)
@@ -122,15 +131,16 @@ def parse_receipt_text(raw_text: str, learned_mappings: dict[str, str] | None =
             if not name or price > Decimal("500"):
                 continue
 
-            category = _guess_category(name, learned=learned_mappings)
             items.append({
                 "name": name,
                 "price": price,
-                "category": category,
+                "category": None,
                 "quantity": Decimal("1.0"),
                 "unit": None,
             })
 
+    _categorize_items(items, learned_mappings)
+
     # If total not found via TOTAL line, sum items
     if total == Decimal("0.00") and items:
         total = sum(i["price"] for i in items)
@@ -138,6 +148,30 @@ def parse_receipt_text(raw_text: str, learned_mappings: dict[str, str] | None =
     return {
         "merchant": merchant,
         "total": total,
+        "subtotal": subtotal,
         "date": receipt_date,
         "items": items,
     }
+
+
+def _categorize_items(items: list[dict], learned_mappings: dict[str, str] | None) -> None:
+    """
+    Fill in category + category_confidence for every item, in place.
+    Priority: 1) household-learned override (confidence 1.0)
+              2) item classifier, when at least ITEM_CLASSIFIER_MIN_CONFIDENCE
+              3) built-in keyword map / 'Uncategorized' (classifier confidence kept)
+    The classifier scores all items of the receipt in one batch.
+    """
+    from app.config import settings
+    from app.services.item_classifier import classify_items
+
+    matcher = get_category_matcher(learned_mappings)
+    predictions = classify_items([item["name"] for item in items])
+    for item, (predicted, confidence) in zip(items, predictions):
+        learned = matcher.match_learned(item["name"])
+        if learned:
+            item["category"], item["category_confidence"] = learned, 1.0
+        elif predicted and confidence >= settings.ITEM_CLASSIFIER_MIN_CONFIDENCE:
+            item["category"], item["category_confidence"] = predicted, confidence
+        else:
+            item["category"], item["category_confidence"] = matcher.match_builtin(item["name"]), confidence
@@ -0,0 +1,198 @@
+"""
+Receipt Re-parse — re-run the local parser over every stored raw_ocr_text.
+
+Usage (from backend/):
+    python -m app.services.receipt_reparse [--batch-size 2000] [--workers 4]
+        [--checkpoint reparse.checkpoint.json] [--household UUID] [--pause 0.0]
+
+Pipeline (one batch in each stage at a time):
+
+  fetch  ──► parse ──► write ──► checkpoint
+  keyset     process   one bulk     last (household_id, id)
+  query      pool      UPDATE
+
+  • fetch  — keyset pagination on (household_id, id), one short read
+             transaction per batch; the next batch is fetched while the
+             current one is parsed.  Only unconfirmed receipts (no pantry
+             items yet) whose items came from the local parser — or were
+             never parsed — and whose parser_version is older than
+             receipt_parser.PARSER_VERSION are selected; Gemini items
+             (parse_method 'gemini', migration 016) are left alone.
+  • parse  — parse_receipt_text with each household's learned mappings (and
+             the item classifier) in a ProcessPoolExecutor, workers niced
+  • write  — one UPDATE … FROM unnest(ids, items) per batch
+  • resume — the checkpoint file holds the last key written; rerunning with
+             the same file continues after it
+
+Only parsed_items / parser_version / parse_method are written — merchant,
+total and date are left alone.  Upload stores them too, so only local
+parses by an older version are revisited; parsed_items is what
+GET /api/receipts/{id} offers for review until confirm.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import text
+
+from app.database import AsyncSessionLocal, engine
+from app.services.categorization_service import get_learned_mappings
+from app.services.receipt_parser import PARSER_VERSION, parse_receipt_text
+
+logger = logging.getLogger(__name__)
+
+_ZERO_UUID = "00000000-0000-0000-0000-000000000000"
+
+
+# ── Worker process ────────────────────────────────────────────
+def _init_worker(niceness: int) -> None:
+    """Lower worker priority so API processes on the same host stay responsive."""
+    if niceness and hasattr(os, "nice"):
+        os.nice(niceness)
+
+
+def _reparse_chunk(rows: list[tuple[str, str, str]], mappings: dict) -> list[tuple[str, str]]:
+    """[(receipt_id, household_id, raw_text)] → [(receipt_id, parsed_items_json)]."""
+    out = []
+    for receipt_id, household_id, raw_text in rows:
+        parsed = parse_receipt_text(raw_text, learned_mappings=mappings.get(household_id))
+        out.append((receipt_id, json.dumps(parsed["items"], default=str)))
+    return out
+
+
+# ── Checkpoint ────────────────────────────────────────────────
+def _load_checkpoint(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if state.get("parser_version") != PARSER_VERSION:
+        logger.info("Checkpoint is for parser version %s — starting over", state.get("parser_version"))
+        return {}
+    return state
+
+
+def _save_checkpoint(path: str, state: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+# ── Database stages ───────────────────────────────────────────
+async def _fetch_batch(after: tuple[str, str], batch_size: int, household: str | None) -> list[tuple[str, str, str]]:
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text("""
+                SELECT r.id::text, r.household_id::text, r.raw_ocr_text
+                FROM receipts r
+                WHERE (r.household_id, r.id) > (CAST(:hid AS uuid), CAST(:rid AS uuid))
+                  AND (CAST(:only AS uuid) IS NULL OR r.household_id = CAST(:only AS uuid))
+                  AND r.raw_ocr_text IS NOT NULL
+                  AND r.parse_method IS DISTINCT FROM 'gemini'
+                  AND (r.parser_version IS NULL OR r.parser_version < :version)
+                  AND NOT EXISTS (SELECT 1 FROM pantry_items p WHERE p.receipt_id = r.id)
+                ORDER BY r.household_id, r.id
+                LIMIT :limit
+            """),
+            {"hid": after[0], "rid": after[1], "only": household, "version": PARSER_VERSION, "limit": batch_size},
+        )
+        return [(r[0], r[1], r[2]) for r in result.fetchall()]
+
+
+async def _load_mappings(household_ids: set[str]) -> dict:
+    # get_learned_mappings is cached per household version, so consecutive
+    # batches of the same household reuse one LearnedMappings object
+    async with AsyncSessionLocal() as db:
+        return {hid: await get_learned_mappings(db, hid) for hid in household_ids}
+
+
+async def _write_batch(results: list[tuple[str, str]]) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("""
+                UPDATE receipts r
+                SET parsed_items = CAST(u.items AS jsonb), parser_version = :version, parse_method = 'local'
+                FROM unnest(CAST(:ids AS uuid[]), CAST(:items AS text[])) AS u(id, items)
+                WHERE r.id = u.id
+            """),
+            {"ids": [r[0] for r in results], "items": [r[1] for r in results], "version": PARSER_VERSION},
+        )
+
+
+# ── Driver ────────────────────────────────────────────────────
+async def reparse_all(
+    batch_size: int = 2000,
+    workers: int | None = None,
+    checkpoint: str = "reparse.checkpoint.json",
+    household: str | None = None,
+    pause: float = 0.0,
+    niceness: int = 10,
+) -> int:
+    """Re-parse every outdated receipt. Returns the number of receipts written."""
+    state = _load_checkpoint(checkpoint)
+    after = tuple(state.get("after") or (_ZERO_UUID, _ZERO_UUID))
+    done = state.get("processed", 0)
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    loop = asyncio.get_running_loop()
+    started = time.monotonic()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(niceness,)) as pool:
+        next_batch = asyncio.create_task(_fetch_batch(after, batch_size, household))
+        while True:
+            rows = await next_batch
+            if not rows:
+                break
+            after = (rows[-1][1], rows[-1][0])
+            next_batch = asyncio.create_task(_fetch_batch(after, batch_size, household))
+
+            mappings = await _load_mappings({r[1] for r in rows})
+            chunk = -(-len(rows) // workers)
+            parts = await asyncio.gather(*(
+                loop.run_in_executor(
+                    pool, _reparse_chunk, part,
+                    {hid: mappings[hid] for hid in {r[1] for r in part}},
+                )
+                for part in (rows[i:i + chunk] for i in range(0, len(rows), chunk))
+            ))
+            await _write_batch([r for part in parts for r in part])
+
+            done += len(rows)
+            _save_checkpoint(checkpoint, {"parser_version": PARSER_VERSION, "after": after, "processed": done})
+            elapsed = time.monotonic() - started
+            logger.info("Re-parsed %d receipts (%.0f/s)", done, done / elapsed if elapsed else 0)
+            if pause:
+                await asyncio.sleep(pause)
+
+    logger.info("Re-parse complete — %d receipts at parser version %d", done, PARSER_VERSION)
+    return done
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: cores - 1)")
+    parser.add_argument("--checkpoint", default="reparse.checkpoint.json")
+    parser.add_argument("--household", default=None, help="only this household's receipts")
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between batches")
+    parser.add_argument("--nice", type=int, default=10, help="niceness added to parser processes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    async def _run():
+        try:
+            await reparse_all(args.batch_size, args.workers, args.checkpoint, args.household, args.pause, args.nice)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,9 @@ Matches pantry items against a curated recipe database.
 Falls back to keyword matching when no external API is configured.
 Optionally integrates with Spoonacular API if SPOONACULAR_API_KEY is set.
 """
-import httpx
 from typing import Optional
 from app.config import settings
+from app.services.http_client import get_http_client
 
 # ---------------------------------------------------------------------------
 # Built-in recipe database (keyword → recipe)
@@ -225,40 +225,40 @@ async def suggest_recipes_spoonacular(
 
     ingredients = ",".join(pantry_item_names[:20])  # API max
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(
-                "https://api.spoonacular.com/recipes/findByIngredients",
-                params={
-                    "ingredients": ingredients,
-                    "number": limit,
-                    "ranking": 2,  # Minimize missing ingredients
-                    "ignorePantry": True,
-                    "apiKey": key,
-                },
-            )
-            if resp.status_code != 200:
-                return suggest_recipes(pantry_item_names, limit)
+        client = get_http_client("spoonacular")
+        resp = await client.get(
+            "https://api.spoonacular.com/recipes/findByIngredients",
+            params={
+                "ingredients": ingredients,
+                "number": limit,
+                "ranking": 2,  # Minimize missing ingredients
+                "ignorePantry": True,
+                "apiKey": key,
+            },
+        )
+        if resp.status_code != 200:
+            return suggest_recipes(pantry_item_names, limit)
 
-            data = resp.json()
-            results = []
-            for item in data:
-                used = [u["originalName"] for u in item.get("usedIngredients", [])]
-                missed = [m["originalName"] for m in item.get("missedIngredients", [])]
-                total = len(used) + len(missed)
-                score = len(used) / total if total else 0
-                results.append({
-                    "id": item["id"],
-                    "name": item["title"],
-                    "image_url": item.get("image"),
-                    "time_minutes": None,
-                    "ingredients": used + missed,
-                    "instructions": f"https://spoonacular.com/recipes/{item['title'].lower().replace(' ', '-')}-{item['id']}",
-                    "matched_count": len(used),
-                    "missing": missed,
-                    "match_score": round(score * 100, 1),
-                    "source": "spoonacular",
-                })
-            return results
+        data = resp.json()
+        results = []
+        for item in data:
+            used = [u["originalName"] for u in item.get("usedIngredients", [])]
+            missed = [m["originalName"] for m in item.get("missedIngredients", [])]
+            total = len(used) + len(missed)
+            score = len(used) / total if total else 0
+            results.append({
+                "id": item["id"],
+                "name": item["title"],
+                "image_url": item.get("image"),
+                "time_minutes": None,
+                "ingredients": used + missed,
+                "instructions": f"https://spoonacular.com/recipes/{item['title'].lower().replace(' ', '-')}-{item['id']}",
+                "matched_count": len(used),
+                "missing": missed,
+                "match_score": round(score * 100, 1),
+                "source": "spoonacular",
+            })
+        return results
     except Exception:
         return suggest_recipes(pantry_item_names, limit)
 
@@ -0,0 +1,314 @@
+"""
+Statement Layout Parser — rebuilds bank statement rows from PDF tables and
+word positions, validated against the running balance.
+
+The regex parser (bank_parser._parse_transactions) sees one line of text at a
+time, so wrapped descriptions and separate debit / credit columns defeat it.
+This parser works on the layout document_extraction captured per page:
+
+  1. tables — pdfplumber's ruled tables, when the statement draws them
+  2. words  — otherwise, words grouped into lines by y position and assigned
+              to columns by the x extent of the header row
+              ("Date  Description  Withdrawals  Deposits  Balance")
+
+A row starts at a line whose date cell parses; following lines without a date
+continue its description.  Debit cells become negative amounts, credit cells
+positive, a single amount column keeps its sign.  Column maps carry over to
+later pages that do not repeat the header.
+
+Confidence: with a balance column, every printed balance is checked against
+the previous one plus the amounts in between (in either chronological
+direction — some banks list newest first); confidence is the share that
+reconciles.  Without balances the layout alone is worth NO_BALANCE_CONFIDENCE,
+below the Gemini-skip threshold.
+"""
+from datetime import datetime
+from decimal import Decimal
+import re
+
+from app.services.bank_parser import _is_header_or_noise, _parse_amount, _parse_tx_date
+from app.services.document_extraction import DocumentPage, ExtractedDocument
+
+NO_BALANCE_CONFIDENCE = 0.6
+_MIN_CHECKS = 3                  # fewer reconciled balances than this → capped at NO_BALANCE_CONFIDENCE
+_TOLERANCE = Decimal("0.01")
+
+# Checked in order — "Transaction Date" is a date column, "Balance Amount" a balance
+_COLUMN_ALIASES = (
+    ("balance", ("balance",)),
+    ("debit", ("debit", "withdrawal", "paid out", "charges")),
+    ("credit", ("credit", "deposit", "paid in", "payments")),
+    ("amount", ("amount",)),
+    ("date", ("date", "posted")),
+    ("description", ("description", "details", "transaction", "memo", "payee", "particulars")),
+)
+_MONEY_KINDS = ("debit", "credit", "amount", "balance")
+_AMOUNT_RE = re.compile(r"^-?\(?\$?[\d,]+\.\d{2}\)?-?(?:CR|DR)?$", re.IGNORECASE)
+_OPENING_RE = re.compile(r"^(beginning|opening|previous|starting) balance", re.IGNORECASE)
+_CLOSING_RE = re.compile(r"^(ending|closing|new) balance|^total", re.IGNORECASE)
+
+
+class StatementLayout:
+    """Result of parse_statement_layout()."""
+
+    __slots__ = ("transactions", "confidence", "method", "checked", "reconciled",
+                 "opening_balance", "closing_balance")
+
+    def __init__(self):
+        self.transactions: list[dict] = []
+        self.confidence = 0.0
+        self.method: str | None = None       # "table" | "words"
+        self.checked = 0                     # balances checked
+        self.reconciled = 0                  # ... of which matched
+        self.opening_balance: Decimal | None = None
+        self.closing_balance: Decimal | None = None
+
+
+class _Row:
+    __slots__ = ("date", "description", "money", "raw")
+
+    def __init__(self, tx_date, description: list[str], money: dict[str, str], raw: list[str]):
+        self.date = tx_date
+        self.description = description
+        self.money = money
+        self.raw = raw
+
+
+# ── Cells ─────────────────────────────────────────────────────
+def _column_kind(label: str) -> str | None:
+    lower = " ".join(label.lower().split())
+    if not lower:
+        return None
+    for kind, aliases in _COLUMN_ALIASES:
+        if any(alias in lower for alias in aliases):
+            return kind
+    return None
+
+
+def _is_header(kinds: list[str | None]) -> bool:
+    return "date" in kinds and any(k in kinds for k in ("debit", "credit", "amount"))
+
+
+def _parse_date_cell(raw: str):
+    raw = " ".join(raw.replace(",", " ").split())
+    parsed = _parse_tx_date(raw)
+    if parsed or not raw:
+        return parsed
+    for fmt, has_year in (("%b %d %Y", True), ("%d %b %Y", True), ("%b %d", False), ("%d %b", False)):
+        try:
+            value = datetime.strptime(raw, fmt)
+        except ValueError:
+            continue
+        return (value if has_year else value.replace(year=datetime.now().year)).date()
+    return None
+
+
+def _money(raw: str) -> Decimal | None:
+    raw = raw.replace(" ", "")
+    if not raw or not _AMOUNT_RE.match(raw):
+        return None
+    upper = raw.upper()
+    negative = upper.endswith("-") or upper.endswith("DR")
+    value = _parse_amount(upper.rstrip("-").removesuffix("CR").removesuffix("DR"))
+    return -abs(value) if negative else value
+
+
+def _row_amount(money: dict[str, str]) -> Decimal | None:
+    debit, credit = _money(money.get("debit", "")), _money(money.get("credit", ""))
+    if debit is not None or credit is not None:
+        return (credit or Decimal("0")) - abs(debit or Decimal("0"))
+    return _money(money.get("amount", ""))
+
+
+# ── Table mode ────────────────────────────────────────────────
+def _rows_from_tables(page: DocumentPage, columns: list[str | None] | None):
+    """([(cells_by_kind, raw_line), ...], column map to carry to the next page)."""
+    events = []
+    for table in page.tables:
+        table_columns = columns if columns and len(columns) == len(table[0]) else None
+        for cells in table:
+            cells = [" ".join((c or "").split()) for c in cells]
+            kinds = [_column_kind(c) for c in cells]
+            if _is_header(kinds):
+                table_columns = kinds
+                continue
+            if table_columns is None:
+                continue
+            by_kind: dict[str, str] = {}
+            for kind, cell in zip(table_columns, cells):
+                if kind and cell:
+                    by_kind[kind] = f"{by_kind[kind]} {cell}" if kind in by_kind else cell
+            events.append((by_kind, " | ".join(c for c in cells if c)))
+        columns = table_columns or columns
+    return events, columns
+
+
+# ── Word mode ─────────────────────────────────────────────────
+def _group_lines(words) -> list[list[tuple]]:
+    lines: list[list[tuple]] = []
+    for word in sorted(words, key=lambda w: (w[2], w[0])):
+        if lines and abs(word[2] - lines[-1][0][2]) <= max(2.0, (word[3] - word[2]) * 0.4):
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+    return [sorted(line, key=lambda w: w[0]) for line in lines]
+
+
+def _header_cells(line: list[tuple]) -> list[tuple[str, float, float]]:
+    """Merge header words separated by about one space into labelled cells: [(kind, x0, x1)]."""
+    cells: list[list] = []
+    for x0, x1, top, bottom, text in line:
+        gap_limit = (bottom - top) * 0.8
+        if cells and x0 - cells[-1][2] <= gap_limit:
+            cells[-1][0] += f" {text}"
+            cells[-1][2] = x1
+        else:
+            cells.append([text, x0, x1])
+    return [(kind, x0, x1) for label, x0, x1 in cells if (kind := _column_kind(label))]
+
+
+def _line_cells(line: list[tuple], columns: list[tuple[str, float, float]]) -> tuple[dict[str, str], str]:
+    """One line of words → (cells_by_kind, raw_line), using column x extents."""
+    money_cols = [c for c in columns if c[0] in _MONEY_KINDS]
+    money_start = min(x0 for _, x0, _ in money_cols) - 20
+    first_col = min((c for c in columns if c[0] != "date"), key=lambda c: c[1])
+
+    by_kind: dict[str, str] = {}
+    date_words, desc_words = [], []
+    for x0, x1, top, bottom, text in line:
+        if x1 > money_start and _money(text) is not None:
+            center = (x0 + x1) / 2
+            kind = min(money_cols, key=lambda c: abs((c[1] + c[2]) / 2 - center))[0]
+            by_kind[kind] = text
+        elif x1 <= first_col[1] - 2 and not desc_words:
+            date_words.append(text)
+        else:
+            desc_words.append(text)
+    if date_words:
+        by_kind["date"] = " ".join(date_words)
+    if desc_words:
+        by_kind["description"] = " ".join(desc_words)
+    return by_kind, " ".join(w[4] for w in line)
+
+
+def _rows_from_words(page: DocumentPage, columns: list[tuple[str, float, float]] | None):
+    events = []
+    for line in _group_lines(page.words):
+        header = _header_cells(line)
+        if _is_header([k for k, _, _ in header]):
+            columns = header
+            continue
+        if columns:
+            events.append(_line_cells(line, columns))
+    return events, columns
+
+
+# ── Row assembly + balance check ──────────────────────────────
+def _assemble(events, layout: StatementLayout, parse_date=_parse_date_cell) -> list[_Row]:
+    rows: list[_Row] = []
+    current: _Row | None = None
+    for cells, raw in events:
+        description = cells.get("description", "")
+        tx_date = parse_date(cells["date"]) if cells.get("date") else None
+        if tx_date is None and cells.get("date") and not description:
+            description = cells["date"]          # date column text that is not a date
+        if _OPENING_RE.match(description):
+            balance = _money(cells.get("balance", "")) or _row_amount(cells)
+            if balance is not None and layout.opening_balance is None and not rows:
+                layout.opening_balance = balance
+            current = None
+            continue
+        if _CLOSING_RE.match(description) or (description and _is_header_or_noise(description)):
+            balance = _money(cells.get("balance", "")) or _row_amount(cells)
+            if _CLOSING_RE.match(description) and balance is not None:
+                layout.closing_balance = balance
+            current = None
+            continue
+        money = {k: v for k, v in cells.items() if k in _MONEY_KINDS}
+        if tx_date is not None:
+            current = _Row(tx_date, [description] if description else [], money, [raw])
+            rows.append(current)
+        elif current is not None:
+            # continuation: wrapped description and/or amounts printed on the next line
+            if description:
+                current.description.append(description)
+            for kind, value in money.items():
+                current.money.setdefault(kind, value)
+            current.raw.append(raw)
+    return rows
+
+
+def _reconcile(amounts: list[Decimal], balances: list[Decimal | None], opening: Decimal | None) -> tuple[int, int]:
+    checked = ok = 0
+    last, pending = opening, Decimal("0")
+    for amount, balance in zip(amounts, balances):
+        pending += amount
+        if balance is None:
+            continue
+        if last is not None:
+            checked += 1
+            ok += abs(last + pending - balance) <= _TOLERANCE
+        last, pending = balance, Decimal("0")
+    return checked, ok
+
+
+def _score(layout: StatementLayout, rows: list[_Row], invert: bool = False) -> None:
+    """`invert`: the amount column prints debits positive (e.g. card statements)."""
+    kept = [(row, -amount if invert else amount) for row in rows if (amount := _row_amount(row.money)) is not None]
+    amounts = [a for _, a in kept]
+    balances = [_money(row.money.get("balance", "")) for row, _ in kept]
+    forward = _reconcile(amounts, balances, layout.opening_balance)
+    backward = _reconcile(amounts[::-1], balances[::-1], None)
+    layout.checked, layout.reconciled = max(forward, backward, key=lambda r: (r[1], -r[0]))
+
+    layout.transactions = [
+        {
+            "date": row.date,
+            "description": " ".join(row.description).strip(),
+            "amount": float(amount),
+            "raw_line": " / ".join(row.raw),
+            "balance": float(balance) if balance is not None else None,
+        }
+        for (row, amount), balance in zip(kept, balances)
+        if row.description
+    ]
+    if not layout.transactions:
+        layout.confidence = 0.0
+    elif layout.checked:
+        layout.confidence = layout.reconciled / layout.checked
+        if layout.checked < min(_MIN_CHECKS, len(kept)):
+            layout.confidence = min(layout.confidence, NO_BALANCE_CONFIDENCE)
+        # rows dropped for a missing description lower the score too
+        layout.confidence *= len(layout.transactions) / len(kept)
+    else:
+        layout.confidence = NO_BALANCE_CONFIDENCE
+
+
+def parse_statement_layout(document: ExtractedDocument) -> StatementLayout:
+    """
+    Rebuild transactions from the document's tables (preferred) or word
+    positions.  Returns an empty, zero-confidence layout for documents without
+    layout data (OCR / text) or without a recognisable header row.
+    """
+    layout = StatementLayout()
+    if document.source != "pdf_text":
+        return layout
+
+    table_events, word_events = [], []
+    table_columns = word_columns = None
+    for page in document.pages:
+        events, table_columns = _rows_from_tables(page, table_columns)
+        table_events.extend(events)
+        events, word_columns = _rows_from_words(page, word_columns)
+        word_events.extend(events)
+
+    best: StatementLayout | None = None
+    for method, events in (("table", table_events), ("words", word_events)):
+        if not events:
+            continue
+        candidate = StatementLayout()
+        candidate.method = method
+        _score(candidate, _assemble(events, candidate))
+        if best is None or (candidate.confidence, len(candidate.transactions)) > (best.confidence, len(best.transactions)):
+            best = candidate
+    return best or layout
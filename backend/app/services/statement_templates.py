@@ -0,0 +1,369 @@
+"""
+Statement Templates — learn each bank's statement layout once, parse locally after.
+
+A bank's statement layout does not change between customers or months, so
+after one statement has been structured by Gemini the next one should not be.
+
+  induce_template()   from a digital PDF + the transactions Gemini returned:
+                      locate every transaction line in the page words and
+                      learn the column x-ranges (date, description, debit /
+                      credit / amount, balance), the date format, the sign
+                      convention and the header / footer noise lines.  The
+                      template is kept only if it re-parses the same document
+                      to the same transactions.
+  apply_template()    parse a document with a template — pure word geometry,
+                      milliseconds per statement.  The result is trusted only
+                      if it reconciles: against the running balance, or for
+                      layouts without one, opening + transactions = closing
+
+Templates are keyed by a layout fingerprint: the signature of the column
+header line (normalized words + bucketed x positions).  At lookup time every
+header-like line on the first pages is a candidate, so one query finds the
+template whatever the bank calls its columns.  Noise lines are stored as
+hashes of their digit-normalized text — templates are shared across
+households and hold no statement text.
+
+Stored in statement_templates (migration 008).  Lookups and writes are
+best-effort: any failure just means Gemini runs as before.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from collections import Counter
+from datetime import date, datetime
+from decimal import Decimal
+
+from app.config import settings
+from app.services.document_extraction import ExtractedDocument
+from app.services.statement_layout_parser import (
+    StatementLayout, _CLOSING_RE, _MONEY_KINDS, _OPENING_RE, _assemble, _group_lines, _line_cells, _money, _score,
+)
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_VERSION = 1
+_SIG_BUCKET = 12.0              # pt — header x positions are bucketed so jitter keeps the signature
+_CANDIDATE_PAGES = 2
+_MIN_MATCHED_SHARE = 0.9        # of Gemini's transactions located in the words
+_MIN_AGREEMENT = 0.95           # template re-parse vs Gemini, by amount
+_DATE_FORMATS = (
+    "%m/%d/%Y", "%m/%d/%y", "%m/%d", "%d/%m/%Y", "%d/%m/%y", "%d/%m",
+    "%Y-%m-%d", "%m-%d-%Y", "%d.%m.%Y", "%d.%m",
+    "%b %d %Y", "%d %b %Y", "%b %d", "%d %b",
+)
+_DIGITS_RE = re.compile(r"\d")
+
+
+# ── Signatures ────────────────────────────────────────────────
+def _normalize(text: str) -> str:
+    return _DIGITS_RE.sub("#", text.lower())
+
+
+def _line_signature(line: list[tuple]) -> str:
+    key = "|".join(f"{_normalize(w[4])}@{int(w[0] // _SIG_BUCKET)}" for w in line)
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def _noise_key(line: list[tuple]) -> str:
+    return hashlib.md5(" ".join(_normalize(w[4]) for w in line).encode()).hexdigest()[:16]
+
+
+def _could_be_header(line: list[tuple]) -> bool:
+    return len(line) >= 2 and not any(_money(w[4]) is not None for w in line)
+
+
+def candidate_fingerprints(document: ExtractedDocument) -> list[str]:
+    """Signatures of every header-like line on the first pages."""
+    seen: dict[str, None] = {}
+    for page in document.pages[:_CANDIDATE_PAGES]:
+        for line in _group_lines(page.words):
+            if _could_be_header(line):
+                seen.setdefault(_line_signature(line))
+    return list(seen)
+
+
+# ── Dates ─────────────────────────────────────────────────────
+def _parse_with_format(raw: str, fmt: str) -> date | None:
+    try:
+        value = datetime.strptime(" ".join(raw.replace(",", " ").split()), fmt)
+    except ValueError:
+        return None
+    if "%Y" not in fmt and "%y" not in fmt:
+        value = value.replace(year=datetime.now().year)
+    return value.date()
+
+
+def _date_formats_for(words: list[str], target: date) -> list[tuple[int, str]]:
+    """[(words used, format)] reading the line's leading words as `target`."""
+    out = []
+    for n in (1, 2, 3):
+        raw = " ".join(words[:n])
+        for fmt in _DATE_FORMATS:
+            parsed = _parse_with_format(raw, fmt)
+            if parsed and (parsed.month, parsed.day) == (target.month, target.day):
+                out.append((n, fmt))
+    return out
+
+
+def _starts_with_date(words: list[str]) -> bool:
+    return any(
+        _parse_with_format(" ".join(words[:n]), fmt) for n in (1, 2, 3) for fmt in _DATE_FORMATS
+    )
+
+
+# ── Induction ─────────────────────────────────────────────────
+def _span(spans: list[tuple[float, float]], pad: float = 4.0) -> list[float]:
+    return [round(min(a for a, _ in spans) - pad, 1), round(max(b for _, b in spans) + pad, 1)]
+
+
+def _gemini_date(tx: dict) -> date | None:
+    value = tx.get("date")
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value), "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def induce_template(document: ExtractedDocument, transactions: list[dict]) -> tuple[str, dict] | None:
+    """(fingerprint, template) learned from Gemini's transactions, or None when the layout does not fit."""
+    targets = [(d, round(abs(float(tx.get("amount") or 0)), 2), float(tx.get("amount") or 0),
+                str(tx.get("description") or "").lower())
+               for tx in transactions if (d := _gemini_date(tx))]
+    if document.source != "pdf_text" or len(targets) < 3:
+        return None
+
+    header = None
+    date_spans, desc_spans, formats = [], [], Counter()
+    money_hits: list[tuple[float, float, float, float]] = []   # (x0, x1, printed value, gemini amount)
+    balance_spans: list[tuple[float, float]] = []
+    noise: set[str] = set()
+    prev_candidate = None
+    matched = 0
+    t = 0
+    last_matched_desc: str | None = None
+
+    for page in document.pages:
+        for line in _group_lines(page.words):
+            texts = [w[4] for w in line]
+            hit = None
+            for ahead in range(t, min(t + 3, len(targets))):
+                tx_date, abs_amount, amount, _ = targets[ahead]
+                date_options = _date_formats_for(texts, tx_date)
+                money = [(i, _money(w[4])) for i, w in enumerate(line)]
+                amount_idx = next((i for i, m in money if m is not None and round(abs(float(m)), 2) == abs_amount), None)
+                if date_options and amount_idx is not None:
+                    hit = (ahead, date_options, amount_idx, money)
+                    break
+            if hit is None:
+                if last_matched_desc is not None and _could_be_header(line) and any(
+                    w[4].lower() in last_matched_desc for w in line
+                ):
+                    desc_spans.append((line[0][0], line[-1][1]))    # wrapped description
+                    continue
+                last_matched_desc = None
+                if _could_be_header(line):
+                    prev_candidate = line
+                summary = " ".join(texts)
+                if header is not None and not _starts_with_date(texts) and not (
+                    _OPENING_RE.match(summary) or _CLOSING_RE.match(summary)
+                ):
+                    noise.add(_noise_key(line))
+                continue
+
+            ahead, date_options, amount_idx, money = hit
+            if header is None:
+                if prev_candidate is None:
+                    return None
+                header = prev_candidate
+            matched += 1
+            t = ahead + 1
+            n_date = min(n for n, _ in date_options)
+            formats.update(fmt for n, fmt in date_options if n == n_date)
+            date_spans.append((line[0][0], line[n_date - 1][1]))
+            word = line[amount_idx]
+            money_hits.append((word[0], word[1], float(money[amount_idx][1]), targets[ahead][2]))
+            for i, value in money:
+                if value is not None and i > amount_idx:
+                    balance_spans.append((line[i][0], line[i][1]))
+            desc_words = [w for i, w in enumerate(line) if n_date <= i < amount_idx and money[i][1] is None]
+            if desc_words:
+                desc_spans.append((desc_words[0][0], desc_words[-1][1]))
+            last_matched_desc = targets[ahead][3]
+
+    if header is None or matched < max(3, _MIN_MATCHED_SHARE * len(targets)) or not desc_spans:
+        return None
+    noise.discard(_noise_key(header))
+
+    # Amount columns and sign convention
+    columns: dict[str, list[float]] = {}
+    debits = [(x0, x1) for x0, x1, printed, amount in money_hits if amount < 0]
+    credits = [(x0, x1) for x0, x1, printed, amount in money_hits if amount > 0]
+    if debits and credits and (_span(debits)[1] < _span(credits)[0] or _span(credits)[1] < _span(debits)[0]):
+        columns["debit"], columns["credit"] = _span(debits), _span(credits)
+        sign = "columns"
+    else:
+        columns["amount"] = _span([(x0, x1) for x0, x1, _, _ in money_hits])
+        agree = sum((printed < 0) == (amount < 0) for _, _, printed, amount in money_hits)
+        if agree == len(money_hits):
+            sign = "signed"
+        elif agree == 0:
+            sign = "inverted"
+        else:
+            return None        # unsigned amounts with no column split — sign is not in the layout
+    if balance_spans and len(balance_spans) >= matched // 2:
+        columns["balance"] = _span(balance_spans)
+
+    template = {
+        "version": TEMPLATE_VERSION,
+        "date_x": _span(date_spans),
+        "description_x": _span(desc_spans),
+        "columns": columns,
+        "date_format": formats.most_common(1)[0][0],
+        "sign": sign,
+        "noise": sorted(noise),
+    }
+    fingerprint = _line_signature(header)
+    template["header"] = fingerprint
+
+    # Keep only templates that reproduce what Gemini returned
+    reparsed = apply_template(document, template)
+    expected = Counter(round(a, 2) for _, _, a, _ in targets)
+    got = Counter(round(tx["amount"], 2) for tx in reparsed.transactions)
+    agreement = sum((expected & got).values()) / max(len(targets), len(reparsed.transactions))
+    if agreement < _MIN_AGREEMENT:
+        logger.info("Statement template rejected — re-parse agreement %.2f", agreement)
+        return None
+    if reparsed.confidence < settings.BANK_LAYOUT_MIN_CONFIDENCE:
+        # it could never be trusted on a later statement either
+        logger.info("Statement template rejected — re-parse does not reconcile (%.2f)", reparsed.confidence)
+        return None
+    return fingerprint, template
+
+
+# ── Parsing ───────────────────────────────────────────────────
+def apply_template(document: ExtractedDocument, template: dict) -> StatementLayout:
+    layout = StatementLayout()
+    layout.method = "template"
+    columns = [("date", *template["date_x"]), ("description", *template["description_x"])]
+    columns += [(kind, *span) for kind, span in template["columns"].items() if kind in _MONEY_KINDS]
+    noise = set(template["noise"])
+    fmt = template["date_format"]
+
+    events = []
+    for page in document.pages:
+        lines = _group_lines(page.words)
+        start = next((i + 1 for i, line in enumerate(lines) if _line_signature(line) == template["header"]), 0)
+        for line in lines[start:]:
+            if _noise_key(line) not in noise:
+                events.append(_line_cells(line, columns))
+
+    rows = _assemble(events, layout, parse_date=lambda raw: _parse_with_format(raw, fmt))
+    _score(layout, rows, invert=template["sign"] == "inverted")
+    if layout.transactions and not layout.checked:
+        # no balance column: trust the rows only if they add up to the statement's own totals
+        layout.confidence = 1.0 if _totals_reconcile(layout) else 0.0
+    return layout
+
+
+def _totals_reconcile(layout: StatementLayout) -> bool:
+    """Opening balance + transactions == closing balance, both printed on the statement."""
+    if layout.opening_balance is None or layout.closing_balance is None:
+        return False
+    total = sum(Decimal(str(tx["amount"])) for tx in layout.transactions)
+    return abs(layout.opening_balance + total - layout.closing_balance) <= Decimal("0.01")
+
+
+# ── Storage ───────────────────────────────────────────────────
+async def parse_with_stored_template(document: ExtractedDocument) -> tuple[str, str | None, StatementLayout] | None:
+    """(fingerprint, bank_name, layout) for the stored template matching this document, if any."""
+    if not settings.STATEMENT_TEMPLATES or document.source != "pdf_text":
+        return None
+    fingerprints = candidate_fingerprints(document)
+    if not fingerprints:
+        return None
+    try:
+        from sqlalchemy import text
+        from app.database import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as session:
+            row = (await session.execute(
+                text("""
+                    SELECT fingerprint, bank_name, template FROM statement_templates
+                    WHERE fingerprint = ANY(:fps)
+                    ORDER BY hits DESC
+                    LIMIT 1
+                """),
+                {"fps": fingerprints},
+            )).first()
+    except Exception as exc:
+        logger.warning("Statement template lookup failed: %s", exc)
+        return None
+    if row is None:
+        return None
+    template = row.template if isinstance(row.template, dict) else json.loads(row.template)
+    if template.get("version") != TEMPLATE_VERSION:
+        return None
+    layout = await asyncio.to_thread(apply_template, document, template)
+    return row.fingerprint, row.bank_name, layout
+
+
+async def record_template_use(fingerprint: str, success: bool) -> None:
+    try:
+        from sqlalchemy import text
+        from app.database import AsyncSessionLocal
+
+        column = "hits" if success else "misses"
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                text(f"UPDATE statement_templates SET {column} = {column} + 1 WHERE fingerprint = :fp"),
+                {"fp": fingerprint},
+            )
+            await session.commit()
+    except Exception as exc:
+        logger.warning("Statement template stats update failed: %s", exc)
+
+
+async def learn_template(document: ExtractedDocument, result: dict) -> bool:
+    """
+    Induce a template from a Gemini result and store it. An existing template
+    for the fingerprint is replaced only once its misses outnumber its hits.
+    Best-effort; True when stored.
+    """
+    if not settings.STATEMENT_TEMPLATES or document.source != "pdf_text":
+        return False
+    learned = await asyncio.to_thread(induce_template, document, result.get("transactions") or [])
+    if learned is None:
+        return False
+    fingerprint, template = learned
+    try:
+        from sqlalchemy import text
+        from app.database import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as session:
+            stored = (await session.execute(
+                text("""
+                    INSERT INTO statement_templates (id, fingerprint, bank_name, template)
+                    VALUES (gen_random_uuid(), :fp, :bank, CAST(:template AS jsonb))
+                    ON CONFLICT (fingerprint) DO UPDATE SET
+                        bank_name  = EXCLUDED.bank_name,
+                        template   = EXCLUDED.template,
+                        hits       = 0,
+                        misses     = 0,
+                        updated_at = NOW()
+                    -- only replace a stored template that fails more often than it works
+                    WHERE statement_templates.misses > statement_templates.hits
+                """),
+                {"fp": fingerprint, "bank": result.get("bank_name"), "template": json.dumps(template)},
+            )).rowcount
+            await session.commit()
+    except Exception as exc:
+        logger.warning("Statement template save failed: %s", exc)
+        return False
+    if not stored:
+        return False          # a working template already holds this fingerprint
+    logger.info("Learned statement template %s (%s)", fingerprint[:8], result.get("bank_name") or "unknown bank")
+    return True
@@ -0,0 +1,219 @@
+"""
+Transaction Ingest — bulk import of bank transactions (statements + Plaid).
+
+Every source ends here.  Records arrive as an iterable of ParsedTransaction —
+for CSV a generator reading the file — and are pulled BANK_IMPORT_CHUNK_SIZE
+at a time in a worker thread, so parsing never blocks the event loop and only
+one chunk is in memory at once.
+
+Each chunk takes two round trips:
+
+  1. binary COPY (asyncpg copy_records_to_table) into a per-transaction temp
+     table, bank_tx_staging (ON COMMIT DROP)
+  2. one merge statement that, in SQL:
+       • fingerprints statement rows — md5(date|lower(trim(description))|amount)
+       • flags subscriptions (strpos against the keyword array)
+       • fills missing categories from BANK_CATEGORY_KEYWORDS (whole words)
+       • drops in-batch repeats (DISTINCT ON) and existing rows (ON CONFLICT
+         DO NOTHING on the fingerprint / plaid_transaction_id unique indexes)
+       • RETURNING the new rows, so duplicates = staged − inserted
+
+The merge drains the staging table as it reads it (DELETE … RETURNING), so
+it is empty for the next chunk.  Runs inside the caller's transaction; the
+caller commits.
+"""
+import asyncio
+import re
+import time
+from datetime import date
+from decimal import Decimal
+from itertools import islice
+from typing import Iterable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.services.bank_parser import ParsedTransaction
+
+DEFAULT_SUBSCRIPTIONS = [
+    "NETFLIX", "SPOTIFY", "HULU", "DISNEY+", "HBO", "AMAZON PRIME",
+    "APPLE.COM", "GOOGLE ONE", "MICROSOFT", "GYM", "PLANET FITNESS",
+    "CRUNCH", "DROPBOX", "ADOBE", "ZOOM", "SLACK",
+]
+
+# Description keyword → category, used only when the source gave no category
+# (CSV / regex PDF).  Keywords match whole words of the description (letters,
+# digits and & — anything else separates words), so FEE never matches inside
+# COFFEE nor ATM inside TREATMENT.  First match in list order wins: merchant
+# names come before the generic words, so "STARBUCKS CAFE FEE" is Dining.
+BANK_CATEGORY_KEYWORDS = [
+    # Merchants
+    ("NETFLIX", "Subscriptions"), ("SPOTIFY", "Subscriptions"), ("HULU", "Subscriptions"),
+    ("WALMART", "Groceries"), ("KROGER", "Groceries"), ("SAFEWAY", "Groceries"),
+    ("WHOLE FOODS", "Groceries"), ("TRADER JOE", "Groceries"), ("ALDI", "Groceries"),
+    ("COSTCO", "Groceries"),
+    ("STARBUCKS", "Dining"), ("MCDONALD", "Dining"), ("DOORDASH", "Dining"), ("UBER EATS", "Dining"),
+    ("UBER", "Transport"), ("LYFT", "Transport"), ("SHELL", "Transport"),
+    ("CHEVRON", "Transport"), ("EXXON", "Transport"),
+    ("COMCAST", "Utilities"), ("VERIZON", "Utilities"), ("AT&T", "Utilities"),
+    ("CVS", "Healthcare"), ("WALGREENS", "Healthcare"),
+    ("AMAZON", "Shopping"), ("TARGET", "Shopping"),
+    ("ZELLE", "Transfer"),
+    # Generic words
+    ("PAYROLL", "Income"), ("DIRECT DEP", "Income"), ("DIRECT DEPOSIT", "Income"), ("SALARY", "Income"),
+    ("GROCERY", "Groceries"), ("MARKET", "Groceries"),
+    ("RESTAURANT", "Dining"), ("CAFE", "Dining"),
+    ("PARKING", "Transport"),
+    ("ELECTRIC", "Utilities"), ("WATER", "Utilities"),
+    ("PHARMACY", "Healthcare"), ("INSURANCE", "Insurance"),
+    ("TRANSFER", "Transfer"), ("ATM", "ATM"), ("FEE", "Fees"), ("FEES", "Fees"),
+]
+
+
+def _words(value: str) -> str:
+    """Space-padded upper-case words — the Python twin of the merge's `words` column."""
+    return " " + " ".join(re.split(r"[^A-Z0-9&]+", value.upper())).strip() + " "
+
+
+def get_subscription_keywords() -> list[str]:
+    """Returns subscription keywords — user-configurable via KNOWN_SUBSCRIPTIONS env var."""
+    custom = getattr(settings, "KNOWN_SUBSCRIPTIONS", "")
+    if custom:
+        return [s.strip().upper() for s in custom.split(",") if s.strip()]
+    return DEFAULT_SUBSCRIPTIONS
+
+
+class IngestResult:
+    __slots__ = ("imported", "duplicates", "subscriptions", "batches")
+
+    def __init__(self):
+        self.imported = 0
+        self.duplicates = 0
+        self.subscriptions: list[dict] = []
+        self.batches: list[dict] = []   # per chunk: rows, inserted, duplicates, copy_ms, merge_ms
+
+
+_STAGING_COLUMNS = (
+    "ord", "tx_date", "description", "amount", "category", "is_income", "raw", "plaid_transaction_id",
+)
+
+_CREATE_STAGING_SQL = text("""
+    CREATE TEMP TABLE IF NOT EXISTS bank_tx_staging (
+        ord                  BIGINT,
+        tx_date              DATE,
+        description          TEXT,
+        amount               NUMERIC(10, 2),
+        category             TEXT,
+        is_income            BOOLEAN,
+        raw                  TEXT,
+        plaid_transaction_id TEXT
+    ) ON COMMIT DROP
+""")
+
+# Fingerprint formula — keep in sync with migration 007's backfill
+_MERGE_SQL = text("""
+    WITH staged AS (
+        DELETE FROM bank_tx_staging RETURNING *     -- drain: staging is empty for the next chunk
+    ), tokenized AS (
+        SELECT s.*,
+               ' ' || trim(regexp_replace(upper(s.description), '[^A-Z0-9&]+', ' ', 'g')) || ' ' AS words
+        FROM staged s
+    ), incoming AS (
+        SELECT s.*,
+               CASE WHEN s.plaid_transaction_id IS NULL THEN
+                   md5(to_char(s.tx_date, 'YYYY-MM-DD') || '|' || lower(trim(s.description))
+                       || '|' || round(s.amount, 2)::text)
+               END AS fingerprint,
+               EXISTS (
+                   SELECT 1 FROM unnest(CAST(:sub_keywords AS text[])) AS k(keyword)
+                   WHERE strpos(upper(s.description), k.keyword) > 0
+               ) AS is_subscription,
+               COALESCE(s.category, (
+                   SELECT c.category
+                   FROM unnest(CAST(:cat_keywords AS text[]), CAST(:cat_names AS text[]))
+                        WITH ORDINALITY AS c(keyword, category, pos)
+                   WHERE strpos(s.words, c.keyword) > 0      -- keywords arrive as ' WORD '
+                   ORDER BY c.pos
+                   LIMIT 1
+               )) AS resolved_category
+        FROM tokenized s
+    ), first_per_key AS (
+        SELECT DISTINCT ON (COALESCE(plaid_transaction_id, fingerprint)) *
+        FROM incoming
+        ORDER BY COALESCE(plaid_transaction_id, fingerprint), ord
+    )
+    INSERT INTO bank_transactions
+        (id, household_id, transaction_date, description, amount, category, is_income,
+         is_subscription, raw_description, source, plaid_transaction_id, fingerprint)
+    SELECT gen_random_uuid(), CAST(:hid AS uuid), tx_date, description, amount, resolved_category,
+           COALESCE(is_income, amount > 0), is_subscription, raw, :source,
+           plaid_transaction_id, fingerprint
+    FROM first_per_key
+    ON CONFLICT DO NOTHING
+    RETURNING description, amount, is_subscription
+""")
+
+
+def _staging_record(ord_: int, tx: ParsedTransaction) -> tuple:
+    tx_date = tx.date if isinstance(tx.date, date) else date.fromisoformat(str(tx.date))
+    return (
+        ord_, tx_date, tx.description, Decimal(str(tx.amount)).quantize(Decimal("0.01")),
+        tx.category, tx.is_income, tx.raw_line, tx.plaid_transaction_id,
+    )
+
+
+async def ingest_transactions(
+    db: AsyncSession,
+    household_id,
+    records: Iterable[ParsedTransaction],
+    source: str = "upload",
+    subscription_keywords: list[str] | None = None,
+) -> IngestResult:
+    """
+    COPY + merge `records` chunk by chunk into bank_transactions, skipping
+    rows already imported (or repeated within the batch).
+    """
+    keywords = [k.upper() for k in (subscription_keywords or get_subscription_keywords())]
+    params = {
+        "hid": str(household_id),
+        "source": source,
+        "sub_keywords": keywords,
+        "cat_keywords": [_words(k) for k, _ in BANK_CATEGORY_KEYWORDS],
+        "cat_names": [c for _, c in BANK_CATEGORY_KEYWORDS],
+    }
+
+    conn = await db.connection()
+    raw = (await conn.get_raw_connection()).driver_connection   # asyncpg.Connection
+    await conn.execute(_CREATE_STAGING_SQL)
+
+    result = IngestResult()
+    it = iter(records)
+    ord_ = 0
+    while True:
+        chunk = await asyncio.to_thread(lambda: list(islice(it, settings.BANK_IMPORT_CHUNK_SIZE)))
+        if not chunk:
+            break
+        rows = [_staging_record(ord_ + i, tx) for i, tx in enumerate(chunk)]
+        ord_ += len(rows)
+
+        started = time.perf_counter()
+        await raw.copy_records_to_table("bank_tx_staging", records=rows, columns=_STAGING_COLUMNS)
+        copied = time.perf_counter()
+        inserted = (await conn.execute(_MERGE_SQL, params)).fetchall()
+        merged = time.perf_counter()
+
+        result.imported += len(inserted)
+        result.duplicates += len(rows) - len(inserted)
+        result.subscriptions.extend(
+            {"description": row.description, "amount": float(row.amount)}
+            for row in inserted if row.is_subscription
+        )
+        result.batches.append({
+            "rows": len(rows),
+            "inserted": len(inserted),
+            "duplicates": len(rows) - len(inserted),
+            "copy_ms": round((copied - started) * 1000, 1),
+            "merge_ms": round((merged - copied) * 1000, 1),
+        })
+    return result
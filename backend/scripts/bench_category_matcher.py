@@ -0,0 +1,121 @@
+"""
+Category matcher benchmark — legacy linear scan vs compiled matcher.
+
+Usage (from backend/):
+    python -m scripts.bench_category_matcher [--mappings 10000] [--items 60] [--receipts 20]
+
+Generates a synthetic household with N learned mappings (realistic
+grocery-style names) and categorizes receipts of M items.  Reports per-receipt
+latency for the original O(items × mappings) scan, the one-time compile cost
+of the automaton, and per-receipt latency for the compiled matcher, and checks
+that both agree on every item whose legacy answer is unambiguous.
+
+Everything is in-process and offline; no database required.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.category_matcher import CategoryMatcher, get_category_matcher, LearnedMappings  # noqa: E402
+from app.services.receipt_parser import CATEGORY_MAP  # noqa: E402
+
+WORDS = [
+    "organic", "whole", "fresh", "frozen", "sliced", "boneless", "greek", "large",
+    "sweet", "spicy", "classic", "family", "value", "lite", "smoked", "roasted",
+    "baby", "wild", "natural", "crunchy", "honey", "garlic", "vanilla", "berry",
+]
+NOUNS = list(CATEGORY_MAP) + [
+    "granola", "hummus", "salsa", "tortilla", "pesto", "kombucha", "tofu", "quinoa",
+    "oatmeal", "ravioli", "dumpling", "falafel", "kimchi", "sauerkraut", "biscotti",
+]
+CATEGORIES = sorted(set(CATEGORY_MAP.values()))
+
+
+def _legacy_guess(name: str, learned: dict[str, str]) -> str:
+    lower = name.lower().strip()
+    if learned:
+        if lower in learned:
+            return learned[lower]
+        for keyword, category in learned.items():
+            if keyword in lower or lower in keyword:
+                return category
+    for keyword, category in CATEGORY_MAP.items():
+        if keyword in lower:
+            return category
+    return "Uncategorized"
+
+
+def _name(rng: random.Random, words: int) -> str:
+    return " ".join([rng.choice(WORDS) for _ in range(words - 1)] + [rng.choice(NOUNS)])
+
+
+def _household(rng: random.Random, size: int) -> LearnedMappings:
+    mappings: dict[str, str] = {}
+    while len(mappings) < size:
+        mappings[f"{_name(rng, rng.randint(2, 4))} {rng.randint(1, 999)}oz"] = rng.choice(CATEGORIES)
+    return LearnedMappings(mappings, cache_key=("bench", size))
+
+
+def _receipt(rng: random.Random, learned: dict[str, str], items: int) -> list[str]:
+    keys = list(learned)
+    out = []
+    for _ in range(items):
+        roll = rng.random()
+        if roll < 0.3:
+            out.append(rng.choice(keys).upper())                 # exact repeat purchase
+        elif roll < 0.4:
+            out.append(rng.choice(keys).rsplit(" ", 1)[0])        # truncated OCR line
+        else:
+            out.append(_name(rng, rng.randint(1, 3)).upper())      # new / built-in only
+    return out
+
+
+def _time_ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mappings", type=int, default=10_000)
+    parser.add_argument("--items", type=int, default=60)
+    parser.add_argument("--receipts", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    learned = _household(rng, args.mappings)
+    receipts = [_receipt(rng, learned, args.items) for _ in range(args.receipts)]
+
+    compile_ms = _time_ms(lambda: CategoryMatcher(learned))
+    get_category_matcher(learned)  # prime the per-household cache
+
+    legacy = [_time_ms(lambda r=r: [_legacy_guess(n, learned) for n in r]) for r in receipts]
+    compiled = [
+        _time_ms(lambda r=r: [get_category_matcher(learned).match(n) for n in r])
+        for r in receipts
+    ]
+
+    # Agreement: the rules only differ when several learned keywords match and
+    # the legacy dict-order scan picked a different one than longest-first.
+    matcher = get_category_matcher(learned)
+    items = [n for r in receipts for n in r]
+    agree = sum(_legacy_guess(n, learned) == matcher.match(n) for n in items)
+
+    print(f"mappings={args.mappings} items/receipt={args.items} receipts={args.receipts}")
+    print("| Matcher | p50 ms/receipt | max ms/receipt |")
+    print("| ------- | -------------- | -------------- |")
+    print(f"| legacy linear scan | {statistics.median(legacy):.2f} | {max(legacy):.2f} |")
+    print(f"| compiled (cached)  | {statistics.median(compiled):.2f} | {max(compiled):.2f} |")
+    print(f"compile once per mapping version: {compile_ms:.1f} ms")
+    print(f"agreement with legacy: {agree}/{len(items)} items")
+
+
+if __name__ == "__main__":
+    main()
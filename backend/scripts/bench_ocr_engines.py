@@ -0,0 +1,89 @@
+"""
+OCR engine benchmark — PaddleOCR (paddlepaddle) vs ONNX Runtime.
+
+Usage (from backend/):
+    python -m scripts.bench_ocr_engines samples/ [--profile balanced] [--runs 3]
+
+Each engine is measured in a fresh subprocess so cold start is honest:
+  • cold start  — import + engine construction + first inference
+  • peak RSS    — ru_maxrss of the child after all runs
+  • latency     — p50 / p95 per image, warm
+
+ONNX thread counts come from ONNX_INTRA_OP_THREADS / ONNX_INTER_OP_THREADS.
+Prints a markdown table ready to paste into docs/02-receipt-scanning.md.
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+SAMPLE_EXTS = {".jpg", ".jpeg", ".png", ".tiff", ".bmp", ".pdf"}
+ENGINES = {"paddleocr": "_paddleocr", "onnxruntime": "_onnx_ocr"}
+
+
+def _child(engine: str, samples: list[str], profile: str, runs: int) -> None:
+    """Runs inside the subprocess; prints one JSON line of measurements."""
+    start = time.perf_counter()
+    from app.services import ocr_service
+    run = getattr(ocr_service, ENGINES[engine])
+    run(samples[0], profile)
+    cold_start = time.perf_counter() - start
+
+    latencies = []
+    for path in samples:
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            run(path, profile)
+            latencies.append((time.perf_counter() - t0) * 1000)
+    latencies.sort()
+    print(json.dumps({
+        "engine": engine,
+        "cold_start_s": cold_start,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("samples", type=Path)
+    parser.add_argument("--profile", default="balanced")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--engines", default=",".join(ENGINES))
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    samples = sorted(str(p) for p in args.samples.iterdir() if p.suffix.lower() in SAMPLE_EXTS)
+    if not samples:
+        parser.error(f"no sample documents in {args.samples}")
+
+    if args.child:
+        _child(args.child, samples, args.profile, args.runs)
+        return
+
+    print("| Engine | Cold start s | Peak RSS MB | p50 ms | p95 ms |")
+    print("| ------ | ------------ | ----------- | ------ | ------ |")
+    for engine in args.engines.split(","):
+        out = subprocess.run(
+            [sys.executable, "-m", "scripts.bench_ocr_engines", str(args.samples),
+             "--profile", args.profile, "--runs", str(args.runs), "--child", engine],
+            capture_output=True, text=True, cwd=Path(__file__).resolve().parents[1],
+            env={**os.environ, "USE_ONNX_OCR": str(engine == "onnxruntime").lower()},
+        )
+        if out.returncode != 0:
+            print(f"| {engine} | failed: {out.stderr.strip().splitlines()[-1] if out.stderr else '?'} | | | |")
+            continue
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"| {r['engine']} | {r['cold_start_s']:.1f} | {r['rss_mb']:.0f} | {r['p50_ms']:.0f} | {r['p95_ms']:.0f} |")
+
+
+if __name__ == "__main__":
+    main()
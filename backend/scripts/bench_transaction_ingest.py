@@ -0,0 +1,124 @@
+"""
+Transaction ingest benchmark — per-row INSERT path vs COPY + merge.
+
+Usage (from backend/):
+    python -m scripts.bench_transaction_ingest [--rows 20000] [--dup-rate 0.1]
+
+Needs a migrated database at DATABASE_URL.  Creates a scratch household,
+imports the same synthetic statement twice with each path (the second run is
+all duplicates, like a re-uploaded file) and reports rows/s.  The per-row path
+is the original statement import: one duplicate-check SELECT and one INSERT per
+row.  Everything the benchmark writes is rolled back.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import and_, insert, select, text  # noqa: E402
+
+from app.database import AsyncSessionLocal, engine  # noqa: E402
+from app.models.goal import BankTransaction  # noqa: E402
+from app.services.bank_parser import ParsedTransaction  # noqa: E402
+from app.services.transaction_ingest import get_subscription_keywords, ingest_transactions  # noqa: E402
+
+MERCHANTS = [
+    "WALMART SUPERCENTER", "KROGER #123", "STARBUCKS STORE", "SHELL OIL", "NETFLIX.COM",
+    "SPOTIFY USA", "AMAZON MKTPLACE", "TARGET T-1234", "UBER TRIP", "PAYROLL ACME CORP",
+    "CVS PHARMACY", "COMCAST CABLE", "ATM WITHDRAWAL", "ZELLE TRANSFER", "LOCAL DINER",
+]
+
+
+def _statement(rng: random.Random, rows: int, dup_rate: float) -> list[ParsedTransaction]:
+    start = date(2024, 1, 1)
+    out: list[ParsedTransaction] = []
+    for i in range(rows):
+        if out and rng.random() < dup_rate:
+            prev = out[rng.randrange(len(out))]
+            out.append(ParsedTransaction(prev.date, prev.description, prev.amount, prev.raw_line))
+            continue
+        desc = f"{rng.choice(MERCHANTS)} {i:06d}"
+        amount = round(rng.uniform(-250, -1), 2) if rng.random() > 0.05 else round(rng.uniform(500, 3000), 2)
+        out.append(ParsedTransaction(start + timedelta(days=rng.randrange(365)), desc, amount, desc))
+    return out
+
+
+async def _per_row(db, household_id, records: list[ParsedTransaction]) -> None:
+    keywords = get_subscription_keywords()
+    for tx in records:
+        dup = await db.execute(
+            select(BankTransaction.id).where(
+                and_(
+                    BankTransaction.household_id == household_id,
+                    BankTransaction.transaction_date == tx.date,
+                    BankTransaction.description == tx.description,
+                    BankTransaction.amount == tx.amount,
+                )
+            ).limit(1)
+        )
+        if dup.scalar_one_or_none():
+            continue
+        await db.execute(insert(BankTransaction).values(
+            household_id=household_id,
+            transaction_date=tx.date,
+            description=tx.description,
+            amount=tx.amount,
+            is_subscription=any(k in tx.description.upper() for k in keywords),
+            is_income=tx.amount > 0,
+            raw_description=tx.raw_line,
+            source="upload",
+        ))
+
+
+async def _copy_merge(db, household_id, records: list[ParsedTransaction]) -> None:
+    await ingest_transactions(db, household_id, records)
+
+
+async def _run(name: str, fn, records: list[ParsedTransaction]) -> list[float]:
+    """Two imports of the same file inside one rolled-back transaction; rows/s for each."""
+    rates = []
+    async with AsyncSessionLocal() as db:
+        household_id = uuid.uuid4()
+        await db.execute(
+            text("INSERT INTO households (id, name) VALUES (:id, :name)"),
+            {"id": str(household_id), "name": f"bench {name}"},
+        )
+        for _ in range(2):
+            started = time.perf_counter()
+            await fn(db, household_id, records)
+            rates.append(len(records) / (time.perf_counter() - started))
+        await db.rollback()
+    return rates
+
+
+async def main_async(args) -> None:
+    records = _statement(random.Random(args.seed), args.rows, args.dup_rate)
+    try:
+        per_row = await _run("per-row", _per_row, records)
+        copied = await _run("copy", _copy_merge, records)
+    finally:
+        await engine.dispose()
+
+    print(f"rows={args.rows} dup_rate={args.dup_rate}")
+    print("| Path | first import rows/s | re-import rows/s |")
+    print("| ---- | ------------------- | ---------------- |")
+    print(f"| per-row SELECT + INSERT | {per_row[0]:,.0f} | {per_row[1]:,.0f} |")
+    print(f"| COPY + merge            | {copied[0]:,.0f} | {copied[1]:,.0f} |")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--dup-rate", type=float, default=0.1, help="share of rows repeating an earlier row")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
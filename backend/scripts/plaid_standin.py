@@ -0,0 +1,292 @@
+"""
+Plaid stand-in server — the Plaid endpoints the app calls, served from memory.
+
+Usage (from backend/):
+    python -m scripts.plaid_standin [--port 8765] [--history 1200] [--mutation-rate 0]
+
+Then run the API with PLAID_BASE_URL=http://127.0.0.1:8765 and any non-empty
+PLAID_CLIENT_ID / PLAID_SECRET.  Linking an item (any public_token) seeds it
+with --history transactions.  /transactions/sync pages through the item's
+change log by cursor, like Plaid: a fresh cursor returns the full history,
+later cursors only what changed since.
+
+Webhooks: with --webhook-url, every change to an item's log POSTs a signed
+TRANSACTIONS / SYNC_UPDATES_AVAILABLE webhook there (ES256 Plaid-Verification
+JWT; the public key is served by /webhook_verification_key/get).
+/sandbox/item/fire_webhook sends one on demand, as in Plaid's sandbox.
+
+Stand-in only:
+    POST /standin/mutate   {"access_token", "added": n, "modified": n, "removed": n}
+                           appends changes to the item's log
+    GET  /standin/stats    requests served and transactions returned per endpoint
+
+--mutation-rate makes that share of follow-up /transactions/sync pages fail with
+TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION, as Plaid does when an item
+changes mid-pagination.
+"""
+import argparse
+import hashlib
+import json
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+MERCHANTS = [
+    ("Walmart", "GENERAL_MERCHANDISE"), ("Kroger", "FOOD_AND_DRINK"), ("Starbucks", "FOOD_AND_DRINK"),
+    ("Shell", "TRANSPORTATION"), ("Netflix", "ENTERTAINMENT"), ("Uber", "TRANSPORTATION"),
+    ("Comcast", "RENT_AND_UTILITIES"), ("CVS Pharmacy", "MEDICAL"), ("Amazon", "GENERAL_MERCHANDISE"),
+]
+
+
+class WebhookSigner:
+    """Signs webhook bodies the way Plaid does: ES256 JWT over the body's SHA-256."""
+
+    def __init__(self):
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import ec
+        from jose import jwk
+
+        private = ec.generate_private_key(ec.SECP256R1())
+        self.key_id = uuid.uuid4().hex
+        self._private_pem = private.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+        ).decode()
+        public_pem = private.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo,
+        ).decode()
+        self.public_jwk = {
+            **jwk.construct(public_pem, "ES256").to_dict(),
+            "alg": "ES256", "kid": self.key_id, "use": "sig",
+            "created_at": int(time.time()), "expired_at": None,
+        }
+
+    def sign(self, body: bytes) -> str:
+        from jose import jwt
+        claims = {"iat": int(time.time()), "request_body_sha256": hashlib.sha256(body).hexdigest()}
+        return jwt.encode(claims, self._private_pem, algorithm="ES256", headers={"kid": self.key_id})
+
+
+class _Item:
+    def __init__(self, item_id: str, rng: random.Random, history: int):
+        self.item_id = item_id
+        self.rng = rng
+        self.live: dict[str, dict] = {}
+        self.log: list[tuple[str, dict]] = []      # (kind, transaction); cursor = position in the log
+        self.add(history)
+
+    def _transaction(self) -> dict:
+        name, category = self.rng.choice(MERCHANTS)
+        income = self.rng.random() < 0.05
+        return {
+            "transaction_id": uuid.uuid4().hex,
+            "account_id": f"{self.item_id}-checking",
+            "date": (date.today() - timedelta(days=self.rng.randrange(720))).isoformat(),
+            "name": "Payroll ACME" if income else name.upper(),
+            "merchant_name": None if income else name,
+            # Plaid sign convention: debits positive, credits negative
+            "amount": -round(self.rng.uniform(900, 2500), 2) if income else round(self.rng.uniform(2, 250), 2),
+            "pending": False,
+            "personal_finance_category": {"primary": "INCOME" if income else category},
+        }
+
+    def add(self, n: int) -> None:
+        for _ in range(n):
+            tx = self._transaction()
+            self.live[tx["transaction_id"]] = tx
+            self.log.append(("added", tx))
+
+    def modify(self, n: int) -> None:
+        for tx_id in self.rng.sample(list(self.live), min(n, len(self.live))):
+            tx = {**self.live[tx_id], "amount": round(self.live[tx_id]["amount"] * 1.1, 2)}
+            self.live[tx_id] = tx
+            self.log.append(("modified", tx))
+
+    def remove(self, n: int) -> None:
+        for tx_id in self.rng.sample(list(self.live), min(n, len(self.live))):
+            del self.live[tx_id]
+            self.log.append(("removed", {"transaction_id": tx_id}))
+
+
+def create_app(history: int = 1200, mutation_rate: float = 0.0, seed: int = 7, webhook_url: str = "") -> FastAPI:
+    app = FastAPI(title="Plaid stand-in")
+    rng = random.Random(seed)
+    items: dict[str, _Item] = {}               # access_token → item
+    stats: Counter = Counter()
+    signer = WebhookSigner()
+    app.state.signer = signer
+
+    async def fire_webhook(item: _Item, webhook_type: str = "TRANSACTIONS",
+                           webhook_code: str = "SYNC_UPDATES_AVAILABLE") -> bool:
+        if not webhook_url:
+            return False
+        import httpx
+        body = json.dumps({
+            "webhook_type": webhook_type, "webhook_code": webhook_code, "item_id": item.item_id,
+            "initial_update_complete": True, "historical_update_complete": True, "environment": "sandbox",
+        }).encode()
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            await client.post(webhook_url, content=body, headers={
+                "Content-Type": "application/json", "Plaid-Verification": signer.sign(body),
+            })
+        stats["webhooks sent"] += 1
+        return True
+
+    def plaid_error(code: str, message: str, status: int = 400, error_type: str = "INVALID_INPUT"):
+        return JSONResponse(status_code=status, content={
+            "error_type": error_type, "error_code": code, "error_message": message,
+            "display_message": None, "request_id": uuid.uuid4().hex[:12],
+        })
+
+    async def body(request: Request) -> dict | JSONResponse:
+        data = await request.json()
+        if not data.get("client_id") or not data.get("secret"):
+            return plaid_error("INVALID_API_KEYS", "invalid client_id or secret provided", error_type="INVALID_REQUEST")
+        stats[request.url.path] += 1
+        return data
+
+    def item_for(data: dict) -> _Item | JSONResponse:
+        item = items.get(data.get("access_token", ""))
+        return item or plaid_error("INVALID_ACCESS_TOKEN", "provided access token is in an invalid format")
+
+    @app.post("/link/token/create")
+    async def link_token_create(request: Request):
+        data = await body(request)
+        if isinstance(data, JSONResponse):
+            return data
+        return {"link_token": f"link-standin-{uuid.uuid4()}", "expiration": "2099-01-01T00:00:00Z",
+                "request_id": uuid.uuid4().hex[:12]}
+
+    @app.post("/item/public_token/exchange")
+    async def public_token_exchange(request: Request):
+        data = await body(request)
+        if isinstance(data, JSONResponse):
+            return data
+        access_token, item_id = f"access-standin-{uuid.uuid4()}", f"item-standin-{uuid.uuid4().hex[:12]}"
+        items[access_token] = _Item(item_id, random.Random(rng.random()), history)
+        return {"access_token": access_token, "item_id": item_id, "request_id": uuid.uuid4().hex[:12]}
+
+    @app.post("/item/get")
+    async def item_get(request: Request):
+        data = await body(request)
+        if isinstance(data, JSONResponse):
+            return data
+        item = item_for(data)
+        if isinstance(item, JSONResponse):
+            return item
+        return {"item": {"item_id": item.item_id, "institution_id": "ins_standin"}}
+
+    @app.post("/institutions/get_by_id")
+    async def institutions_get_by_id(request: Request):
+        data = await body(request)
+        if isinstance(data, JSONResponse):
+            return data
+        return {"institution": {"institution_id": data.get("institution_id"), "name": "Stand-in Bank",
+                                "logo": None, "primary_color": "#0a85ea"}}
+
+    @app.post("/accounts/get")
+    async def accounts_get(request: Request):
+        data = await body(request)
+        if isinstance(data, JSONResponse):
+            return data
+        item = item_for(data)
+        if isinstance(item, JSONResponse):
+            return item
+        return {"accounts": [{"account_id": f"{item.item_id}-checking", "name": "Checking",
+                              "type": "depository", "subtype": "checking"}]}
+
+    @app.post("/transactions/sync")
+    async def transactions_sync(request: Request):
+        data = await body(request)
+        if isinstance(data, JSONResponse):
+            return data
+        item = item_for(data)
+        if isinstance(item, JSONResponse):
+            return item
+        cursor = data.get("cursor") or "0"
+        if not cursor.isdigit() or int(cursor) > len(item.log):
+            return plaid_error("INVALID_FIELD", "cursor is invalid")
+        start = int(cursor)
+        if start and mutation_rate and rng.random() < mutation_rate:
+            return plaid_error("TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION",
+                               "underlying transaction data changed since last page was fetched",
+                               error_type="TRANSACTIONS_ERROR")
+        count = max(1, min(int(data.get("count", 100)), 500))
+        page = item.log[start:start + count]
+        stats["transactions returned"] += len(page)
+        return {
+            "added": [tx for kind, tx in page if kind == "added"],
+            "modified": [tx for kind, tx in page if kind == "modified"],
+            "removed": [tx for kind, tx in page if kind == "removed"],
+            "next_cursor": str(start + len(page)),
+            "has_more": start + len(page) < len(item.log),
+            "request_id": uuid.uuid4().hex[:12],
+        }
+
+    @app.post("/webhook_verification_key/get")
+    async def webhook_verification_key_get(request: Request):
+        data = await body(request)
+        if isinstance(data, JSONResponse):
+            return data
+        if data.get("key_id") != signer.key_id:
+            return plaid_error("INVALID_FIELD", "key_id not found")
+        return {"key": signer.public_jwk, "request_id": uuid.uuid4().hex[:12]}
+
+    @app.post("/sandbox/item/fire_webhook")
+    async def sandbox_fire_webhook(request: Request):
+        data = await body(request)
+        if isinstance(data, JSONResponse):
+            return data
+        item = item_for(data)
+        if isinstance(item, JSONResponse):
+            return item
+        fired = await fire_webhook(item, data.get("webhook_type", "TRANSACTIONS"),
+                                   data.get("webhook_code", "SYNC_UPDATES_AVAILABLE"))
+        return {"webhook_fired": fired, "request_id": uuid.uuid4().hex[:12]}
+
+    @app.post("/standin/mutate")
+    async def mutate(request: Request):
+        data = await request.json()
+        item = item_for(data)
+        if isinstance(item, JSONResponse):
+            return item
+        item.add(int(data.get("added", 0)))
+        item.modify(int(data.get("modified", 0)))
+        item.remove(int(data.get("removed", 0)))
+        fired = await fire_webhook(item)
+        return {"item_id": item.item_id, "log_length": len(item.log), "live": len(item.live), "webhook_fired": fired}
+
+    @app.get("/standin/stats")
+    async def standin_stats():
+        return dict(stats)
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--history", type=int, default=1200, help="transactions seeded per linked item")
+    parser.add_argument("--mutation-rate", type=float, default=0.0,
+                        help="share of follow-up sync pages failing with MUTATION_DURING_PAGINATION")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--webhook-url", default="",
+                        help="e.g. http://127.0.0.1:8000/api/plaid/webhook — receives SYNC_UPDATES_AVAILABLE")
+    args = parser.parse_args()
+
+    import uvicorn
+    app = create_app(args.history, args.mutation_rate, args.seed, args.webhook_url)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+-- ============================================================
+-- Migration 004 — Versioned category mappings
+-- Workers cache each household's category_overrides in memory and
+-- revalidate with a primary-key lookup of this counter, which is bumped
+-- in the same statement that upserts the overrides.
+-- Run: psql -U tracker_user -d tracker_db -f 004_category_mapping_version.sql
+-- ============================================================
+ALTER TABLE households
+    ADD COLUMN IF NOT EXISTS category_mapping_version BIGINT NOT NULL DEFAULT 0;
+
+COMMENT ON COLUMN households.category_mapping_version IS 'Incremented on every category_overrides change; cache validator';
@@ -0,0 +1,33 @@
+-- ============================================================
+-- Migration 005 — Crowd-sourced product catalog
+-- product_catalog is rebuilt nightly from confirmed pantry items and
+-- category overrides across households (product_catalog_service.py).
+-- Workers keep an in-memory snapshot keyed by normalized_name and reload it
+-- when MAX(updated_at) moves.
+-- Run: psql -U tracker_user -d tracker_db -f 005_product_catalog_aggregation.sql
+-- ============================================================
+ALTER TABLE product_catalog
+    ADD COLUMN IF NOT EXISTS normalized_name TEXT,
+    ADD COLUMN IF NOT EXISTS sample_count    INT NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS household_count INT NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+-- Backfill existing rows; duplicates of a name keep NULL (not looked up)
+UPDATE product_catalog pc
+SET normalized_name = d.normalized_name
+FROM (
+    SELECT id, lower(trim(name)) AS normalized_name,
+           ROW_NUMBER() OVER (PARTITION BY lower(trim(name)) ORDER BY id) AS rn
+    FROM product_catalog
+) d
+WHERE pc.id = d.id AND d.rn = 1 AND pc.normalized_name IS NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_catalog_normalized_name
+    ON product_catalog(normalized_name);
+
+-- Snapshot version check: SELECT MAX(updated_at) is an index-only lookup
+CREATE INDEX IF NOT EXISTS idx_catalog_updated_at
+    ON product_catalog(updated_at);
+
+COMMENT ON COLUMN product_catalog.normalized_name IS 'lower(trim(name)); join key for pantry_items / category_overrides';
+COMMENT ON COLUMN product_catalog.avg_shelf_life_days IS 'Median purchase→expiration days across households';
@@ -0,0 +1,15 @@
+-- ============================================================
+-- Migration 006 — Historical receipt re-parse
+-- receipt_reparse.py re-runs the local parser + categorizer over stored
+-- raw_ocr_text and writes the result back in bulk.
+-- Run: psql -U tracker_user -d tracker_db -f 006_receipt_reparse.sql
+-- ============================================================
+ALTER TABLE receipts
+    ADD COLUMN IF NOT EXISTS parsed_items   JSONB,
+    ADD COLUMN IF NOT EXISTS parser_version INT;
+
+COMMENT ON COLUMN receipts.parsed_items IS 'Items from the local parser: [{name, price, category, category_confidence, quantity, unit}]';
+COMMENT ON COLUMN receipts.parser_version IS 'receipt_parser.PARSER_VERSION that produced parsed_items';
+
+-- Keyset pagination (household_id, id) — one household's receipts per batch
+CREATE INDEX IF NOT EXISTS idx_receipts_household_id_id ON receipts(household_id, id);
@@ -0,0 +1,38 @@
+-- ============================================================
+-- Migration 007 — Statement import fingerprints
+-- Uploaded statement rows carry md5(date|lower(trim(description))|amount);
+-- a unique partial index per household lets imports dedupe with
+-- INSERT … ON CONFLICT DO NOTHING instead of one lookup per row.
+-- Plaid rows keep NULL (deduped by plaid_transaction_id) — genuine repeats
+-- such as two identical coffees on one day stay possible there.
+-- Run: psql -U tracker_user -d tracker_db -f 007_transaction_fingerprint.sql
+-- ============================================================
+ALTER TABLE bank_transactions
+    ADD COLUMN IF NOT EXISTS fingerprint VARCHAR(32);
+
+-- Backfill: existing duplicate groups keep one fingerprinted row, so the
+-- unique index can be built and future imports still skip them
+UPDATE bank_transactions bt
+SET fingerprint = f.fingerprint
+FROM (
+    SELECT id, household_id, fingerprint,
+           ROW_NUMBER() OVER (PARTITION BY household_id, fingerprint ORDER BY created_at, id) AS rn
+    FROM (
+        SELECT id, household_id, created_at,
+               md5(to_char(transaction_date, 'YYYY-MM-DD') || '|' || lower(trim(description))
+                   || '|' || round(amount, 2)::text) AS fingerprint
+        FROM bank_transactions
+        WHERE source <> 'plaid' AND fingerprint IS NULL
+    ) fp
+) f
+WHERE bt.id = f.id AND f.rn = 1
+  AND NOT EXISTS (   -- safe to re-run: never collide with an already fingerprinted row
+      SELECT 1 FROM bank_transactions x
+      WHERE x.household_id = f.household_id AND x.fingerprint = f.fingerprint
+  );
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_bank_household_fingerprint
+    ON bank_transactions(household_id, fingerprint)
+    WHERE fingerprint IS NOT NULL;
+
+COMMENT ON COLUMN bank_transactions.fingerprint IS 'md5(date|lower(trim(description))|amount) for statement imports; NULL for Plaid';
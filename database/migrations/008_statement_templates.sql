@@ -0,0 +1,19 @@
+-- ============================================================
+-- Migration 008 — Statement templates
+-- One learned parsing template per bank statement layout, keyed by the
+-- fingerprint of its column header line.  Learned from the first Gemini
+-- result for a layout; later statements of that layout parse locally.
+-- Holds column positions, date format and hashed noise lines only —
+-- no statement text — so templates are shared across households.
+-- Run: psql -U tracker_user -d tracker_db -f 008_statement_templates.sql
+-- ============================================================
+CREATE TABLE IF NOT EXISTS statement_templates (
+    id          UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    fingerprint VARCHAR(32) NOT NULL UNIQUE,
+    bank_name   VARCHAR(255),
+    template    JSONB NOT NULL,
+    hits        INT NOT NULL DEFAULT 0,      -- statements parsed locally
+    misses      INT NOT NULL DEFAULT 0,      -- matched but fell back to Gemini since last learned
+    created_at  TIMESTAMP DEFAULT NOW(),
+    updated_at  TIMESTAMP DEFAULT NOW()
+);
@@ -0,0 +1,10 @@
+-- ============================================================
+-- Migration 009 — Plaid incremental sync
+-- Each linked item keeps its /transactions/sync cursor; a sync fetches
+-- only what was added, modified or removed since it.  Existing items start
+-- at NULL: their first sync replays the history, and rows already imported
+-- are skipped by the plaid_transaction_id unique index.
+-- Run: psql -U tracker_user -d tracker_db -f 009_plaid_sync_cursor.sql
+-- ============================================================
+ALTER TABLE plaid_items
+    ADD COLUMN IF NOT EXISTS sync_cursor TEXT;
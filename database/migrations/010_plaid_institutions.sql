@@ -0,0 +1,19 @@
+-- ============================================================
+-- Migration 010 — Plaid institution cache
+-- Institution name / logo / brand colour fetched once per institution and
+-- shared by every worker (plaid_institutions service); refreshed after
+-- PLAID_INSTITUTION_CACHE_HOURS.  plaid_items records its institution_id
+-- so linked banks can show the logo and syncs can be grouped by bank.
+-- Run: psql -U tracker_user -d tracker_db -f 010_plaid_institutions.sql
+-- ============================================================
+CREATE TABLE IF NOT EXISTS plaid_institutions (
+    institution_id  TEXT PRIMARY KEY,            -- Plaid's ins_…
+    name            TEXT NOT NULL,
+    logo            TEXT,                        -- base64 PNG
+    primary_color   TEXT,
+    url             TEXT,
+    fetched_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE plaid_items
+    ADD COLUMN IF NOT EXISTS institution_id TEXT;
@@ -0,0 +1,17 @@
+-- ============================================================
+-- Migration 011 — Background Plaid sync state
+-- Per-item sync latency, error counts and backoff for the sync scheduler
+-- (plaid_sync_scheduler).  Items are walked oldest-synced first, skipping
+-- those whose next_sync_at (backoff) is still in the future.
+-- Run: psql -U tracker_user -d tracker_db -f 011_plaid_sync_state.sql
+-- ============================================================
+ALTER TABLE plaid_items
+    ADD COLUMN IF NOT EXISTS last_sync_ms     INT,
+    ADD COLUMN IF NOT EXISTS sync_error_count INT NOT NULL DEFAULT 0,   -- consecutive failures
+    ADD COLUMN IF NOT EXISTS sync_error_total INT NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS last_sync_error  TEXT,
+    ADD COLUMN IF NOT EXISTS next_sync_at     TIMESTAMPTZ;              -- backoff: not before
+
+-- Scheduler walk order (matches plaid_sync_scheduler's keyset)
+CREATE INDEX IF NOT EXISTS idx_plaid_items_sync_order
+    ON plaid_items ((COALESCE(last_synced_at, TIMESTAMPTZ 'epoch')), item_id);
@@ -0,0 +1,22 @@
+-- ============================================================
+-- Migration 012 — Expo push tickets
+-- One row per push Expo accepted.  The receipt job (push_receipts) polls
+-- Expo for each ticket's receipt, records the outcome and error class, and
+-- deletes tokens Expo reports as DeviceNotRegistered, so later sends only
+-- reach live devices.  Rows are kept EXPO_RECEIPT_RETENTION_DAYS.
+-- Run: psql -U tracker_user -d tracker_db -f 012_push_tickets.sql
+-- ============================================================
+CREATE TABLE IF NOT EXISTS push_tickets (
+    ticket_id   TEXT PRIMARY KEY,                          -- Expo ticket / receipt id
+    token       TEXT NOT NULL,                             -- no FK: tickets outlive pruned tokens
+    status      VARCHAR(10) NOT NULL DEFAULT 'pending'
+                CHECK (status IN ('pending', 'ok', 'error', 'expired')),
+    error       VARCHAR(50),                               -- receipt details.error, e.g. DeviceNotRegistered
+    sent_at     TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    receipt_at  TIMESTAMPTZ                                -- when the receipt was fetched
+);
+
+-- Receipt job walk (keyset on ticket_id over pending tickets only)
+CREATE INDEX IF NOT EXISTS idx_push_tickets_pending
+    ON push_tickets (ticket_id) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_push_tickets_sent ON push_tickets (sent_at);
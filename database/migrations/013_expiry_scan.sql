@@ -0,0 +1,14 @@
+-- ============================================================
+-- Migration 013 — Time-zone aware, keyset-paginated expiry scan
+-- households.timezone: expiry alerts go out at EXPIRY_ALERT_HOUR local time.
+-- The expiry job walks live pantry items in household order, one page of
+-- households at a time; this partial index serves that walk directly
+-- (idx_pantry_expiry, on expiration_date alone, cannot give household order).
+-- Run: psql -U tracker_user -d tracker_db -f 013_expiry_scan.sql
+-- ============================================================
+ALTER TABLE households
+    ADD COLUMN IF NOT EXISTS timezone VARCHAR(64) NOT NULL DEFAULT 'UTC';   -- IANA name
+
+CREATE INDEX IF NOT EXISTS idx_pantry_expiry_household
+    ON pantry_items (household_id, expiration_date)
+    WHERE status IN ('UNOPENED', 'OPENED');
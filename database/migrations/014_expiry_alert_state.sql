@@ -0,0 +1,25 @@
+-- ============================================================
+-- Migration 014 — Per-item expiry alert state
+-- Each live pantry item remembers the days-left threshold it was last
+-- alerted at (EXPIRY_ALERT_THRESHOLDS), the household-local date of that
+-- alert and the expiration date it was for.  The expiry job only alerts
+-- items that crossed a new threshold or whose expiration date was edited,
+-- so pushes and in-app notifications scale with new events.
+-- Run: psql -U tracker_user -d tracker_db -f 014_expiry_alert_state.sql
+-- ============================================================
+ALTER TABLE pantry_items
+    ADD COLUMN IF NOT EXISTS expiry_alert_level SMALLINT,   -- threshold last alerted (days left)
+    ADD COLUMN IF NOT EXISTS expiry_alerted_on  DATE,       -- household-local date of that alert
+    ADD COLUMN IF NOT EXISTS expiry_alert_for   DATE;       -- expiration_date the alert was for
+
+-- Items already past expiry were alerted daily by the old job: record them as
+-- alerted at the final threshold so they are not announced once more.
+UPDATE pantry_items p
+SET expiry_alert_level = 0,
+    expiry_alerted_on  = p.expiration_date,
+    expiry_alert_for   = p.expiration_date
+FROM households h
+WHERE h.id = p.household_id
+  AND p.status IN ('UNOPENED', 'OPENED')
+  AND p.expiration_date < (NOW() AT TIME ZONE h.timezone)::date
+  AND p.expiry_alert_for IS NULL;
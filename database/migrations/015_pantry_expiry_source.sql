@@ -0,0 +1,30 @@
+-- ============================================================
+-- Migration 015 — Pantry expiry provenance
+-- pantry_items.expiry_source records who set expiration_date: 'user',
+-- 'catalog' (product_catalog shelf life) or 'default' (category default).
+-- The product catalog job takes shelf-life samples from 'user' rows only,
+-- so derived dates no longer feed back into the catalog.  Products without
+-- user samples keep avg_shelf_life_days NULL and fall back to the category
+-- default instead of a flat 30 days.
+-- Run: psql -U tracker_user -d tracker_db -f 015_pantry_expiry_source.sql
+-- ============================================================
+ALTER TABLE pantry_items
+    ADD COLUMN IF NOT EXISTS expiry_source VARCHAR(10)
+        CHECK (expiry_source IN ('user', 'catalog', 'default'));
+
+-- Existing rows: manual adds carried a user-entered date; receipt items were
+-- dated by the system
+UPDATE pantry_items
+SET expiry_source = CASE WHEN receipt_id IS NULL THEN 'user' ELSE 'default' END
+WHERE expiration_date IS NOT NULL AND expiry_source IS NULL;
+
+ALTER TABLE product_catalog
+    ALTER COLUMN avg_shelf_life_days DROP NOT NULL,
+    ALTER COLUMN avg_shelf_life_days DROP DEFAULT;
+
+-- Drop the made-up 30-day values; the next refresh recomputes from user samples
+UPDATE product_catalog SET avg_shelf_life_days = NULL, updated_at = NOW()
+WHERE normalized_name IS NOT NULL;
+
+COMMENT ON COLUMN product_catalog.avg_shelf_life_days IS
+    'Median purchase→expiration days over user-entered expiries; NULL = use the category default';
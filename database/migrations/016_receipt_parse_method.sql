@@ -0,0 +1,22 @@
+-- ============================================================
+-- Migration 016 — Receipt parse provenance
+-- receipts.parse_method records which parser produced parsed_items:
+-- 'local' (receipt_parser, fast path or regex fallback) or 'gemini'.
+-- receipt_reparse.py only re-parses unconfirmed receipts whose items came
+-- from the local parser (or were never parsed), so a PARSER_VERSION bump
+-- never replaces Gemini items with regex output.  parser_version is only
+-- set on local parses.
+-- Run: psql -U tracker_user -d tracker_db -f 016_receipt_parse_method.sql
+-- ============================================================
+ALTER TABLE receipts
+    ADD COLUMN IF NOT EXISTS parse_method VARCHAR(10)
+        CHECK (parse_method IN ('local', 'gemini'));
+
+COMMENT ON COLUMN receipts.parsed_items IS
+    'Items offered for review until confirm: [{name, price, category, quantity, unit, ...}]';
+COMMENT ON COLUMN receipts.parser_version IS
+    'receipt_parser.PARSER_VERSION of a local parse; NULL for Gemini items';
+
+-- "Confirmed" = has pantry items; the re-parse checks it per receipt
+CREATE INDEX IF NOT EXISTS idx_pantry_items_receipt ON pantry_items(receipt_id)
+    WHERE receipt_id IS NOT NULL;